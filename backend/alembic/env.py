@@ -5,6 +5,7 @@ from sqlalchemy import engine_from_config, pool
 
 from app.db.base import Base
 from app.models import entities  # noqa: F401
+from app.services.partitions import PARTITIONED_TABLES, partition_month
 
 config = context.config
 if config.config_file_name is not None:
@@ -13,9 +14,19 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    # Monthly/default partitions and the per-partition copies Postgres makes of the foreign keys into comments are
+    # managed by migrations and partition maintenance, not by the models.
+    if type_ == "table" and reflected and compare_to is None:
+        return not (partition_month(name) or (name.endswith("_default") and name[: -len("_default")] in PARTITIONED_TABLES))
+    if type_ == "foreign_key_constraint" and reflected and compare_to is None:
+        return obj.table.name not in PARTITIONED_TABLES
+    return True
+
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
-    context.configure(url=url, target_metadata=target_metadata, literal_binds=True)
+    context.configure(url=url, target_metadata=target_metadata, literal_binds=True, include_object=include_object)
     with context.begin_transaction():
         context.run_migrations()
 
@@ -23,7 +34,7 @@ def run_migrations_offline() -> None:
 def run_migrations_online() -> None:
     connectable = engine_from_config(config.get_section(config.config_ini_section), prefix="sqlalchemy.", poolclass=pool.NullPool)
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
         with context.begin_transaction():
             context.run_migrations()
 
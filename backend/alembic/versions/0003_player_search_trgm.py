@@ -0,0 +1,39 @@
+"""trigram indexes for player search
+
+Revision ID: 0003_player_search_trgm
+Revises: 0002_wikidata_qid
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_player_search_trgm"
+down_revision = "0002_wikidata_qid"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_players_normalized_name_trgm",
+        "players",
+        ["normalized_name"],
+        postgresql_using="gin",
+        postgresql_ops={"normalized_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_player_aliases_normalized_alias_trgm",
+        "player_aliases",
+        ["normalized_alias"],
+        postgresql_using="gin",
+        postgresql_ops={"normalized_alias": "gin_trgm_ops"},
+    )
+    op.create_index("ix_players_team_trgm", "players", [sa.text("lower(team) gin_trgm_ops")], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_players_team_trgm", table_name="players")
+    op.drop_index("ix_player_aliases_normalized_alias_trgm", table_name="player_aliases")
+    op.drop_index("ix_players_normalized_name_trgm", table_name="players")
@@ -0,0 +1,265 @@
+"""monthly range partitioning for comments, comment_entities and sentiment_scores
+
+Revision ID: 0004_partition_comments
+Revises: 0003_player_search_trgm
+Create Date: 2026-10-19
+
+Postgres cannot turn an existing heap into a partitioned table, so each table is
+renamed to *_legacy, recreated as a partitioned parent and copied across. Every
+unique key on a partitioned table must contain the partition key, which is why
+the primary keys, the dedup constraints and the foreign keys into comments carry
+the comment timestamp. The ORM keeps `id` as the identity column; ids still come
+from the original sequences and remain unique.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004_partition_comments"
+down_revision = "0003_player_search_trgm"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+ENSURE_PARTITIONS_FN = """
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent text, from_ts timestamp, to_ts timestamp)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', from_ts)::date;
+    part_name text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= to_ts LOOP
+        part_name := format('%s_p%s', parent, to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                part_name, parent, month_start, (month_start + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$;
+"""
+
+TABLES = ("comments", "comment_entities", "sentiment_scores")
+
+
+def _drop_constraints(table: str) -> None:
+    # Constraint and index names are schema-wide, so the old ones have to go before the new tables reuse them.
+    op.execute(
+        f"""
+        DO $$
+        DECLARE con record;
+        BEGIN
+            FOR con IN SELECT conname FROM pg_constraint WHERE conrelid = '{table}'::regclass AND conparentid = 0 ORDER BY contype = 'f' DESC LOOP
+                EXECUTE format('ALTER TABLE {table} DROP CONSTRAINT %I', con.conname);
+            END LOOP;
+        END
+        $$;
+        """
+    )
+
+
+def _detach_legacy(table: str) -> None:
+    op.rename_table(table, f"{table}_legacy")
+    _drop_constraints(f"{table}_legacy")
+    op.execute(f"ALTER TABLE {table}_legacy ALTER COLUMN id DROP DEFAULT")
+
+
+def _id_column() -> sa.Column:
+    return sa.Column("id", sa.Integer(), nullable=False)
+
+
+def _adopt_sequence(table: str) -> None:
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+
+
+def upgrade() -> None:
+    # Children first: their foreign keys depend on the comments primary key.
+    for table in reversed(TABLES):
+        _detach_legacy(table)
+
+    op.create_table(
+        "comments",
+        _id_column(),
+        sa.Column("source_id", sa.Integer(), sa.ForeignKey("sources.id"), nullable=False),
+        sa.Column("thread_id", sa.Integer(), sa.ForeignKey("threads.id"), nullable=False),
+        sa.Column("external_id", sa.String(255), nullable=False),
+        sa.Column("parent_external_id", sa.String(255), nullable=True),
+        sa.Column("author_hash", sa.String(64), nullable=True),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("created_utc", sa.DateTime(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("url", sa.Text(), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", "created_utc", name="comments_pkey"),
+        sa.UniqueConstraint("source_id", "external_id", "created_utc", name="uq_comments_source_external_id"),
+        postgresql_partition_by="RANGE (created_utc)",
+    )
+    op.create_table(
+        "comment_entities",
+        _id_column(),
+        sa.Column("comment_id", sa.Integer(), nullable=False),
+        sa.Column("comment_created_utc", sa.DateTime(), nullable=False),
+        sa.Column("player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=False),
+        sa.Column("mention_text", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", "comment_created_utc", name="comment_entities_pkey"),
+        sa.ForeignKeyConstraint(
+            ["comment_id", "comment_created_utc"],
+            ["comments.id", "comments.created_utc"],
+            name="fk_comment_entities_comment",
+            ondelete="CASCADE",
+        ),
+        sa.UniqueConstraint("comment_id", "player_id", "mention_text", "comment_created_utc", name="uq_comment_entity_uniq"),
+        postgresql_partition_by="RANGE (comment_created_utc)",
+    )
+    op.create_table(
+        "sentiment_scores",
+        _id_column(),
+        sa.Column("comment_id", sa.Integer(), nullable=False),
+        sa.Column("comment_created_utc", sa.DateTime(), nullable=False),
+        sa.Column("player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=False),
+        sa.Column("model_name", sa.String(255), nullable=False),
+        sa.Column("compound", sa.Float(), nullable=False),
+        sa.Column("pos", sa.Float(), nullable=False),
+        sa.Column("neu", sa.Float(), nullable=False),
+        sa.Column("neg", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", "comment_created_utc", name="sentiment_scores_pkey"),
+        sa.ForeignKeyConstraint(
+            ["comment_id", "comment_created_utc"],
+            ["comments.id", "comments.created_utc"],
+            name="fk_sentiment_scores_comment",
+            ondelete="CASCADE",
+        ),
+        sa.UniqueConstraint(
+            "comment_id", "player_id", "model_name", "comment_created_utc", name="uq_sentiment_comment_player_model"
+        ),
+        postgresql_partition_by="RANGE (comment_created_utc)",
+    )
+    op.create_index("ix_comments_created_utc", "comments", ["created_utc"])
+    op.create_index("ix_comment_entities_comment_id", "comment_entities", ["comment_id"])
+    op.create_index("ix_comment_entities_player_id", "comment_entities", ["player_id"])
+    op.create_index("ix_sentiment_scores_comment_id", "sentiment_scores", ["comment_id"])
+    op.create_index("ix_sentiment_scores_player_id", "sentiment_scores", ["player_id"])
+
+    op.execute(ENSURE_PARTITIONS_FN)
+    for table in TABLES:
+        op.execute(
+            f"""
+            SELECT ensure_monthly_partitions(
+                '{table}',
+                LEAST(COALESCE((SELECT min(created_utc) FROM comments_legacy), now()), now())::timestamp,
+                (now() + interval '{MONTHS_AHEAD} months')::timestamp
+            )
+            """
+        )
+    for table in TABLES:
+        _adopt_sequence(table)
+
+    op.execute(
+        """
+        INSERT INTO comments (id, source_id, thread_id, external_id, parent_external_id, author_hash, body, created_utc, score, url, fetched_at)
+        SELECT id, source_id, thread_id, external_id, parent_external_id, author_hash, body, created_utc, score, url, fetched_at
+        FROM comments_legacy
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO comment_entities (id, comment_id, comment_created_utc, player_id, mention_text, created_at)
+        SELECT e.id, e.comment_id, c.created_utc, e.player_id, e.mention_text, e.created_at
+        FROM comment_entities_legacy e JOIN comments_legacy c ON c.id = e.comment_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO sentiment_scores (id, comment_id, comment_created_utc, player_id, model_name, compound, pos, neu, neg, created_at)
+        SELECT s.id, s.comment_id, c.created_utc, s.player_id, s.model_name, s.compound, s.pos, s.neu, s.neg, s.created_at
+        FROM sentiment_scores_legacy s JOIN comments_legacy c ON c.id = s.comment_id
+        """
+    )
+    for table in reversed(TABLES):
+        op.drop_table(f"{table}_legacy")
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.rename_table(table, f"{table}_partitioned")
+        _drop_constraints(f"{table}_partitioned")
+        op.execute(f"ALTER TABLE {table}_partitioned ALTER COLUMN id DROP DEFAULT")
+        op.execute(f"DROP SEQUENCE {table}_id_seq")
+    op.drop_index("ix_sentiment_scores_player_id", table_name="sentiment_scores_partitioned")
+    op.drop_index("ix_sentiment_scores_comment_id", table_name="sentiment_scores_partitioned")
+    op.drop_index("ix_comment_entities_player_id", table_name="comment_entities_partitioned")
+    op.drop_index("ix_comment_entities_comment_id", table_name="comment_entities_partitioned")
+    op.drop_index("ix_comments_created_utc", table_name="comments_partitioned")
+
+    op.create_table("comments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("source_id", sa.Integer(), sa.ForeignKey("sources.id"), nullable=False),
+        sa.Column("thread_id", sa.Integer(), sa.ForeignKey("threads.id"), nullable=False),
+        sa.Column("external_id", sa.String(255), nullable=False),
+        sa.Column("parent_external_id", sa.String(255), nullable=True),
+        sa.Column("author_hash", sa.String(64), nullable=True),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("created_utc", sa.DateTime(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("url", sa.Text(), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("source_id", "external_id", name="uq_comments_source_external_id"),
+    )
+    op.create_table("comment_entities",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("comment_id", sa.Integer(), sa.ForeignKey("comments.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=False),
+        sa.Column("mention_text", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("comment_id", "player_id", "mention_text", name="uq_comment_entity_uniq"),
+    )
+    op.create_table("sentiment_scores",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("comment_id", sa.Integer(), sa.ForeignKey("comments.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=False),
+        sa.Column("model_name", sa.String(255), nullable=False),
+        sa.Column("compound", sa.Float(), nullable=False),
+        sa.Column("pos", sa.Float(), nullable=False),
+        sa.Column("neu", sa.Float(), nullable=False),
+        sa.Column("neg", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("comment_id", "player_id", "model_name", name="uq_sentiment_comment_player_model"),
+    )
+    op.execute(
+        """
+        INSERT INTO comments (id, source_id, thread_id, external_id, parent_external_id, author_hash, body, created_utc, score, url, fetched_at)
+        SELECT id, source_id, thread_id, external_id, parent_external_id, author_hash, body, created_utc, score, url, fetched_at
+        FROM comments_partitioned
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO comment_entities (id, comment_id, player_id, mention_text, created_at)
+        SELECT id, comment_id, player_id, mention_text, created_at FROM comment_entities_partitioned
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO sentiment_scores (id, comment_id, player_id, model_name, compound, pos, neu, neg, created_at)
+        SELECT id, comment_id, player_id, model_name, compound, pos, neu, neg, created_at FROM sentiment_scores_partitioned
+        """
+    )
+    for table in TABLES:
+        # create_table made fresh serial sequences; move them past the copied ids.
+        op.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)")
+    for table in reversed(TABLES):
+        op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS ensure_monthly_partitions(text, timestamp, timestamp)")
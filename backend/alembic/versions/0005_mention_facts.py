@@ -0,0 +1,46 @@
+"""narrow append-only mention fact table
+
+Revision ID: 0005_mention_facts
+Revises: 0004_partition_comments
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005_mention_facts"
+down_revision = "0004_partition_comments"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table("mention_facts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("player_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("players.id"), nullable=False),
+        sa.Column("comment_ts", sa.DateTime(), nullable=False),
+        sa.Column("source_id", sa.Integer(), sa.ForeignKey("sources.id"), nullable=False),
+        sa.Column("comment_id", sa.Integer(), nullable=False),
+        sa.Column("score_weight", sa.Float(), nullable=False),
+        sa.Column("compound", sa.Float(), nullable=False),
+        sa.Column("model_name", sa.String(255), nullable=False),
+        sa.UniqueConstraint("comment_id", "player_id", "model_name", name="uq_mention_fact_comment_player_model"),
+    )
+    op.execute(
+        """
+        INSERT INTO mention_facts (player_id, comment_ts, source_id, comment_id, score_weight, compound, model_name)
+        SELECT s.player_id, c.created_utc, c.source_id, c.id, GREATEST(1, LEAST(c.score, 20)), s.compound, s.model_name
+        FROM sentiment_scores s
+        JOIN comments c ON c.id = s.comment_id AND c.created_utc = s.comment_created_utc
+        ORDER BY c.created_utc
+        """
+    )
+    op.create_index("ix_mention_facts_player_ts", "mention_facts", ["player_id", "comment_ts"])
+    op.create_index("ix_mention_facts_comment_ts_brin", "mention_facts", ["comment_ts"], postgresql_using="brin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mention_facts_comment_ts_brin", table_name="mention_facts")
+    op.drop_index("ix_mention_facts_player_ts", table_name="mention_facts")
+    op.drop_table("mention_facts")
@@ -0,0 +1,47 @@
+"""composite and covering indexes for hot queries
+
+Revision ID: 0006_hot_query_indexes
+Revises: 0005_mention_facts
+Create Date: 2026-10-19
+
+Chosen from the shapes of the queries: the ETag probe on player_daily_metrics,
+the keyset mentions page on sentiment_scores and the day-scoped aggregation on
+mention_facts would all have to visit the heap (or sort) without these.
+tests/test_query_plans.py guards the resulting plans.
+"""
+
+from alembic import op
+
+revision = "0006_hot_query_indexes"
+down_revision = "0005_mention_facts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_player_daily_metrics_player_date_cover",
+        "player_daily_metrics",
+        ["player_id", "date"],
+        postgresql_include=["updated_at"],
+    )
+    op.create_index(
+        "ix_sentiment_scores_player_keyset",
+        "sentiment_scores",
+        ["player_id", "model_name", "comment_created_utc", "comment_id"],
+    )
+    # Superseded by the keyset index, which leads with player_id.
+    op.drop_index("ix_sentiment_scores_player_id", table_name="sentiment_scores")
+    op.create_index(
+        "ix_mention_facts_ts_cover",
+        "mention_facts",
+        ["comment_ts"],
+        postgresql_include=["player_id", "model_name", "compound", "score_weight", "comment_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mention_facts_ts_cover", table_name="mention_facts")
+    op.create_index("ix_sentiment_scores_player_id", "sentiment_scores", ["player_id"])
+    op.drop_index("ix_sentiment_scores_player_keyset", table_name="sentiment_scores")
+    op.drop_index("ix_player_daily_metrics_player_date_cover", table_name="player_daily_metrics")
@@ -0,0 +1,66 @@
+"""content-addressed comment bodies
+
+Revision ID: 0007_comment_bodies
+Revises: 0006_hot_query_indexes
+Create Date: 2026-10-19
+"""
+
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_comment_bodies"
+down_revision = "0006_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+BODY_HASH_SQL = "encode(sha256(convert_to(body, 'UTF8')), 'hex')"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "comment_bodies",
+        sa.Column("hash", sa.String(64), primary_key=True),
+        sa.Column("codec", sa.String(16), nullable=False),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.Column("length", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    # Existing bodies are copied uncompressed (TOAST still compresses the large ones);
+    # the application zlib-compresses new bodies as they are written.
+    op.execute(
+        f"""
+        INSERT INTO comment_bodies (hash, codec, content, length, created_at)
+        SELECT {BODY_HASH_SQL}, 'raw', convert_to(body, 'UTF8'), octet_length(body), now() AT TIME ZONE 'utc'
+        FROM comments
+        ON CONFLICT (hash) DO NOTHING
+        """
+    )
+    op.add_column("comments", sa.Column("body_hash", sa.String(64), nullable=True))
+    op.execute(f"UPDATE comments SET body_hash = {BODY_HASH_SQL}")
+    op.alter_column("comments", "body_hash", nullable=False)
+    op.create_foreign_key("comments_body_hash_fkey", "comments", "comment_bodies", ["body_hash"], ["hash"])
+    op.drop_column("comments", "body")
+
+
+def downgrade() -> None:
+    op.add_column("comments", sa.Column("body", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    # zlib bodies cannot be inflated in SQL, so decode them here before restoring the inline column.
+    compressed = bind.execute(sa.text("SELECT hash, content FROM comment_bodies WHERE codec = 'zlib'")).all()
+    for digest, content in compressed:
+        bind.execute(
+            sa.text("UPDATE comment_bodies SET codec = 'raw', content = :content WHERE hash = :hash"),
+            {"content": zlib.decompress(content), "hash": digest},
+        )
+    op.execute(
+        """
+        UPDATE comments c SET body = convert_from(b.content, 'UTF8')
+        FROM comment_bodies b WHERE b.hash = c.body_hash
+        """
+    )
+    op.alter_column("comments", "body", nullable=False)
+    op.drop_constraint("comments_body_hash_fkey", "comments", type_="foreignkey")
+    op.drop_column("comments", "body_hash")
+    op.drop_table("comment_bodies")
@@ -0,0 +1,36 @@
+"""unique (player_id, normalized_alias) on player_aliases
+
+Revision ID: 0008_player_alias_unique
+Revises: 0007_comment_bodies
+Create Date: 2026-10-19
+
+The bulk Wikidata seeder writes aliases with INSERT ... ON CONFLICT DO NOTHING,
+which needs a constraint to conflict on.
+"""
+
+from alembic import op
+
+revision = "0008_player_alias_unique"
+down_revision = "0007_comment_bodies"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the oldest row of any duplicate pair left behind by earlier concurrent seeds.
+    op.execute(
+        """
+        DELETE FROM player_aliases a
+        USING player_aliases b
+        WHERE a.player_id = b.player_id
+          AND a.normalized_alias = b.normalized_alias
+          AND a.id > b.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_player_alias_player_normalized", "player_aliases", ["player_id", "normalized_alias"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_player_alias_player_normalized", "player_aliases", type_="unique")
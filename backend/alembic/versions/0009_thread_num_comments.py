@@ -0,0 +1,24 @@
+"""threads.num_comments for delta-aware Reddit refreshes
+
+Revision ID: 0009_thread_num_comments
+Revises: 0008_player_alias_unique
+Create Date: 2026-10-19
+
+Existing threads start at NULL, so each is expanded once more before it can be skipped.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_thread_num_comments"
+down_revision = "0008_player_alias_unique"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("threads", sa.Column("num_comments", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("threads", "num_comments")
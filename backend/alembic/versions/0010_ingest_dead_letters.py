@@ -0,0 +1,36 @@
+"""ingest_dead_letters for items an ingest run gave up on
+
+Revision ID: 0010_ingest_dead_letters
+Revises: 0009_thread_num_comments
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_ingest_dead_letters"
+down_revision = "0009_thread_num_comments"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_dead_letters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("source_type", sa.String(50), nullable=False),
+        sa.Column("source_name", sa.String(255), nullable=False),
+        sa.Column("item_type", sa.String(50), nullable=False),
+        sa.Column("external_id", sa.String(255), nullable=False),
+        sa.Column("url", sa.Text(), nullable=True),
+        sa.Column("task_id", sa.String(255), nullable=True),
+        sa.Column("error", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("first_failed_at", sa.DateTime(), nullable=False),
+        sa.Column("last_failed_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("source_type", "source_name", "item_type", "external_id", name="uq_ingest_dead_letter_item"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingest_dead_letters")
@@ -0,0 +1,119 @@
+"""DEFAULT partitions for comments, comment_entities and sentiment_scores
+
+Revision ID: 0011_default_partitions
+Revises: 0010_ingest_dead_letters
+Create Date: 2026-10-19
+
+Without a DEFAULT partition an insert outside the months created so far (an old
+archive, a clock-skewed comment, a maintenance run that did not happen) fails
+the whole batch. Such rows now land in <table>_default. A month cannot be
+attached while the default partition holds rows for it, so
+ensure_monthly_partitions skips that month with a warning instead of failing;
+the maintenance task reports the rows left in the default partitions.
+"""
+
+from alembic import op
+
+revision = "0011_default_partitions"
+down_revision = "0010_ingest_dead_letters"
+branch_labels = None
+depends_on = None
+
+TABLES = ("comments", "comment_entities", "sentiment_scores")
+
+ENSURE_PARTITIONS_FN = """
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent text, from_ts timestamp, to_ts timestamp)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', from_ts)::date;
+    default_name text := parent || '_default';
+    key_column text;
+    part_name text;
+    in_default boolean;
+    created integer := 0;
+BEGIN
+    SELECT a.attname INTO key_column
+    FROM pg_partitioned_table p
+    JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+    WHERE p.partrelid = parent::regclass;
+
+    WHILE month_start <= to_ts LOOP
+        part_name := format('%s_p%s', parent, to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(part_name) IS NULL THEN
+            in_default := false;
+            IF to_regclass(default_name) IS NOT NULL THEN
+                EXECUTE format(
+                    'SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                    default_name, key_column, month_start, key_column, (month_start + interval '1 month')::date
+                ) INTO in_default;
+            END IF;
+            IF in_default THEN
+                RAISE WARNING '% holds rows for %; not creating %', default_name, to_char(month_start, 'YYYY-MM'), part_name;
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    part_name, parent, month_start, (month_start + interval '1 month')::date
+                );
+                created := created + 1;
+            END IF;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$;
+"""
+
+PREVIOUS_ENSURE_PARTITIONS_FN = """
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent text, from_ts timestamp, to_ts timestamp)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', from_ts)::date;
+    part_name text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= to_ts LOOP
+        part_name := format('%s_p%s', parent, to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                part_name, parent, month_start, (month_start + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+    op.execute(ENSURE_PARTITIONS_FN)
+
+
+def downgrade() -> None:
+    # Rows in a default partition have no monthly partition to go to; refuse rather than drop them.
+    for table in reversed(TABLES):
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM {table}_default) THEN
+                    RAISE EXCEPTION '{table}_default is not empty; create the monthly partitions and move its rows first';
+                END IF;
+            END
+            $$;
+            """
+        )
+        # comments_default is referenced by the child tables' foreign keys, so it has to be detached before the drop.
+        op.execute(f"ALTER TABLE {table} DETACH PARTITION {table}_default")
+        op.execute(f"DROP TABLE {table}_default")
+    op.execute(PREVIOUS_ENSURE_PARTITIONS_FN)
@@ -0,0 +1,57 @@
+"""Lowercase Reddit source names
+
+Revision ID: 0012_lowercase_reddit_sources
+Revises: 0011_default_partitions
+Create Date: 2026-10-19
+
+The poller, the stream and the archive loader now all key Reddit sources by the
+lowercased subreddit name. Existing sources are renamed to match, so their
+threads and comments keep being found. Where both spellings already exist the
+rows are left alone with a warning: merging them means merging their threads and
+comments, which is a manual job.
+"""
+
+from alembic import op
+
+revision = "0012_lowercase_reddit_sources"
+down_revision = "0011_default_partitions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            duplicate record;
+        BEGIN
+            FOR duplicate IN
+                SELECT s.id, s.name FROM sources s
+                WHERE s.source_type = 'reddit' AND s.name <> lower(s.name)
+                  AND EXISTS (
+                      SELECT 1 FROM sources o
+                      WHERE o.source_type = 'reddit' AND o.id <> s.id AND lower(o.name) = lower(s.name)
+                  )
+            LOOP
+                RAISE WARNING 'reddit source % (%) has a case-insensitive duplicate; merge it by hand', duplicate.id, duplicate.name;
+            END LOOP;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        UPDATE sources s SET name = lower(s.name)
+        WHERE s.source_type = 'reddit' AND s.name <> lower(s.name)
+          AND NOT EXISTS (
+              SELECT 1 FROM sources o
+              WHERE o.source_type = 'reddit' AND o.id <> s.id AND lower(o.name) = lower(s.name)
+          )
+        """
+    )
+
+
+def downgrade() -> None:
+    # The original spelling is not recorded, so there is nothing to restore.
+    pass
@@ -1,15 +1,23 @@
+import json
 from datetime import date
-from fastapi import APIRouter, Depends, Query, Request, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.caching import etag_matches, make_etag, not_modified, set_etag
+from app.celery_app import BACKFILL_OPTIONS
 from app.core.config import get_settings
-from app.db.session import get_db
-from app.models.entities import Player, PlayerDailyMetric
-from app.schemas.player import NarrativeOut, PlayerMetricOut, PlayerOut
-from app.services.text import normalize_text
+from app.core.metrics import render_metrics
+from app.db.session import get_read_db, read_session
+from app.models.entities import IngestDeadLetter, Player, PlayerDailyMetric
+from app.schemas.player import MentionPageOut, NarrativeOut, PlayerMetricOut, PlayerOut
+from app.services.live import PLAYER_CHANNEL, TEAM_CHANNEL, RollingSentiment, format_sse, get_async_redis, team_slug
+from app.services.locks import lock_stats
+from app.services.mentions import decode_cursor, fetch_mentions_page, format_csv, format_ndjson, iter_mention_chunks
+from app.services.player_search import player_search_stmt
 from app.services.wikidata.refresh import refresh_players_from_wikidata_sync
-from app.services.wikidata.snapshot import default_snapshot_path, snapshot_status
+from app.services.wikidata.snapshot import resolve_snapshot_path, snapshot_status
 from app.tasks.jobs import aggregate_daily_task, forum_ingest_task, reddit_ingest_task, refresh_players_from_wikidata
 
 router = APIRouter()
@@ -20,6 +28,12 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/metrics")
+def prometheus_metrics() -> Response:
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+
 def _require_admin(request: Request) -> None:
     settings = get_settings()
     if not settings.admin_token:
@@ -30,51 +44,157 @@ def _require_admin(request: Request) -> None:
 
 
 @router.get("/players", response_model=list[PlayerOut])
-def list_players(query: str | None = None, db: Session = Depends(get_db)):
-    stmt = select(Player)
-    if query:
-        norm = normalize_text(query)
-        stmt = stmt.where((Player.normalized_name.contains(norm)) | (Player.team.ilike(f"%{query}%")))
-    return db.execute(stmt.order_by(Player.full_name).limit(100)).scalars().all()
+async def list_players(request: Request, response: Response, query: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    stmt = player_search_stmt(query, db.get_bind().dialect.name)
+    players = (await db.execute(stmt)).scalars().all()
+    etag = make_etag("players", query, *((p.id, p.full_name, p.team, p.active) for p in players))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return players
 
 
 @router.get("/players/{player_id}", response_model=PlayerOut)
-def get_player(player_id: str, db: Session = Depends(get_db)):
-    return db.get(Player, player_id)
+async def get_player(player_id: str, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    player = await db.get(Player, player_id)
+    if player is not None:
+        etag = make_etag("player", player.id, player.full_name, player.team, player.active)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+    return player
 
 
 @router.get("/players/{player_id}/metrics", response_model=list[PlayerMetricOut])
-def metrics(player_id: str, from_date: date = Query(alias="from"), to_date: date = Query(alias="to"), db: Session = Depends(get_db)):
-    stmt = (
-        select(PlayerDailyMetric)
-        .where(
-            PlayerDailyMetric.player_id == player_id,
-            PlayerDailyMetric.date >= from_date,
-            PlayerDailyMetric.date <= to_date,
-        )
-        .order_by(PlayerDailyMetric.date)
+async def metrics(
+    player_id: str,
+    request: Request,
+    response: Response,
+    from_date: date = Query(alias="from"),
+    to_date: date = Query(alias="to"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    in_range = (
+        PlayerDailyMetric.player_id == player_id,
+        PlayerDailyMetric.date >= from_date,
+        PlayerDailyMetric.date <= to_date,
     )
-    return db.execute(stmt).scalars().all()
+    last_updated, row_count = (
+        await db.execute(select(func.max(PlayerDailyMetric.updated_at), func.count()).where(*in_range))
+    ).one()
+    etag = make_etag("metrics", player_id, from_date, to_date, last_updated, row_count)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    stmt = select(PlayerDailyMetric).where(*in_range).order_by(PlayerDailyMetric.date)
+    set_etag(response, etag)
+    return (await db.execute(stmt)).scalars().all()
 
 
 @router.get("/players/{player_id}/narratives", response_model=NarrativeOut)
-def narratives(player_id: str, date_value: date = Query(alias="date"), db: Session = Depends(get_db)):
-    metric = db.execute(
-        select(PlayerDailyMetric).where(PlayerDailyMetric.player_id == player_id, PlayerDailyMetric.date == date_value)
+async def narratives(
+    player_id: str,
+    request: Request,
+    response: Response,
+    date_value: date = Query(alias="date"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    metric = (
+        await db.execute(
+            select(PlayerDailyMetric).where(PlayerDailyMetric.player_id == player_id, PlayerDailyMetric.date == date_value)
+        )
     ).scalar_one()
+    etag = make_etag("narratives", player_id, date_value, metric.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     summary = f"Top discussion terms include: {', '.join(list(metric.top_terms_json.keys())[:5]) or 'n/a'}"
     return NarrativeOut(date=date_value, top_terms_json=metric.top_terms_json, summary=summary)
 
 
+@router.get("/players/{player_id}/mentions", response_model=MentionPageOut)
+async def player_mentions(
+    player_id: str,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    items, next_cursor = await fetch_mentions_page(db, player_id, after, limit)
+    return MentionPageOut(items=items, next_cursor=next_cursor)
+
+
+@router.get("/players/{player_id}/mentions/export")
+async def export_player_mentions(
+    player_id: str,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    chunk_size: int = Query(default=5000, ge=100, le=50000),
+):
+    async def stream():
+        # The request-scoped session may be closed before streaming finishes, so own one here.
+        async with read_session() as db:
+            first = True
+            async for items in iter_mention_chunks(db, player_id, chunk_size):
+                yield format_csv(items, header=first) if format == "csv" else format_ndjson(items)
+                first = False
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"mentions-{player_id}.{format}"
+    return StreamingResponse(stream(), media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+def _live_stream(request: Request, channel: str) -> StreamingResponse:
+    settings = get_settings()
+
+    async def stream():
+        rolling = RollingSentiment(window_seconds=settings.live_window_seconds)
+        pubsub = get_async_redis().pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=settings.live_keepalive_seconds)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse("sentiment", rolling.add(json.loads(message["data"])))
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+
+@router.get("/players/{player_id}/live")
+async def player_live(player_id: str, request: Request):
+    return _live_stream(request, PLAYER_CHANNEL.format(player_id))
+
+
+@router.get("/teams/{team}/live")
+async def team_live(team: str, request: Request):
+    slug = team_slug(team)
+    if not slug:
+        raise HTTPException(status_code=400, detail="invalid team")
+    return _live_stream(request, TEAM_CHANNEL.format(slug))
+
+
 @router.post("/admin/ingest/reddit")
-def trigger_ingest(subreddits: list[str] | None = None, limit_posts: int = 20, limit_comments_per_post: int = 100):
-    task = reddit_ingest_task.delay(subreddits, limit_posts, limit_comments_per_post)
+def trigger_ingest(
+    subreddits: list[str] | None = None, limit_posts: int = 20, limit_comments_per_post: int = 100, replay: bool = False
+):
+    task = reddit_ingest_task.apply_async(
+        args=(subreddits, limit_posts, limit_comments_per_post, replay), **(BACKFILL_OPTIONS if replay else {})
+    )
     return {"task_id": task.id}
 
 
 @router.post("/admin/ingest/forums")
-def trigger_forum_ingest():
-    task = forum_ingest_task.delay()
+def trigger_forum_ingest(replay: bool = False, replay_since: str | None = None):
+    task = forum_ingest_task.apply_async(args=(replay, replay_since), **(BACKFILL_OPTIONS if replay else {}))
     return {"task_id": task.id}
 
 
@@ -98,6 +218,39 @@ def refresh_wikidata(request: Request):
 @router.get("/admin/players/source-status")
 def wikidata_source_status(request: Request):
     _require_admin(request)
-    status = snapshot_status()
-    status["snapshot_path"] = str(default_snapshot_path())
+    snapshot_path = resolve_snapshot_path()
+    status = snapshot_status(snapshot_path)
+    status["snapshot_path"] = str(snapshot_path)
     return status
+
+
+@router.get("/admin/locks")
+def task_lock_stats(request: Request):
+    _require_admin(request)
+    return lock_stats()
+
+
+@router.get("/admin/ingest/dead-letters")
+async def ingest_dead_letters(
+    request: Request, source_type: str | None = None, limit: int = Query(100, ge=1, le=1000), db: AsyncSession = Depends(get_read_db)
+):
+    _require_admin(request)
+    stmt = select(IngestDeadLetter).order_by(IngestDeadLetter.last_failed_at.desc()).limit(limit)
+    if source_type:
+        stmt = stmt.where(IngestDeadLetter.source_type == source_type)
+    letters = (await db.execute(stmt)).scalars().all()
+    return [
+        {
+            "source_type": letter.source_type,
+            "source_name": letter.source_name,
+            "item_type": letter.item_type,
+            "external_id": letter.external_id,
+            "url": letter.url,
+            "task_id": letter.task_id,
+            "error": letter.error,
+            "attempts": letter.attempts,
+            "first_failed_at": letter.first_failed_at,
+            "last_failed_at": letter.last_failed_at,
+        }
+        for letter in letters
+    ]
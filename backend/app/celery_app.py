@@ -1,7 +1,10 @@
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Exchange, Queue
+from celery.signals import worker_init, worker_process_shutdown
 
 from app.core.config import get_settings
+from app.core.metrics import mark_process_dead, start_worker_exporter
 
 settings = get_settings()
 
@@ -12,6 +15,42 @@ celery_app = Celery(
     include=["app.tasks.jobs"],
 )
 
+# Workloads get their own queues (and workers, see docker-compose.yml) so a month-long recompute or a
+# Wikidata refresh never sits in front of the 10-minute ingest.
+INGEST_QUEUE = "ingest"
+AGGREGATION_QUEUE = "aggregation"
+MAINTENANCE_QUEUE = "maintenance"
+
+# Hard limits kill the worker child; the soft limit fires first so tasks can unwind (locks, sessions).
+# Ingest must finish inside its 10-minute schedule.
+TIME_LIMITS = {
+    INGEST_QUEUE: {"soft_time_limit": 540, "time_limit": 600},
+    AGGREGATION_QUEUE: {"soft_time_limit": 1800, "time_limit": 1900},
+    MAINTENANCE_QUEUE: {"soft_time_limit": 4 * 3600, "time_limit": 4 * 3600 + 300},
+}
+
+TASK_QUEUES = {
+    "app.tasks.jobs.reddit_ingest_task": INGEST_QUEUE,
+    "app.tasks.jobs.forum_ingest_task": INGEST_QUEUE,
+    "app.tasks.jobs.aggregate_daily_task": AGGREGATION_QUEUE,
+    "app.tasks.jobs.refresh_players_from_wikidata": MAINTENANCE_QUEUE,
+    "app.tasks.jobs.maintain_partitions_task": MAINTENANCE_QUEUE,
+}
+
+# Redis priorities: 0 is served first. Scheduled runs go ahead of ad-hoc ones in the same queue.
+SCHEDULED_PRIORITY = 2
+DEFAULT_PRIORITY = 5
+BACKFILL_PRIORITY = 8
+
+# Replays and other backfills re-run ingest over a long window; they run on the maintenance workers
+# with maintenance limits instead of competing with live ingest.
+BACKFILL_OPTIONS = {"queue": MAINTENANCE_QUEUE, "priority": BACKFILL_PRIORITY, **TIME_LIMITS[MAINTENANCE_QUEUE]}
+
+# With acks_late, the Redis broker re-delivers any message left unacked for visibility_timeout seconds
+# (kombu's default is an hour). It must outlast the longest hard limit, or a long backfill still running
+# is handed to a second worker and runs twice.
+VISIBILITY_TIMEOUT = max(limits["time_limit"] for limits in TIME_LIMITS.values()) + 600
+
 celery_app.conf.update(
     task_serializer="json",
     result_serializer="json",
@@ -19,30 +58,69 @@ celery_app.conf.update(
     timezone="UTC",
     task_always_eager=settings.celery_task_always_eager,
     task_eager_propagates=settings.celery_task_eager_propagates,
+    task_queues=[Queue(name, Exchange(name), routing_key=name) for name in (INGEST_QUEUE, AGGREGATION_QUEUE, MAINTENANCE_QUEUE)],
+    task_default_queue=MAINTENANCE_QUEUE,
+    task_routes={name: {"queue": queue} for name, queue in TASK_QUEUES.items()},
+    task_annotations={name: TIME_LIMITS[queue] for name, queue in TASK_QUEUES.items()},
+    task_default_priority=DEFAULT_PRIORITY,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+        "visibility_timeout": VISIBILITY_TIMEOUT,
+    },
+    # Long tasks: take one message at a time and ack after running, so a busy child does not hoard work
+    # and a killed one is redelivered.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
 )
 
 celery_app.conf.beat_schedule = {
-    "reddit-ingest-every-10-min": {
-        "task": "app.tasks.jobs.reddit_ingest_task",
-        "schedule": crontab(minute="*/10"),
-    },
     "forum-ingest-every-30-min": {
         "task": "app.tasks.jobs.forum_ingest_task",
         "schedule": crontab(minute="*/30"),
+        "options": {"priority": SCHEDULED_PRIORITY, "expires": 1800},
     },
     "aggregate-yesterday": {
         "task": "app.tasks.jobs.aggregate_daily_task",
         "schedule": crontab(hour=1, minute=5),
+        "options": {"priority": SCHEDULED_PRIORITY},
     },
     "aggregate-today": {
         "task": "app.tasks.jobs.aggregate_daily_task",
         "schedule": crontab(hour=1, minute=15),
         "args": ("today",),
+        "options": {"priority": SCHEDULED_PRIORITY},
+    },
+    "maintain-partitions-daily": {
+        "task": "app.tasks.jobs.maintain_partitions_task",
+        "schedule": crontab(hour=0, minute=30),
+        "options": {"priority": SCHEDULED_PRIORITY},
     },
 }
 
+# The stream consumer (app.scripts.reddit_stream) replaces polling when it runs.
+if not settings.reddit_stream_enabled:
+    celery_app.conf.beat_schedule["reddit-ingest-every-10-min"] = {
+        "task": "app.tasks.jobs.reddit_ingest_task",
+        "schedule": crontab(minute="*/10"),
+        "options": {"priority": SCHEDULED_PRIORITY, "expires": 600},
+    }
+
 if settings.enable_wikidata_refresh:
     celery_app.conf.beat_schedule["wikidata-refresh-monthly"] = {
         "task": "app.tasks.jobs.refresh_players_from_wikidata",
         "schedule": crontab(day_of_month="1", hour=2, minute=0),
+        "options": {"priority": SCHEDULED_PRIORITY},
     }
+
+
+@worker_init.connect
+def _start_metrics_exporter(**_):
+    # The parent worker process serves the samples its prefork children write to PROMETHEUS_MULTIPROC_DIR.
+    if settings.metrics_worker_port:
+        start_worker_exporter(settings.metrics_worker_port)
+
+
+@worker_process_shutdown.connect
+def _reap_metrics(pid=None, **_):
+    mark_process_dead(pid)
@@ -0,0 +1,85 @@
+import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (uvicorn workers, Celery prefork children) every process writes
+# its samples to mmap files in that directory and the exporters aggregate them; it must be emptied
+# before the processes start. Without it metrics live in the default in-process registry.
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+STAGE_SECONDS = Histogram(
+    "ingest_stage_seconds",
+    "Wall time per pipeline stage (http, parse, dedup, match, sentiment, db_commit, ...).",
+    ["pipeline", "stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+ITEMS = Counter("ingest_items_total", "Items seen per pipeline and kind (thread, comment, duplicate, mention, ...).", ["pipeline", "kind"])
+BYTES_FETCHED = Counter("ingest_bytes_fetched_total", "Response body bytes fetched over HTTP.", ["pipeline"])
+MATCHES_PER_COMMENT = Histogram(
+    "ingest_matches_per_comment",
+    "Player mentions found per stored comment.",
+    ["pipeline"],
+    buckets=(0, 1, 2, 3, 5, 8, 13),
+)
+
+
+@lru_cache(maxsize=256)
+def _stage_child(pipeline: str, name: str):
+    # labels() takes a lock and a dict lookup; caching the child keeps per-comment timing to a perf_counter pair.
+    return STAGE_SECONDS.labels(pipeline, name)
+
+
+@contextmanager
+def stage(pipeline: str, name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_child(pipeline, name).observe(time.perf_counter() - started)
+
+
+def count(pipeline: str, kind: str, amount: float = 1) -> None:
+    ITEMS.labels(pipeline, kind).inc(amount)
+
+
+def record_fetch(pipeline: str, size: int) -> None:
+    BYTES_FETCHED.labels(pipeline).inc(size)
+
+
+def record_matches(pipeline: str, matches: int) -> None:
+    MATCHES_PER_COMMENT.labels(pipeline).observe(matches)
+
+
+def metrics_registry() -> CollectorRegistry:
+    if os.environ.get(MULTIPROC_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+def start_worker_exporter(port: int) -> None:
+    """Serve /metrics for a Celery worker on its own port (the API exposes its own at /metrics)."""
+    start_http_server(port, registry=metrics_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    if os.environ.get(MULTIPROC_ENV):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,79 @@
+import asyncio
+import itertools
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Zero when the replica has replayed everything it received; otherwise seconds since the last replayed commit.
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def parse_replica_urls(value: str) -> list[str]:
+    return [u.strip() for u in value.split(",") if u.strip()]
+
+
+class ReplicaRouter:
+    """Hands out a replica engine for read-only work, round-robin over healthy replicas.
+
+    Health is probed at most once per check_interval per replica (a connect plus a lag query
+    on Postgres); when every replica is down or lagging, reads fall back to the primary.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine],
+        check_interval: float = 10.0,
+        max_lag_seconds: float = 30.0,
+        check_timeout: float = 2.0,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag_seconds = max_lag_seconds
+        self.check_timeout = check_timeout
+        self._cycle = itertools.cycle(replicas)
+        self._healthy: dict[int, bool] = {id(engine): True for engine in replicas}
+        self._checked_at: dict[int, float] = {}
+
+    async def _probe(self, engine: AsyncEngine) -> bool:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with engine.connect() as conn:
+                    if engine.dialect.name != "postgresql":
+                        await conn.execute(text("SELECT 1"))
+                        return True
+                    lag = (await conn.execute(text(REPLICA_LAG_SQL))).scalar_one()
+        except (SQLAlchemyError, OSError, TimeoutError):
+            return False
+        return self.max_lag_seconds <= 0 or float(lag) <= self.max_lag_seconds
+
+    async def is_healthy(self, engine: AsyncEngine) -> bool:
+        key = id(engine)
+        now = time.monotonic()
+        if now - self._checked_at.get(key, float("-inf")) < self.check_interval:
+            return self._healthy[key]
+        # Stamp before probing so concurrent requests reuse the previous verdict instead of piling on.
+        self._checked_at[key] = now
+        healthy = await self._probe(engine)
+        if healthy != self._healthy[key]:
+            logger.warning("Read replica %s is now %s", engine.url.render_as_string(), "healthy" if healthy else "unavailable")
+        self._healthy[key] = healthy
+        return healthy
+
+    async def read_engine(self) -> AsyncEngine:
+        for _ in range(len(self.replicas)):
+            engine = next(self._cycle)
+            if await self.is_healthy(engine):
+                return engine
+        return self.primary
@@ -1,13 +1,44 @@
+from contextlib import asynccontextmanager
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import get_settings
+from app.db.replicas import ReplicaRouter, parse_replica_urls
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, future=True, pool_pre_ping=True)
+primary_pool = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout_seconds,
+    "pool_recycle": settings.db_pool_recycle_seconds,
+}
+replica_pool = {
+    "pool_size": settings.db_replica_pool_size,
+    "max_overflow": settings.db_replica_max_overflow,
+    "pool_timeout": settings.db_pool_timeout_seconds,
+    "pool_recycle": settings.db_pool_recycle_seconds,
+}
+
+engine = create_engine(settings.database_url, future=True, pool_pre_ping=True, **primary_pool)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+async_engine = create_async_engine(settings.database_url, pool_pre_ping=True, **primary_pool)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Read-only API traffic goes to replicas when configured; ingest and aggregation stay on SessionLocal (primary).
+replica_engines = [
+    create_async_engine(url, pool_pre_ping=True, **replica_pool) for url in parse_replica_urls(settings.database_replica_urls)
+]
+replica_router = ReplicaRouter(
+    async_engine,
+    replica_engines,
+    check_interval=settings.db_replica_check_interval_seconds,
+    max_lag_seconds=settings.db_replica_max_lag_seconds,
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -15,3 +46,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def read_session():
+    async with AsyncSessionLocal(bind=await replica_router.read_engine()) as db:
+        yield db
+
+
+async def get_read_db():
+    async with read_session() as db:
+        yield db
@@ -4,18 +4,27 @@ from sqlalchemy import (
     Boolean,
     Date,
     DateTime,
+    FetchedValue,
     Float,
     ForeignKey,
+    ForeignKeyConstraint,
+    Index,
     Integer,
     JSON,
+    LargeBinary,
+    PrimaryKeyConstraint,
     String,
     Text,
     UniqueConstraint,
+    event,
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.services.bodies import decode_body, store_body
+from app.services.partitions import PARTITIONED_TABLES
 
 
 class Player(Base):
@@ -38,6 +47,8 @@ class PlayerAlias(Base):
     alias_text: Mapped[str] = mapped_column(String(255), nullable=False)
     normalized_alias: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
 
+    __table_args__ = (UniqueConstraint("player_id", "normalized_alias", name="uq_player_alias_player_normalized"),)
+
 
 class Source(Base):
     __tablename__ = "sources"
@@ -60,46 +71,104 @@ class Thread(Base):
     url: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Reddit's comment count as of the last ingest; unchanged submissions are not re-expanded.
+    num_comments: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     __table_args__ = (UniqueConstraint("source_id", "external_id", name="uq_threads_source_external_id"),)
 
 
+class CommentBody(Base):
+    __tablename__ = "comment_bodies"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    codec: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    length: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    @property
+    def text(self) -> str:
+        return decode_body(self.codec, self.content)
+
+
+# comments, comment_entities and sentiment_scores are partitioned by comment time (migration 0004), so their primary
+# and unique keys carry it. `id` is still unique (it comes from the table's sequence) and is the ORM identity.
 class Comment(Base):
     __tablename__ = "comments"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, server_default=FetchedValue())
     source_id: Mapped[int] = mapped_column(ForeignKey("sources.id"), nullable=False)
     thread_id: Mapped[int] = mapped_column(ForeignKey("threads.id"), nullable=False)
     external_id: Mapped[str] = mapped_column(String(255), nullable=False)
     parent_external_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     author_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
-    body: Mapped[str] = mapped_column(Text, nullable=False)
+    body_hash: Mapped[str] = mapped_column(String(64), ForeignKey("comment_bodies.hash"), nullable=False)
     created_utc: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
-    score: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     url: Mapped[str | None] = mapped_column(Text, nullable=True)
     fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
-    __table_args__ = (UniqueConstraint("source_id", "external_id", name="uq_comments_source_external_id"),)
+    # Loaded with the comments (one extra query per batch) rather than lazily, one query per comment.
+    body_row: Mapped[CommentBody] = relationship(viewonly=True, lazy="selectin")
+
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_utc", name="comments_pkey"),
+        UniqueConstraint("source_id", "external_id", "created_utc", name="uq_comments_source_external_id"),
+        {"postgresql_partition_by": "RANGE (created_utc)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+
+    # Bodies live once in comment_bodies; `body` is accepted on construction and stored by hash on insert.
+    @property
+    def body(self) -> str | None:
+        pending = self.__dict__.get("_pending_body")
+        if pending is not None:
+            return pending
+        return self.body_row.text if self.body_hash else None
+
+    @body.setter
+    def body(self, value: str) -> None:
+        self.__dict__["_pending_body"] = value
+
+
+@event.listens_for(Comment, "before_insert")
+def _store_comment_body(mapper, connection, target: Comment) -> None:
+    pending = target.__dict__.get("_pending_body")
+    if pending is not None:
+        target.body_hash = store_body(connection, pending)
 
 
 class CommentEntity(Base):
     __tablename__ = "comment_entities"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    comment_id: Mapped[int] = mapped_column(ForeignKey("comments.id", ondelete="CASCADE"), nullable=False, index=True)
+    id: Mapped[int] = mapped_column(Integer, server_default=FetchedValue())
+    comment_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    comment_created_utc: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     player_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False, index=True)
     mention_text: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
-    __table_args__ = (UniqueConstraint("comment_id", "player_id", "mention_text", name="uq_comment_entity_uniq"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "comment_created_utc", name="comment_entities_pkey"),
+        ForeignKeyConstraint(
+            ["comment_id", "comment_created_utc"],
+            ["comments.id", "comments.created_utc"],
+            name="fk_comment_entities_comment",
+            ondelete="CASCADE",
+        ),
+        UniqueConstraint("comment_id", "player_id", "mention_text", "comment_created_utc", name="uq_comment_entity_uniq"),
+        {"postgresql_partition_by": "RANGE (comment_created_utc)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
 
 
 class SentimentScore(Base):
     __tablename__ = "sentiment_scores"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    comment_id: Mapped[int] = mapped_column(ForeignKey("comments.id", ondelete="CASCADE"), nullable=False, index=True)
-    player_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False, index=True)
+    id: Mapped[int] = mapped_column(Integer, server_default=FetchedValue())
+    comment_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    comment_created_utc: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    player_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False)
     model_name: Mapped[str] = mapped_column(String(255), nullable=False)
     compound: Mapped[float] = mapped_column(Float, nullable=False)
     pos: Mapped[float] = mapped_column(Float, nullable=False)
@@ -107,7 +176,45 @@ class SentimentScore(Base):
     neg: Mapped[float] = mapped_column(Float, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
-    __table_args__ = (UniqueConstraint("comment_id", "player_id", "model_name", name="uq_sentiment_comment_player_model"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "comment_created_utc", name="sentiment_scores_pkey"),
+        ForeignKeyConstraint(
+            ["comment_id", "comment_created_utc"],
+            ["comments.id", "comments.created_utc"],
+            name="fk_sentiment_scores_comment",
+            ondelete="CASCADE",
+        ),
+        UniqueConstraint(
+            "comment_id", "player_id", "model_name", "comment_created_utc", name="uq_sentiment_comment_player_model"
+        ),
+        Index("ix_sentiment_scores_player_keyset", "player_id", "model_name", "comment_created_utc", "comment_id"),
+        {"postgresql_partition_by": "RANGE (comment_created_utc)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+
+
+class MentionFact(Base):
+    __tablename__ = "mention_facts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    player_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False)
+    comment_ts: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    source_id: Mapped[int] = mapped_column(ForeignKey("sources.id"), nullable=False)
+    comment_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    score_weight: Mapped[float] = mapped_column(Float, nullable=False)
+    compound: Mapped[float] = mapped_column(Float, nullable=False)
+    model_name: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("comment_id", "player_id", "model_name", name="uq_mention_fact_comment_player_model"),
+        Index("ix_mention_facts_player_ts", "player_id", "comment_ts"),
+        Index("ix_mention_facts_comment_ts_brin", "comment_ts", postgresql_using="brin"),
+        Index(
+            "ix_mention_facts_ts_cover",
+            "comment_ts",
+            postgresql_include=["player_id", "model_name", "compound", "score_weight", "comment_id"],
+        ),
+    )
 
 
 class PlayerDailyMetric(Base):
@@ -123,4 +230,36 @@ class PlayerDailyMetric(Base):
     top_terms_json: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
-    __table_args__ = (UniqueConstraint("player_id", "date", name="uq_player_daily_player_date"),)
+    __table_args__ = (
+        UniqueConstraint("player_id", "date", name="uq_player_daily_player_date"),
+        Index("ix_player_daily_metrics_player_date_cover", "player_id", "date", postgresql_include=["updated_at"]),
+    )
+
+
+class IngestDeadLetter(Base):
+    __tablename__ = "ingest_dead_letters"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    source_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    source_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    item_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    external_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    url: Mapped[str | None] = mapped_column(Text, nullable=True)
+    task_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    first_failed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    last_failed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("source_type", "source_name", "item_type", "external_id", name="uq_ingest_dead_letter_item"),
+    )
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_primary_key(constraint, compiler, **kw):
+    # SQLite (the test database) cannot autoincrement a composite key; there the partitioned tables key on `id`
+    # alone, which makes it the rowid.
+    if constraint.table.name in PARTITIONED_TABLES:
+        return "PRIMARY KEY (id)"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
@@ -1,6 +1,6 @@
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class PlayerOut(BaseModel):
@@ -22,3 +22,27 @@ class NarrativeOut(BaseModel):
     date: date
     top_terms_json: dict
     summary: str
+
+
+class MentionOut(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    comment_id: int
+    created_utc: datetime
+    source_type: str
+    source_name: str
+    external_id: str
+    url: str | None
+    score: int
+    model_name: str
+    compound: float
+    pos: float
+    neu: float
+    neg: float
+    mentions: list[str]
+    body: str
+
+
+class MentionPageOut(BaseModel):
+    items: list[MentionOut]
+    next_cursor: str | None
@@ -0,0 +1,103 @@
+import argparse
+import logging
+import signal
+import time
+
+import prawcore
+import requests
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.db.session import SessionLocal
+from app.models.entities import PlayerAlias
+from app.services.locks import single_flight
+from app.services.matcher import AliasEntry, PlayerMentionMatcher
+from app.services.reddit_client import get_reddit
+from app.services.reddit_stream import CommentStreamConsumer, StreamCheckpoint
+from app.services.text import reddit_source_name
+from app.tasks.jobs import _player_teams, _store_mentions
+
+logger = logging.getLogger(__name__)
+
+# Restart the stream (and reload aliases) this often; the checkpoint makes the restart overlap-free.
+RELOAD_SECONDS = 600
+MAX_BACKOFF_SECONDS = 60
+
+
+def _matcher(db) -> PlayerMentionMatcher:
+    settings = get_settings()
+    aliases = db.execute(select(PlayerAlias)).scalars().all()
+    return PlayerMentionMatcher(
+        aliases=[AliasEntry(player_id=a.player_id, alias_text=a.alias_text, normalized_alias=a.normalized_alias) for a in aliases],
+        denylist=set([w.strip() for w in settings.match_denylist.split(",") if w.strip()]),
+    )
+
+
+def run(subreddits: list[str], batch_size: int, flush_seconds: float) -> int:
+    name = "+".join(sorted(reddit_source_name(s) for s in subreddits))
+    stopping = False
+
+    def _stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    with single_flight(f"ingest:reddit-stream:{name}", ttl_seconds=60) as lock:
+        if not lock.acquired:
+            logger.error("Another stream consumer already holds r/%s", name)
+            return 1
+        checkpoint = StreamCheckpoint(name)
+        backoff = 1
+        while not stopping and not lock.lost.is_set():
+            db = SessionLocal()
+            try:
+                teams = _player_teams(db)
+                consumer = CommentStreamConsumer(
+                    db,
+                    _matcher(db),
+                    lambda session, comment, mentions: _store_mentions(session, comment, mentions, teams, "reddit_stream"),
+                    checkpoint=checkpoint,
+                    batch_size=batch_size,
+                    flush_seconds=flush_seconds,
+                )
+                reddit, _ = get_reddit()
+                # Without a checkpoint there is nothing to catch up on, so start from "now".
+                stream = reddit.subreddit(name).stream.comments(skip_existing=consumer.stats.last_fullname is None, pause_after=0)
+                deadline = time.monotonic() + RELOAD_SECONDS
+                stats = consumer.consume(
+                    stream, should_stop=lambda: stopping or lock.lost.is_set() or time.monotonic() >= deadline
+                )
+                logger.info(
+                    "r/%s: %d received, %d stored, %d duplicates, %d mentions in %d batches (checkpoint %s)",
+                    name, stats.received, stats.stored, stats.duplicates, stats.mentions, stats.batches, stats.last_fullname,
+                )
+                backoff = 1
+            except (prawcore.exceptions.PrawcoreException, requests.RequestException) as exc:
+                logger.warning("Stream for r/%s interrupted (%s); reconnecting in %ss", name, exc, backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+            finally:
+                db.close()
+    return 0
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Persistently stream new Reddit comments into the ingest tables.")
+    parser.add_argument("--subreddits", default=settings.ingest_subreddits, help="Comma-separated subreddits")
+    parser.add_argument("--batch-size", type=int, default=settings.reddit_stream_batch_size, help="Comments per commit")
+    parser.add_argument(
+        "--flush-seconds", type=float, default=settings.reddit_stream_flush_seconds, help="Max age of a partial batch"
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    subreddits = [s.strip() for s in args.subreddits.split(",") if s.strip()]
+    raise SystemExit(run(subreddits, args.batch_size, args.flush_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -28,8 +28,12 @@ def run() -> None:
             db.refresh(player)
 
         aliases = set(entry.get("aliases", [])) | {entry["full_name"]}
+        seen = set()
         for alias in aliases:
             norm_alias = normalize_text(alias)
+            if norm_alias in seen:
+                continue
+            seen.add(norm_alias)
             exists = db.execute(
                 select(PlayerAlias).where(PlayerAlias.player_id == player.id, PlayerAlias.normalized_alias == norm_alias)
             ).scalar_one_or_none()
@@ -3,6 +3,7 @@ from pathlib import Path
 
 from app.db.session import SessionLocal
 from app.services.wikidata.seed import upsert_players_from_payload, upsert_players_from_snapshot_path
+from app.services.wikidata.snapshot import resolve_snapshot_path
 
 # Repo inspection (Feb 8, 2026): players are seeded from backend/data/players_seed.json
 # via app.scripts.seed_players, Player/PlayerAlias models in app/models/entities.py,
@@ -12,7 +13,7 @@ from app.services.wikidata.seed import upsert_players_from_payload, upsert_playe
 
 def run() -> None:
     base_dir = Path(__file__).resolve().parents[2]
-    snapshot_path = base_dir / "data" / "wikidata_players_snapshot.json"
+    snapshot_path = resolve_snapshot_path()
     denylist_path = base_dir / "data" / "alias_denylist.txt"
     fallback_seed_path = base_dir / "data" / "players_seed.json"
 
@@ -1,42 +1,83 @@
 from collections import Counter, defaultdict
 from datetime import date, datetime, time, timedelta
 
-from sqlalchemy import and_, select
+from sqlalchemy import Select, and_, case, func, select
 from sqlalchemy.orm import Session
 
-from app.models.entities import Comment, PlayerDailyMetric, SentimentScore
+from app.core.metrics import count, stage
+from app.models.entities import Comment, CommentBody, MentionFact, PlayerDailyMetric
+from app.services.bodies import decode_body
+from app.services.sentiment import MODEL_NAME
 
 
 def _weight(score: int) -> float:
     return max(1, min(score, 20))
 
 
+def _in_day(start_dt: datetime, end_dt: datetime):
+    return and_(
+        MentionFact.model_name == MODEL_NAME,
+        MentionFact.comment_ts >= start_dt,
+        MentionFact.comment_ts < end_dt,
+    )
+
+
+def daily_metrics_stmt(start_dt: datetime, end_dt: datetime) -> Select:
+    return (
+        select(
+            MentionFact.player_id,
+            func.count().label("comment_count"),
+            (func.sum(MentionFact.compound * MentionFact.score_weight) / func.sum(MentionFact.score_weight)).label("avg_compound"),
+            func.avg(case((MentionFact.compound > 0.05, 1.0), else_=0.0)).label("pos_share"),
+            func.avg(case((MentionFact.compound < -0.05, 1.0), else_=0.0)).label("neg_share"),
+        )
+        .where(_in_day(start_dt, end_dt))
+        .group_by(MentionFact.player_id)
+    )
+
+
+def daily_terms_stmt(start_dt: datetime, end_dt: datetime) -> Select:
+    # Only top terms need comment bodies. The planner cannot prune partitions through the join
+    # alone, so the day range is repeated on comments.created_utc.
+    return (
+        select(MentionFact.player_id, Comment.body_hash, func.count().label("mentions"))
+        .join(Comment, and_(Comment.id == MentionFact.comment_id, Comment.created_utc == MentionFact.comment_ts))
+        .where(_in_day(start_dt, end_dt), Comment.created_utc >= start_dt, Comment.created_utc < end_dt)
+        .group_by(MentionFact.player_id, Comment.body_hash)
+    )
+
+
+def daily_bodies_stmt(start_dt: datetime, end_dt: datetime) -> Select:
+    # Each distinct body of the day is read (and tokenized) once, however many comments repeat it.
+    hashes = daily_terms_stmt(start_dt, end_dt).with_only_columns(Comment.body_hash).group_by(None).distinct()
+    return select(CommentBody.hash, CommentBody.codec, CommentBody.content).where(CommentBody.hash.in_(hashes))
+
+
 def recompute_day(db: Session, target_date: date) -> None:
     start_dt = datetime.combine(target_date, time.min)
     end_dt = start_dt + timedelta(days=1)
+    with stage("aggregation", "metrics_query"):
+        rows = db.execute(daily_metrics_stmt(start_dt, end_dt)).all()
 
-    query = (
-        select(SentimentScore, Comment)
-        .join(Comment, Comment.id == SentimentScore.comment_id)
-        .where(and_(Comment.created_utc >= start_dt, Comment.created_utc < end_dt))
-    )
-    rows = db.execute(query).all()
+    body_tokens: dict[str, Counter] = {}
+    with stage("aggregation", "tokenize"):
+        for digest, codec, content in db.execute(daily_bodies_stmt(start_dt, end_dt)):
+            body_tokens[digest] = Counter(token for token in decode_body(codec, content).lower().split() if len(token) > 4)
+    count("aggregation", "body", len(body_tokens))
 
-    bucket = defaultdict(list)
     terms = defaultdict(Counter)
-    for sentiment, comment in rows:
-        w = _weight(comment.score)
-        bucket[sentiment.player_id].append((sentiment, w))
-        for token in comment.body.lower().split():
-            if len(token) > 4:
-                terms[sentiment.player_id][token] += 1
-
-    for player_id, vals in bucket.items():
-        total_w = sum(w for _, w in vals)
-        comment_count = len(vals)
-        avg_compound = sum(s.compound * w for s, w in vals) / total_w
-        pos_share = sum((1 if s.compound > 0.05 else 0) for s, _ in vals) / comment_count
-        neg_share = sum((1 if s.compound < -0.05 else 0) for s, _ in vals) / comment_count
+    with stage("aggregation", "terms"):
+        for player_id, digest, mentions in db.execute(daily_terms_stmt(start_dt, end_dt)):
+            for token, occurrences in body_tokens.get(digest, Counter()).items():
+                terms[player_id][token] += occurrences * mentions
+
+    with stage("aggregation", "upsert"):
+        _upsert_daily_rows(db, target_date, rows, terms)
+    count("aggregation", "player_day", len(rows))
+
+
+def _upsert_daily_rows(db: Session, target_date: date, rows, terms) -> None:
+    for player_id, comment_count, avg_compound, pos_share, neg_share in rows:
         top_terms = dict(terms[player_id].most_common(10))
 
         existing = db.execute(
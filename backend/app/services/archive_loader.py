@@ -0,0 +1,319 @@
+import io
+import json
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import zstandard
+from sqlalchemy import Connection, text
+from sqlalchemy.orm import Session
+
+from app.services.bodies import encode_body
+from app.services.matcher import AliasEntry, PlayerMentionMatcher
+from app.services.partitions import ensure_partitions
+from app.services.sentiment import MODEL_NAME, score_text
+from app.services.text import author_hash, reddit_source_name
+
+logger = logging.getLogger(__name__)
+
+# Pushshift-style dumps are compressed with long-distance matching and a 2 GiB window.
+ZSTD_MAX_WINDOW_SIZE = 2**31
+REMOVED_BODIES = {"[deleted]", "[removed]"}
+
+STAGING_DDL = [
+    """
+    CREATE TEMP TABLE IF NOT EXISTS stage_threads (
+        source_name text, external_id text, title text, url text, created_at timestamp
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS stage_bodies (
+        hash text, codec text, content bytea, length integer
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS stage_comments (
+        source_name text, thread_external_id text, external_id text, parent_external_id text,
+        author_hash text, body_hash text, created_utc timestamp, score integer, url text
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS stage_mentions (
+        source_name text, comment_external_id text, created_utc timestamp, player_id uuid,
+        mention_text text, compound double precision, pos double precision, neu double precision, neg double precision
+    ) ON COMMIT DELETE ROWS
+    """,
+]
+
+MERGE_SQL = {
+    "sources": """
+        INSERT INTO sources (source_type, name, created_at)
+        SELECT DISTINCT 'reddit', source_name, now() AT TIME ZONE 'utc'
+        FROM (SELECT source_name FROM stage_threads UNION SELECT source_name FROM stage_comments) names
+        ON CONFLICT ON CONSTRAINT uq_source_type_name DO NOTHING
+    """,
+    # Comments whose submission is not in the archive get a placeholder thread (empty title)
+    # that a later submission record fills in.
+    "threads": """
+        INSERT INTO threads (source_id, external_id, title, url, created_at, fetched_at)
+        SELECT DISTINCT ON (s.id, t.external_id) s.id, t.external_id, t.title, t.url, t.created_at, now() AT TIME ZONE 'utc'
+        FROM (
+            SELECT source_name, external_id, title, url, created_at FROM stage_threads
+            UNION ALL
+            SELECT source_name, thread_external_id, '', NULL, min(created_utc) FROM stage_comments
+            GROUP BY source_name, thread_external_id
+        ) t
+        JOIN sources s ON s.source_type = 'reddit' AND s.name = t.source_name
+        ORDER BY s.id, t.external_id, t.title = ''
+        ON CONFLICT ON CONSTRAINT uq_threads_source_external_id DO UPDATE
+        SET title = EXCLUDED.title, url = EXCLUDED.url, created_at = EXCLUDED.created_at
+        WHERE threads.title = '' AND EXCLUDED.title <> ''
+    """,
+    "bodies": """
+        INSERT INTO comment_bodies (hash, codec, content, length, created_at)
+        SELECT hash, codec, content, length, now() AT TIME ZONE 'utc' FROM stage_bodies
+        ON CONFLICT (hash) DO NOTHING
+    """,
+    "comments": """
+        INSERT INTO comments (source_id, thread_id, external_id, parent_external_id, author_hash, body_hash, created_utc, score, url, fetched_at)
+        SELECT s.id, t.id, c.external_id, c.parent_external_id, c.author_hash, c.body_hash, c.created_utc, c.score, c.url, now() AT TIME ZONE 'utc'
+        FROM stage_comments c
+        JOIN sources s ON s.source_type = 'reddit' AND s.name = c.source_name
+        JOIN threads t ON t.source_id = s.id AND t.external_id = c.thread_external_id
+        ON CONFLICT DO NOTHING
+    """,
+    # Every unique key includes the comment timestamp, so re-running a dump is a no-op.
+    "mentions": """
+        WITH resolved AS (
+            SELECT c.id AS comment_id, c.created_utc, c.source_id, c.score,
+                   m.player_id, m.mention_text, m.compound, m.pos, m.neu, m.neg
+            FROM stage_mentions m
+            JOIN sources s ON s.source_type = 'reddit' AND s.name = m.source_name
+            JOIN comments c ON c.source_id = s.id AND c.external_id = m.comment_external_id AND c.created_utc = m.created_utc
+        ),
+        entities AS (
+            INSERT INTO comment_entities (comment_id, comment_created_utc, player_id, mention_text, created_at)
+            SELECT comment_id, created_utc, player_id, mention_text, now() AT TIME ZONE 'utc' FROM resolved
+            ON CONFLICT DO NOTHING
+        ),
+        scores AS (
+            INSERT INTO sentiment_scores (comment_id, comment_created_utc, player_id, model_name, compound, pos, neu, neg, created_at)
+            SELECT comment_id, created_utc, player_id, :model_name, compound, pos, neu, neg, now() AT TIME ZONE 'utc' FROM resolved
+            ON CONFLICT DO NOTHING
+        )
+        INSERT INTO mention_facts (player_id, comment_ts, source_id, comment_id, score_weight, compound, model_name)
+        SELECT player_id, created_utc, source_id, comment_id, GREATEST(1, LEAST(score, 20)), compound, :model_name FROM resolved
+        ON CONFLICT DO NOTHING
+    """,
+}
+
+
+@dataclass
+class ParsedChunk:
+    threads: list[tuple] = field(default_factory=list)
+    bodies: dict[str, tuple] = field(default_factory=dict)
+    comments: list[tuple] = field(default_factory=list)
+    mentions: list[tuple] = field(default_factory=list)
+
+
+@dataclass
+class LoadStats:
+    lines: int = 0
+    threads: int = 0
+    comments: int = 0
+    comments_inserted: int = 0
+    mentions: int = 0
+    mentions_inserted: int = 0
+    first_comment_utc: datetime | None = None
+    last_comment_utc: datetime | None = None
+
+    def observe(self, created_utc: datetime) -> None:
+        if self.first_comment_utc is None or created_utc < self.first_comment_utc:
+            self.first_comment_utc = created_utc
+        if self.last_comment_utc is None or created_utc > self.last_comment_utc:
+            self.last_comment_utc = created_utc
+
+
+def iter_archive_lines(path: Path) -> Iterator[str]:
+    with open(path, "rb") as raw:
+        if path.suffix == ".zst":
+            reader = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW_SIZE).stream_reader(raw)
+        else:
+            reader = raw
+        for line in io.TextIOWrapper(reader, encoding="utf-8", errors="replace"):
+            if line.strip():
+                yield line
+
+
+def iter_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[list[str]]:
+    chunk: list[str] = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _strip_prefix(fullname: str | None) -> str | None:
+    if not fullname:
+        return None
+    return fullname.split("_", 1)[1] if "_" in fullname else fullname
+
+
+def parse_submission(record: dict) -> tuple | None:
+    if "title" not in record or not record.get("id") or not record.get("subreddit"):
+        return None
+    return (
+        reddit_source_name(record["subreddit"]),
+        record["id"],
+        record["title"],
+        record.get("url"),
+        datetime.utcfromtimestamp(int(float(record["created_utc"]))),
+    )
+
+
+def parse_comment(record: dict) -> tuple | None:
+    body = record.get("body")
+    if body is None or body in REMOVED_BODIES or not record.get("id") or not record.get("link_id"):
+        return None
+    # Like submissions, a comment without a subreddit has no source to merge into (sources.name is NOT NULL).
+    if not record.get("subreddit"):
+        return None
+    author = record.get("author")
+    thread_external_id = _strip_prefix(record["link_id"])
+    permalink = record.get("permalink") or f"/r/{record.get('subreddit')}/comments/{thread_external_id}/_/{record['id']}/"
+    return (
+        reddit_source_name(record["subreddit"]),
+        thread_external_id,
+        record["id"],
+        record.get("parent_id"),
+        author_hash(author if author and author != "[deleted]" else None),
+        body,
+        datetime.utcfromtimestamp(int(float(record["created_utc"]))),
+        int(record.get("score") or 0),
+        f"https://reddit.com{permalink}",
+    )
+
+
+_matcher: PlayerMentionMatcher | None = None
+_subreddits: set[str] = set()
+
+
+def init_worker(aliases: list[AliasEntry], denylist: set[str], subreddits: set[str]) -> None:
+    global _matcher, _subreddits
+    _matcher = PlayerMentionMatcher(aliases=aliases, denylist=denylist)
+    _subreddits = subreddits
+
+
+def process_chunk(lines: list[str]) -> ParsedChunk:
+    """Parse, match and score one chunk of NDJSON lines in a worker process."""
+    parsed = ParsedChunk()
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        subreddit = reddit_source_name(record.get("subreddit") or "")
+        if _subreddits and subreddit not in _subreddits:
+            continue
+        if "title" in record:
+            submission = parse_submission(record)
+            if submission:
+                parsed.threads.append(submission)
+            continue
+        comment = parse_comment(record)
+        if not comment:
+            continue
+        body = comment[5]
+        encoded = encode_body(body)
+        parsed.bodies.setdefault(encoded[0], encoded)
+        # Staged comments carry the body hash in place of the body.
+        parsed.comments.append(comment[:5] + (encoded[0],) + comment[6:])
+        mentions = _matcher.find_mentions(body) if _matcher else []
+        if not mentions:
+            continue
+        sentiment = score_text(body)
+        for player_id, mention_text in mentions:
+            parsed.mentions.append(
+                (
+                    comment[0],
+                    comment[2],
+                    comment[6],
+                    player_id,
+                    mention_text,
+                    sentiment["compound"],
+                    sentiment["pos"],
+                    sentiment["neu"],
+                    sentiment["neg"],
+                )
+            )
+    return parsed
+
+
+def iter_parsed_chunks(
+    paths: list[Path],
+    aliases: list[AliasEntry],
+    denylist: set[str],
+    subreddits: set[str],
+    workers: int,
+    chunk_size: int,
+    stats: LoadStats,
+) -> Iterator[ParsedChunk]:
+    # Chunks are submitted through a bounded window: Executor.map would read the whole dump up front.
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(aliases, denylist, subreddits)) as pool:
+        pending = deque()
+        for path in paths:
+            logger.info("Reading archive %s", path)
+            for chunk in iter_chunks(iter_archive_lines(path), chunk_size):
+                stats.lines += len(chunk)
+                pending.append(pool.submit(process_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _copy_rows(conn: Connection, table: str, columns: str, rows: list[tuple]) -> None:
+    if not rows:
+        return
+    with conn.connection.driver_connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def merge_batch(conn: Connection, batch: ParsedChunk) -> tuple[int, int]:
+    """COPY a batch into the temp staging tables and merge it into the live tables in one transaction."""
+    if batch.comments:
+        created = [row[6] for row in batch.comments]
+        ensure_partitions(Session(bind=conn), min(created), max(created))
+    for ddl in STAGING_DDL:
+        conn.execute(text(ddl))
+    _copy_rows(conn, "stage_threads", "source_name, external_id, title, url, created_at", batch.threads)
+    _copy_rows(conn, "stage_bodies", "hash, codec, content, length", list(batch.bodies.values()))
+    _copy_rows(
+        conn,
+        "stage_comments",
+        "source_name, thread_external_id, external_id, parent_external_id, author_hash, body_hash, created_utc, score, url",
+        batch.comments,
+    )
+    _copy_rows(
+        conn,
+        "stage_mentions",
+        "source_name, comment_external_id, created_utc, player_id, mention_text, compound, pos, neu, neg",
+        batch.mentions,
+    )
+    conn.execute(text(MERGE_SQL["sources"]))
+    conn.execute(text(MERGE_SQL["threads"]))
+    conn.execute(text(MERGE_SQL["bodies"]))
+    comments_inserted = conn.execute(text(MERGE_SQL["comments"])).rowcount
+    mentions_inserted = conn.execute(text(MERGE_SQL["mentions"]), {"model_name": MODEL_NAME}).rowcount
+    conn.commit()
+    return comments_inserted, mentions_inserted
@@ -0,0 +1,62 @@
+import hashlib
+import zlib
+from datetime import datetime
+
+from sqlalchemy import Connection, column, insert, select, table
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import get_settings
+
+CODEC_RAW = "raw"
+CODEC_ZLIB = "zlib"
+# Below this size zlib rarely pays for its header and the decompression on read.
+COMPRESS_MIN_BYTES = 128
+
+# Lightweight table clause so the models module can call store_body from a flush event without an import cycle.
+comment_bodies = table(
+    "comment_bodies",
+    column("hash"),
+    column("codec"),
+    column("content"),
+    column("length"),
+    column("created_at"),
+)
+
+
+def body_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_body(text: str) -> tuple[str, str, bytes, int]:
+    raw = text.encode("utf-8")
+    codec, content = CODEC_RAW, raw
+    if get_settings().comment_body_compression == CODEC_ZLIB and len(raw) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(raw, 6)
+        if len(compressed) < len(raw):
+            codec, content = CODEC_ZLIB, compressed
+    return body_hash(text), codec, content, len(raw)
+
+
+def decode_body(codec: str | None, content: bytes | None) -> str:
+    if content is None:
+        return ""
+    if codec == CODEC_ZLIB:
+        content = zlib.decompress(content)
+    return bytes(content).decode("utf-8")
+
+
+def store_body(connection: Connection, text: str) -> str:
+    """Insert the body into comment_bodies unless an identical one is already stored; returns its hash."""
+    digest, codec, content, length = encode_body(text)
+    values = {"hash": digest, "codec": codec, "content": content, "length": length, "created_at": datetime.utcnow()}
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(comment_bodies).values(**values).on_conflict_do_nothing(index_elements=["hash"])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(comment_bodies).values(**values).on_conflict_do_nothing(index_elements=["hash"])
+    elif connection.execute(select(comment_bodies.c.hash).where(comment_bodies.c.hash == digest)).first() is None:
+        stmt = insert(comment_bodies).values(**values)
+    else:
+        return digest
+    connection.execute(stmt)
+    return digest
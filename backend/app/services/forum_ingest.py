@@ -1,15 +1,18 @@
 import logging
 import re
-import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Iterable
+from typing import Iterable, Iterator
 from urllib.parse import urlparse
 
 import httpx
 from bs4 import BeautifulSoup
 from dateutil import parser as date_parser
 
+from app.core.metrics import record_fetch, stage
+from app.services.rate_limit import TokenBucket, host_key
+from app.services.raw_archive import RawArchive
+
 logger = logging.getLogger(__name__)
 
 THREAD_ID_RE = re.compile(r"/threads/[^/]*\.(\d+)/")
@@ -37,16 +40,23 @@ class ForumPost:
 
 
 class ForumRateLimiter:
+    """Shared per-host budget for forum fetches, one token bucket per hostname."""
+
     def __init__(self, min_interval_seconds: float = 1.0):
         self.min_interval_seconds = min_interval_seconds
-        self._last = 0.0
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def bucket(self, url: str) -> TokenBucket:
+        key = host_key("forum", url)
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(key, self.min_interval_seconds)
+        return self._buckets[key]
 
-    def wait(self) -> None:
-        now = time.time()
-        delta = now - self._last
-        if delta < self.min_interval_seconds:
-            time.sleep(self.min_interval_seconds - delta)
-        self._last = time.time()
+    def wait(self, url: str) -> None:
+        self.bucket(url).wait()
+
+    def wait_time(self, url: str) -> float:
+        return self.bucket(url).wait_time()
 
 
 def parse_rss_items(xml_text: str) -> list[ForumThreadItem]:
@@ -229,41 +239,56 @@ def _extract_last_page(soup: BeautifulSoup) -> int:
     return 1
 
 
-def fetch_thread_posts(
+def iter_thread_pages(
     client: httpx.Client,
     limiter: ForumRateLimiter,
     thread: ForumThreadItem,
     cutoff: datetime,
     max_pages: int = 10,
-) -> list[ForumPost]:
-    limiter.wait()
-    response = client.get(thread.url)
+    skip_pages: set[int] | frozenset[int] = frozenset(),
+) -> Iterator[tuple[int, list[ForumPost]]]:
+    """Yield (page, posts newer than cutoff) from the last page backwards, without refetching skip_pages."""
+    limiter.wait(thread.url)
+    with stage("forum", "http"):
+        response = client.get(thread.url)
     response.raise_for_status()
-    first_posts, last_page = parse_thread_html(response.text, thread.url)
+    record_fetch("forum", len(response.content))
+    with stage("forum", "parse"):
+        first_posts, last_page = parse_thread_html(response.text, thread.url)
     pages_to_fetch = list(range(last_page, max(1, last_page - max_pages + 1) - 1, -1))
 
-    collected: list[ForumPost] = []
     if last_page == 1:
-        for post in first_posts:
-            if post.created_at >= cutoff:
-                collected.append(post)
-        return collected
+        if 1 not in skip_pages:
+            yield 1, [post for post in first_posts if post.created_at >= cutoff]
+        return
 
     for page in pages_to_fetch:
+        if page in skip_pages:
+            continue
         page_url = build_page_url(thread.url, page)
-        limiter.wait()
-        page_response = client.get(page_url)
+        limiter.wait(page_url)
+        with stage("forum", "http"):
+            page_response = client.get(page_url)
         page_response.raise_for_status()
-        posts, _ = parse_thread_html(page_response.text, thread.url)
+        record_fetch("forum", len(page_response.content))
+        with stage("forum", "parse"):
+            posts, _ = parse_thread_html(page_response.text, thread.url)
         if not posts:
             continue
         newest = max(p.created_at for p in posts)
         if newest < cutoff:
             break
-        for post in posts:
-            if post.created_at >= cutoff:
-                collected.append(post)
-    return collected
+        yield page, [post for post in posts if post.created_at >= cutoff]
+
+
+def fetch_thread_posts(
+    client: httpx.Client,
+    limiter: ForumRateLimiter,
+    thread: ForumThreadItem,
+    cutoff: datetime,
+    max_pages: int = 10,
+) -> list[ForumPost]:
+    return [post for _, posts in iter_thread_pages(client, limiter, thread, cutoff, max_pages) for post in posts]
 
 
 def parse_feed_urls(value: str) -> list[str]:
@@ -285,10 +310,26 @@ def iterate_recent_threads(
     feed_url: str,
     cutoff: datetime,
 ) -> Iterable[ForumThreadItem]:
-    limiter.wait()
-    response = client.get(feed_url)
+    limiter.wait(feed_url)
+    with stage("forum", "http"):
+        response = client.get(feed_url)
     response.raise_for_status()
-    items = parse_rss_items(response.text)
+    record_fetch("forum", len(response.content))
+    with stage("forum", "parse"):
+        items = parse_rss_items(response.text)
     for item in items:
         if item.created_at >= cutoff:
             yield item
+
+
+def iterate_archived_threads(archive: RawArchive, feed_url: str, cutoff: datetime) -> Iterable[ForumThreadItem]:
+    # A single RSS capture only lists the threads active at that moment; replay walks every capture.
+    seen: set[str] = set()
+    for fetch in archive.history("forum", feed_url):
+        if fetch.status != 200:
+            continue
+        for item in parse_rss_items(archive.get(fetch.sha256).decode("utf-8", errors="replace")):
+            if item.external_id in seen or item.created_at < cutoff:
+                continue
+            seen.add(item.external_id)
+            yield item
@@ -0,0 +1,152 @@
+import json
+import logging
+from datetime import datetime
+
+import httpx
+import prawcore
+import redis
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.entities import IngestDeadLetter
+from app.services.live import get_redis
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY = "ingest:progress:{}"
+ERROR_MAX_CHARS = 4000
+
+
+class RunProgress:
+    """What one ingest run has finished, kept in a Redis hash keyed by the Celery task id.
+
+    Retries of a task keep its id, so a retried run reloads the hash and skips the sources, threads and
+    pages the failed attempt already committed. Without a task id, or while Redis is unreachable, progress
+    is only kept in memory for the current attempt.
+    """
+
+    def __init__(self, run_id: str | None, client: redis.Redis | None = None, ttl_seconds: int | None = None):
+        self.run_id = run_id
+        self.key = PROGRESS_KEY.format(run_id) if run_id else None
+        self.ttl_seconds = get_settings().ingest_progress_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._client = client
+        self._fields: dict[str, str] = {}
+
+    def load(self) -> "RunProgress":
+        if self.key is None:
+            return self
+        try:
+            raw = (self._client or get_redis()).hgetall(self.key)
+            self._fields = {k.decode(): v.decode() for k, v in raw.items()}
+        except redis.RedisError as exc:
+            logger.warning("Ingest progress %s unavailable (%s); starting from scratch", self.key, exc)
+        if self._fields:
+            logger.info("Resuming ingest run %s from %s", self.run_id, self._fields.get("current"))
+        return self
+
+    def _set(self, fields: dict[str, str]) -> None:
+        self._fields.update(fields)
+        if self.key is None:
+            return
+        try:
+            pipe = (self._client or get_redis()).pipeline(transaction=False)
+            pipe.hset(self.key, mapping=fields)
+            pipe.expire(self.key, self.ttl_seconds)
+            pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("Ingest progress %s not saved (%s)", self.key, exc)
+
+    def is_done(self, *parts: str) -> bool:
+        return ":".join(("done",) + parts) in self._fields
+
+    def mark_done(self, *parts: str) -> None:
+        self._set({":".join(("done",) + parts): "1"})
+
+    def pages_done(self, source: str, thread: str) -> set[int]:
+        value = self._fields.get(f"pages:{source}:{thread}", "")
+        return {int(page) for page in value.split(",") if page}
+
+    def mark_page(self, source: str, thread: str, page: int) -> None:
+        pages = sorted(self.pages_done(source, thread) | {page})
+        self._set(
+            {
+                f"pages:{source}:{thread}": ",".join(map(str, pages)),
+                "current": json.dumps({"source": source, "thread": thread, "page": page}),
+            }
+        )
+
+    def start(self, source: str, thread: str | None = None) -> None:
+        self._set({"current": json.dumps({"source": source, "thread": thread, "page": None})})
+
+    @property
+    def current(self) -> dict | None:
+        value = self._fields.get("current")
+        return json.loads(value) if value else None
+
+    def clear(self) -> None:
+        self._fields = {}
+        if self.key is None:
+            return
+        try:
+            (self._client or get_redis()).delete(self.key)
+        except redis.RedisError as exc:
+            logger.warning("Ingest progress %s not cleared (%s); it expires by itself", self.key, exc)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Failures worth a task retry (network, 5xx, 429, database connectivity) rather than a dead letter."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(
+        exc,
+        (
+            httpx.TransportError,
+            prawcore.exceptions.ServerError,
+            prawcore.exceptions.RequestException,
+            prawcore.exceptions.TooManyRequests,
+            OperationalError,
+        ),
+    )
+
+
+def record_dead_letter(
+    db: Session,
+    source_type: str,
+    source_name: str,
+    item_type: str,
+    external_id: str,
+    error: BaseException,
+    url: str | None = None,
+    task_id: str | None = None,
+) -> IngestDeadLetter:
+    """Record (or bump the attempt count of) an item a run skipped after it failed; commits."""
+    message = f"{type(error).__name__}: {error}"[:ERROR_MAX_CHARS]
+    now = datetime.utcnow()
+    letter = db.execute(
+        select(IngestDeadLetter).where(
+            IngestDeadLetter.source_type == source_type,
+            IngestDeadLetter.source_name == source_name,
+            IngestDeadLetter.item_type == item_type,
+            IngestDeadLetter.external_id == external_id,
+        )
+    ).scalar_one_or_none()
+    if letter is None:
+        letter = IngestDeadLetter(
+            source_type=source_type,
+            source_name=source_name,
+            item_type=item_type,
+            external_id=external_id,
+            attempts=0,
+            first_failed_at=now,
+        )
+        db.add(letter)
+    letter.attempts += 1
+    letter.url = url
+    letter.task_id = task_id
+    letter.error = message
+    letter.last_failed_at = now
+    db.commit()
+    logger.warning("Dead-lettered %s %s/%s %s: %s", source_type, source_name, item_type, external_id, message)
+    return letter
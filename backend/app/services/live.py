@@ -0,0 +1,88 @@
+import json
+import logging
+from collections import defaultdict, deque
+from datetime import datetime
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import get_settings
+from app.services.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+PLAYER_CHANNEL = "sentiment:player:{}"
+TEAM_CHANNEL = "sentiment:team:{}"
+
+
+def team_slug(team: str | None) -> str | None:
+    if not team:
+        return None
+    return normalize_text(team).replace(" ", "-") or None
+
+
+def sentiment_event(comment_id: int, created_utc: datetime, player_id, team: str | None, compound: float) -> dict:
+    return {
+        "comment_id": comment_id,
+        "created_utc": created_utc.isoformat(),
+        "player_id": str(player_id),
+        "team": team_slug(team),
+        "compound": compound,
+    }
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    return redis.Redis.from_url(get_settings().redis_url)
+
+
+@lru_cache
+def get_async_redis() -> aioredis.Redis:
+    return aioredis.Redis.from_url(get_settings().redis_url)
+
+
+def publish_sentiment_events(events: list[dict]) -> None:
+    if not events:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for event in events:
+            payload = json.dumps(event)
+            pipe.publish(PLAYER_CHANNEL.format(event["player_id"]), payload)
+            if event["team"]:
+                pipe.publish(TEAM_CHANNEL.format(event["team"]), payload)
+        pipe.execute()
+    except redis.RedisError as exc:
+        # Live updates are best effort; ingest must not fail because Redis is unavailable.
+        logger.warning("Failed to publish %d sentiment events: %s", len(events), exc)
+
+
+class RollingSentiment:
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._events: dict[str, deque] = defaultdict(deque)
+
+    def add(self, event: dict) -> dict:
+        player_id = event["player_id"]
+        ts = datetime.fromisoformat(event["created_utc"])
+        window = self._events[player_id]
+        window.append((ts, event["compound"]))
+        newest = max(t for t, _ in window)
+        while window and (newest - window[0][0]).total_seconds() > self.window_seconds:
+            window.popleft()
+        values = [c for _, c in window]
+        return {
+            "player_id": player_id,
+            "team": event["team"],
+            "window_seconds": self.window_seconds,
+            "count": len(values),
+            "avg_compound": sum(values) / len(values),
+            "last_compound": event["compound"],
+            "last_comment_id": event["comment_id"],
+            "as_of": newest.isoformat(),
+        }
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+import redis
+
+from app.core.config import get_settings
+from app.services.live import get_redis
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = "lock:"
+STATS_KEY = "lock:stats"
+
+# Only the holder (matching token) may extend or delete the lease.
+EXTEND_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class DistributedLock:
+    """Redis lease lock: SET NX PX with a random token, kept alive by a heartbeat thread.
+
+    The lease expires on its own if the holder dies, so a crashed worker blocks the next run for
+    at most ttl_seconds. If Redis is unreachable the lock fails open (acquire returns True with
+    degraded set): ingest is idempotent, so a rare overlap is cheaper than a stalled schedule.
+    """
+
+    def __init__(self, client: redis.Redis, name: str, ttl_seconds: float = 120.0):
+        self.client = client
+        self.name = name
+        self.key = LOCK_PREFIX + name
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+        self.degraded = False
+        self.waited_seconds = 0.0
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._heartbeat_thread: threading.Thread | None = None
+        self._extend_script = client.register_script(EXTEND_LUA)
+        self._release_script = client.register_script(RELEASE_LUA)
+
+    def acquire(self, wait_seconds: float = 0.0, poll_seconds: float = 0.1) -> bool:
+        started = time.monotonic()
+        try:
+            while True:
+                if self.client.set(self.key, self.token, nx=True, px=self.ttl_ms):
+                    self.acquired = True
+                    break
+                if time.monotonic() - started >= wait_seconds:
+                    break
+                time.sleep(poll_seconds)
+        except redis.RedisError as exc:
+            logger.warning("Lock %s: Redis unavailable (%s); running without it", self.name, exc)
+            self.acquired = self.degraded = True
+        self.waited_seconds = time.monotonic() - started
+        self._record()
+        if self.acquired and not self.degraded:
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat, name=f"lock-heartbeat:{self.name}", daemon=True)
+            self._heartbeat_thread.start()
+        return self.acquired
+
+    def extend(self) -> bool:
+        return bool(self._extend_script(keys=[self.key], args=[self.token, self.ttl_ms]))
+
+    def release(self) -> None:
+        self._stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+        if not self.acquired or self.degraded:
+            return
+        self.acquired = False
+        try:
+            self._release_script(keys=[self.key], args=[self.token])
+        except redis.RedisError as exc:
+            # The lease expires by itself; the next run just waits out the TTL.
+            logger.warning("Lock %s: release failed (%s)", self.name, exc)
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.ttl_ms / 3000):
+            try:
+                if not self.extend():
+                    logger.warning("Lock %s: lease lost (expired or taken over)", self.name)
+                    self.lost.set()
+                    return
+            except redis.RedisError as exc:
+                logger.warning("Lock %s: heartbeat failed (%s)", self.name, exc)
+
+    def _record(self) -> None:
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hincrby(STATS_KEY, f"{self.name}:{'acquired' if self.acquired else 'skipped'}", 1)
+            pipe.hincrbyfloat(STATS_KEY, f"{self.name}:wait_seconds", self.waited_seconds)
+            pipe.execute()
+        except redis.RedisError:
+            pass
+
+    def __enter__(self) -> "DistributedLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+@contextmanager
+def single_flight(name: str, ttl_seconds: float | None = None, wait_seconds: float | None = None) -> Iterator[DistributedLock]:
+    """Hold the named lock for the block; check `lock.acquired` and skip the work when it is False."""
+    settings = get_settings()
+    lock = DistributedLock(
+        get_redis(), name, ttl_seconds=settings.task_lock_ttl_seconds if ttl_seconds is None else ttl_seconds
+    )
+    lock.acquire(wait_seconds=settings.task_lock_wait_seconds if wait_seconds is None else wait_seconds)
+    try:
+        yield lock
+    finally:
+        lock.release()
+
+
+def lock_stats(client: redis.Redis | None = None) -> dict[str, dict]:
+    """Acquired/skipped counts and total lock-wait seconds per lock name, from the shared stats hash."""
+    raw = (client or get_redis()).hgetall(STATS_KEY)
+    stats: dict[str, dict] = {}
+    for field, value in raw.items():
+        name, _, metric = field.decode().rpartition(":")
+        stats.setdefault(name, {"acquired": 0, "skipped": 0, "wait_seconds": 0.0})[metric] = (
+            float(value) if metric == "wait_seconds" else int(value)
+        )
+    return stats
@@ -0,0 +1,134 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import Select, and_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.entities import Comment, CommentBody, CommentEntity, SentimentScore, Source
+from app.services.bodies import decode_body
+from app.services.sentiment import MODEL_NAME
+
+EXPORT_COLUMNS = [
+    "comment_id",
+    "created_utc",
+    "source_type",
+    "source_name",
+    "external_id",
+    "url",
+    "score",
+    "model_name",
+    "compound",
+    "pos",
+    "neu",
+    "neg",
+    "mentions",
+    "body",
+]
+
+
+def encode_cursor(created_utc: datetime, comment_id: int) -> str:
+    raw = f"{created_utc.isoformat()}|{comment_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, comment_raw = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_raw), int(comment_raw)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def mentions_stmt(player_id, after: tuple[datetime, int] | None, limit: int) -> Select:
+    stmt = (
+        select(
+            Comment.id.label("comment_id"),
+            Comment.created_utc,
+            Source.source_type,
+            Source.name.label("source_name"),
+            Comment.external_id,
+            Comment.url,
+            Comment.score,
+            SentimentScore.model_name,
+            SentimentScore.compound,
+            SentimentScore.pos,
+            SentimentScore.neu,
+            SentimentScore.neg,
+            CommentBody.codec.label("body_codec"),
+            CommentBody.content.label("body_content"),
+        )
+        .join(Comment, and_(Comment.id == SentimentScore.comment_id, Comment.created_utc == SentimentScore.comment_created_utc))
+        .join(CommentBody, CommentBody.hash == Comment.body_hash)
+        .join(Source, Source.id == Comment.source_id)
+        .where(SentimentScore.player_id == player_id, SentimentScore.model_name == MODEL_NAME)
+    )
+    # Keyset on sentiment_scores' own copy of the comment timestamp so ix_sentiment_scores_player_keyset serves the order.
+    keyset = (SentimentScore.comment_created_utc, SentimentScore.comment_id)
+    if after is not None:
+        stmt = stmt.where(tuple_(*keyset) > tuple_(*after))
+    return stmt.order_by(*keyset).limit(limit)
+
+
+def mention_texts_stmt(player_id, comment_ids: list[int]) -> Select:
+    return (
+        select(CommentEntity.comment_id, CommentEntity.mention_text)
+        .where(CommentEntity.player_id == player_id, CommentEntity.comment_id.in_(comment_ids))
+        .order_by(CommentEntity.comment_id, CommentEntity.mention_text)
+    )
+
+
+def build_mention_rows(rows, mention_rows) -> list[dict]:
+    texts: dict[int, list[str]] = {}
+    for comment_id, mention_text in mention_rows:
+        texts.setdefault(comment_id, []).append(mention_text)
+    items = []
+    for row in rows:
+        item = dict(row._mapping)
+        item["body"] = decode_body(item.pop("body_codec"), item.pop("body_content"))
+        item["mentions"] = texts.get(row.comment_id, [])
+        items.append(item)
+    return items
+
+
+def next_cursor(rows, limit: int) -> str | None:
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].created_utc, rows[-1].comment_id)
+
+
+async def fetch_mentions_page(db: AsyncSession, player_id, after: tuple[datetime, int] | None, limit: int) -> tuple[list[dict], str | None]:
+    rows = (await db.execute(mentions_stmt(player_id, after, limit))).all()
+    if not rows:
+        return [], None
+    mention_rows = (await db.execute(mention_texts_stmt(player_id, [r.comment_id for r in rows]))).all()
+    return build_mention_rows(rows, mention_rows), next_cursor(rows, limit)
+
+
+async def iter_mention_chunks(db: AsyncSession, player_id, chunk_size: int) -> AsyncIterator[list[dict]]:
+    after = None
+    while True:
+        items, cursor = await fetch_mentions_page(db, player_id, after, chunk_size)
+        if items:
+            yield items
+        if cursor is None:
+            return
+        after = (items[-1]["created_utc"], items[-1]["comment_id"])
+
+
+def format_ndjson(items: list[dict]) -> str:
+    return "".join(json.dumps(item, default=str, ensure_ascii=False) + "\n" for item in items)
+
+
+def format_csv(items: list[dict], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    for item in items:
+        writer.writerow({**item, "mentions": ";".join(item["mentions"])})
+    return buffer.getvalue()
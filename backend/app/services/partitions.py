@@ -0,0 +1,110 @@
+import logging
+import re
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Parent first: partitions are created in this order and detached/dropped in reverse,
+# because comment_entities and sentiment_scores hold foreign keys into comments.
+PARTITIONED_TABLES = ("comments", "comment_entities", "sentiment_scores")
+PARTITION_NAME_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_month(partition_name: str) -> date | None:
+    match = PARTITION_NAME_RE.search(partition_name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def ensure_partitions(db: Session, start: datetime, end: datetime) -> int:
+    if not _is_postgres(db):
+        return 0
+    created = 0
+    for table in PARTITIONED_TABLES:
+        created += db.execute(
+            text("SELECT ensure_monthly_partitions(:parent, :start, :end)"),
+            {"parent": table, "start": start, "end": end},
+        ).scalar_one()
+    db.commit()
+    return created
+
+
+def default_partition_rows(db: Session) -> dict[str, int]:
+    """Rows that fell outside every monthly partition; ensure_partitions cannot create those months until they move."""
+    if not _is_postgres(db):
+        return {}
+    rows = {}
+    for table in PARTITIONED_TABLES:
+        if db.execute(text("SELECT to_regclass(:name)"), {"name": f"{table}_default"}).scalar_one() is not None:
+            rows[table] = db.execute(text(f'SELECT count(*) FROM "{table}_default"')).scalar_one()
+    return rows
+
+
+def list_partitions(db: Session, parent: str) -> list[str]:
+    rows = db.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            ORDER BY child.relname
+            """
+        ),
+        {"parent": parent},
+    ).scalars()
+    return list(rows)
+
+
+def expired_partitions(partition_names: list[str], cutoff: date) -> list[str]:
+    expired = []
+    for name in partition_names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def apply_retention(db: Session, keep_months: int, drop: bool = False, today: date | None = None) -> dict:
+    if keep_months <= 0 or not _is_postgres(db):
+        return {"detached": [], "dropped": []}
+
+    current_month = (today or datetime.utcnow().date()).replace(day=1)
+    cutoff = add_months(current_month, -keep_months)
+    detached: list[str] = []
+    dropped: list[str] = []
+
+    for parent in reversed(PARTITIONED_TABLES):
+        for name in expired_partitions(list_partitions(db, parent), cutoff):
+            db.execute(text(f'ALTER TABLE "{parent}" DETACH PARTITION "{name}"'))
+            if drop:
+                db.execute(text(f'DROP TABLE "{name}"'))
+                dropped.append(name)
+                continue
+            # A detached child keeps its foreign key into comments, which would block detaching
+            # the matching comments partition; archived partitions stand alone.
+            for constraint in db.execute(
+                text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'"),
+                {"name": name},
+            ).scalars():
+                db.execute(text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"'))
+            detached.append(name)
+    db.commit()
+
+    if detached or dropped:
+        logger.info("Partition retention cutoff=%s detached=%s dropped=%s", cutoff, detached, dropped)
+    return {"detached": detached, "dropped": dropped}
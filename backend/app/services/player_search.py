@@ -0,0 +1,50 @@
+from sqlalchemy import Select, case, func, literal, select, union_all
+
+from app.models.entities import Player, PlayerAlias
+from app.services.text import normalize_text
+
+DEFAULT_SEARCH_LIMIT = 100
+
+
+def _match(column, norm: str, dialect_name: str):
+    if dialect_name == "postgresql":
+        # `<%` is pg_trgm's word-similarity operator; it is served by the gin_trgm_ops indexes.
+        return literal(norm).op("<%")(column)
+    return column.contains(norm, autoescape=True)
+
+
+def _rank(column, norm: str, dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.word_similarity(norm, column)
+    return case(
+        (column == norm, 1.0),
+        (column.startswith(norm, autoescape=True), 0.8),
+        else_=0.5,
+    )
+
+
+def player_search_stmt(query: str | None, dialect_name: str, limit: int = DEFAULT_SEARCH_LIMIT) -> Select:
+    norm = normalize_text(query or "")
+    if not norm:
+        return select(Player).order_by(Player.full_name).limit(limit)
+
+    team = func.lower(Player.team)
+    hits = union_all(
+        select(Player.id.label("player_id"), _rank(Player.normalized_name, norm, dialect_name).label("rank")).where(
+            _match(Player.normalized_name, norm, dialect_name)
+        ),
+        select(PlayerAlias.player_id.label("player_id"), _rank(PlayerAlias.normalized_alias, norm, dialect_name).label("rank")).where(
+            _match(PlayerAlias.normalized_alias, norm, dialect_name)
+        ),
+        select(Player.id.label("player_id"), _rank(team, norm, dialect_name).label("rank")).where(
+            _match(team, norm, dialect_name)
+        ),
+    ).subquery()
+    ranked = select(hits.c.player_id, func.max(hits.c.rank).label("rank")).group_by(hits.c.player_id).subquery()
+
+    return (
+        select(Player)
+        .join(ranked, ranked.c.player_id == Player.id)
+        .order_by(ranked.c.rank.desc(), Player.full_name)
+        .limit(limit)
+    )
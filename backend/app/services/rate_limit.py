@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import redis
+
+from app.services.live import get_redis
+
+logger = logging.getLogger(__name__)
+
+BUCKET_PREFIX = "ratelimit:"
+# After a Redis error, stay on the in-process buckets this long before trying Redis again.
+REDIS_RETRY_SECONDS = 30.0
+
+# KEYS[1] bucket hash; ARGV: refill rate (tokens/s), capacity, tokens requested, mode.
+# mode "take" consumes when enough tokens are available, "peek" never consumes, "block" drains
+# the bucket to -requested tokens (everyone waits requested/rate seconds, e.g. after a 429).
+# Returns the milliseconds until the request could be served (0 = served now). Time comes from
+# the Redis server clock so workers with skewed clocks still share one budget.
+TOKEN_BUCKET_LUA = """
+redis.replicate_commands()
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local mode = ARGV[4]
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait_ms = 0
+if mode == 'block' then
+    tokens = math.min(tokens, -requested)
+elseif tokens >= requested then
+    if mode == 'take' then
+        tokens = tokens - requested
+    end
+else
+    wait_ms = math.ceil((requested - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return wait_ms
+"""
+
+
+class _LocalBucket:
+    """In-process twin of the Lua bucket, used while Redis is unreachable."""
+
+    def __init__(self, capacity: float):
+        self.tokens = capacity
+        self.ts = time.monotonic()
+        self.lock = threading.Lock()
+
+    def call(self, rate: float, capacity: float, requested: float, mode: str) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(capacity, self.tokens + max(0.0, now - self.ts) * rate)
+            self.ts = now
+            if mode == "block":
+                self.tokens = min(self.tokens, -requested)
+                return 0.0
+            if self.tokens >= requested:
+                if mode == "take":
+                    self.tokens -= requested
+                return 0.0
+            return (requested - self.tokens) / rate
+
+
+_local_buckets: dict[str, _LocalBucket] = {}
+_local_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Cluster-wide token bucket in Redis, one per key (API or host), refilled at one token per min_interval_seconds.
+
+    Every worker draws from the same bucket, so the combined request rate stays within budget no matter
+    how many processes run. try_acquire/wait_time never sleep, letting a task reschedule itself instead;
+    wait() blocks. If Redis is unreachable the bucket degrades to a per-process one.
+    """
+
+    def __init__(self, key: str, min_interval_seconds: float, burst: float = 1.0, client: redis.Redis | None = None):
+        self.key = BUCKET_PREFIX + key
+        self.min_interval_seconds = min_interval_seconds
+        self.rate = 1.0 / min_interval_seconds if min_interval_seconds > 0 else 0.0
+        self.capacity = burst
+        self._client = client
+        self._script = None
+        self._redis_down_until = 0.0
+
+    def _call(self, requested: float, mode: str) -> float:
+        if self.rate <= 0:
+            return 0.0
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                if self._script is None:
+                    self._script = (self._client or get_redis()).register_script(TOKEN_BUCKET_LUA)
+                wait_ms = self._script(keys=[self.key], args=[self.rate, self.capacity, requested, mode])
+                return int(wait_ms) / 1000
+            except redis.RedisError as exc:
+                logger.warning("Rate limiter %s: Redis unavailable (%s); using a per-process bucket", self.key, exc)
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        with _local_lock:
+            bucket = _local_buckets.setdefault(self.key, _LocalBucket(self.capacity))
+        return bucket.call(self.rate, self.capacity, requested, mode)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available and return 0; otherwise take nothing and return the seconds to wait."""
+        return self._call(tokens, "take")
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        return self._call(tokens, "peek")
+
+    def wait(self, tokens: float = 1.0) -> None:
+        while (delay := self.try_acquire(tokens)) > 0:
+            time.sleep(delay)
+
+    def block_for(self, seconds: float) -> None:
+        """Empty the bucket so that every worker holds off for `seconds` (e.g. a Retry-After)."""
+        if self.rate > 0:
+            self._call(seconds * self.rate, "block")
+
+
+def host_key(prefix: str, url: str) -> str:
+    return f"{prefix}:{urlsplit(url).hostname or 'default'}"
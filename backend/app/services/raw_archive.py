@@ -0,0 +1,298 @@
+import gzip
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterator
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# OAuth token exchanges carry credentials; they are never captured and are answered locally on replay.
+TOKEN_PATH = "/api/v1/access_token"
+REPLAY_TOKEN = {"access_token": "replay", "token_type": "bearer", "expires_in": 3600, "scope": "*"}
+# Reddit ingest asked for PRAW's default comment order until it switched to newest first; captures made before then
+# carry sort=confidence in the comments URL and the morechildren body.
+SORT_NEW_RE = re.compile(r"(^|[?&])sort=new(?=&|$)")
+
+INDEX_DDL = """
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    content_type TEXT,
+    sha256 TEXT NOT NULL,
+    method TEXT NOT NULL DEFAULT 'GET',
+    request_sha256 TEXT NOT NULL DEFAULT ''
+);
+"""
+# Archives created before method/request_sha256 existed hold GET captures only, which the defaults describe.
+REQUEST_KEY_COLUMNS = {
+    "method": "ALTER TABLE fetches ADD COLUMN method TEXT NOT NULL DEFAULT 'GET'",
+    "request_sha256": "ALTER TABLE fetches ADD COLUMN request_sha256 TEXT NOT NULL DEFAULT ''",
+}
+INDEX_ONLY_DDL = """
+DROP INDEX IF EXISTS ix_fetches_source_url_time;
+CREATE INDEX IF NOT EXISTS ix_fetches_request_time ON fetches (source, method, url, request_sha256, fetched_at);
+"""
+
+
+def request_key(body: bytes | str | None) -> str:
+    """sha256 of a request body, so POSTs to one URL (PRAW's /api/morechildren) are told apart; empty for no body."""
+    if not body:
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()
+
+
+@dataclass(frozen=True)
+class RawFetch:
+    source: str
+    url: str
+    fetched_at: datetime
+    status: int
+    content_type: str | None
+    sha256: str
+
+
+class RawArchive:
+    """Content-addressed store of raw HTTP payloads with a SQLite index by source, request and fetch time.
+
+    A request is its method, URL and a hash of its body (see request_key).
+
+    Bodies are gzip-compressed under objects/<sha[:2]>/<sha>.gz, so identical responses
+    (an unchanged RSS feed, a re-fetched thread page) are stored once.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.sqlite3"
+        with self._connect() as conn:
+            conn.executescript(INDEX_DDL)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(fetches)")}
+            for column, ddl in REQUEST_KEY_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(ddl)
+            conn.executescript(INDEX_ONLY_DDL)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}.gz"
+
+    def put(
+        self,
+        source: str,
+        url: str,
+        content: bytes,
+        status: int = 200,
+        content_type: str | None = None,
+        fetched_at: datetime | None = None,
+        method: str = "GET",
+        request_body: bytes | str | None = None,
+    ) -> str:
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self._object_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(gzip.compress(content))
+            tmp_path.replace(path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO fetches (source, url, fetched_at, status, content_type, sha256, method, request_sha256)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    source,
+                    url,
+                    (fetched_at or datetime.utcnow()).isoformat(),
+                    status,
+                    content_type,
+                    sha256,
+                    method.upper(),
+                    request_key(request_body),
+                ),
+            )
+        return sha256
+
+    def get(self, sha256: str) -> bytes:
+        return gzip.decompress(self._object_path(sha256).read_bytes())
+
+    def _rows(self, where: str, params: tuple, order: str) -> list[RawFetch]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT source, url, fetched_at, status, content_type, sha256 FROM fetches WHERE {where} ORDER BY {order}",
+                params,
+            ).fetchall()
+        return [
+            RawFetch(source=r[0], url=r[1], fetched_at=datetime.fromisoformat(r[2]), status=r[3], content_type=r[4], sha256=r[5])
+            for r in rows
+        ]
+
+    def latest(
+        self,
+        source: str,
+        url: str,
+        as_of: datetime | None = None,
+        method: str = "GET",
+        request_body: bytes | str | None = None,
+    ) -> RawFetch | None:
+        as_of_raw = (as_of or datetime.max).isoformat()
+        rows = self._rows(
+            "source = ? AND method = ? AND url = ? AND request_sha256 = ? AND fetched_at <= ?",
+            (source, method.upper(), url, request_key(request_body), as_of_raw),
+            "fetched_at DESC LIMIT 1",
+        )
+        return rows[0] if rows else None
+
+    def history(self, source: str, url: str, since: datetime | None = None) -> Iterator[RawFetch]:
+        """Every GET capture of the URL from `since` on, oldest first."""
+        since_raw = (since or datetime.min).isoformat()
+        yield from self._rows(
+            "source = ? AND method = 'GET' AND url = ? AND request_sha256 = '' AND fetched_at >= ?",
+            (source, url, since_raw),
+            "fetched_at",
+        )
+
+
+@lru_cache
+def get_raw_archive() -> RawArchive:
+    return RawArchive(Path(get_settings().raw_archive_dir))
+
+
+def _store(
+    archive: RawArchive,
+    source: str,
+    method: str,
+    url: str,
+    request_body: bytes | str | None,
+    content: bytes,
+    status: int,
+    content_type: str | None,
+) -> None:
+    if url.split("?", 1)[0].endswith(TOKEN_PATH):
+        return
+    try:
+        archive.put(source, url, content, status=status, content_type=content_type, method=method, request_body=request_body)
+    except (OSError, sqlite3.Error):
+        # Capture is best effort; a full disk must not fail ingestion.
+        logger.exception("Failed to capture raw payload for %s", url)
+
+
+def httpx_capture_hook(archive: RawArchive, source: str) -> Callable[[httpx.Response], None]:
+    def hook(response: httpx.Response) -> None:
+        response.read()
+        request = response.request
+        _store(
+            archive,
+            source,
+            request.method,
+            str(request.url),
+            request.content,
+            response.content,
+            response.status_code,
+            response.headers.get("content-type"),
+        )
+
+    return hook
+
+
+def requests_capture_hook(archive: RawArchive, source: str) -> Callable[..., requests.Response]:
+    def hook(response: requests.Response, *args, **kwargs) -> requests.Response:
+        request = response.request
+        _store(
+            archive,
+            source,
+            request.method,
+            request.url,
+            request.body,
+            response.content,
+            response.status_code,
+            response.headers.get("content-type"),
+        )
+        return response
+
+    return hook
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """httpx transport that answers from the raw archive; URLs never captured get a 404."""
+
+    def __init__(self, archive: RawArchive, source: str, as_of: datetime | None = None):
+        self.archive = archive
+        self.source = source
+        self.as_of = as_of
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        fetch = self.archive.latest(self.source, str(request.url), self.as_of, request.method, request.read())
+        if fetch is None:
+            return httpx.Response(404, request=request, headers={"x-replay": "miss"})
+        headers = {"x-replay": "hit"}
+        if fetch.content_type:
+            headers["content-type"] = fetch.content_type
+        return httpx.Response(fetch.status, content=self.archive.get(fetch.sha256), headers=headers, request=request)
+
+
+def _text(body: bytes | str | None) -> str:
+    return body.decode("utf-8") if isinstance(body, bytes) else body or ""
+
+
+def _confidence_sort(value: str) -> str:
+    return SORT_NEW_RE.sub(r"\1sort=confidence", value)
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests adapter (used through PRAW's session) that answers from the raw archive."""
+
+    def __init__(self, archive: RawArchive, source: str, as_of: datetime | None = None):
+        super().__init__()
+        self.archive = archive
+        self.source = source
+        self.as_of = as_of
+
+    def send(self, request, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict({"x-replay": "hit"})
+        if request.url.split("?", 1)[0].endswith(TOKEN_PATH):
+            response.status_code = 200
+            response._content = json.dumps(REPLAY_TOKEN).encode("utf-8")
+            response.headers["content-type"] = "application/json"
+            return response
+        fetch = self.archive.latest(self.source, request.url, self.as_of, request.method, request.body)
+        if fetch is None and (SORT_NEW_RE.search(request.url) or SORT_NEW_RE.search(_text(request.body))):
+            fetch = self.archive.latest(
+                self.source, _confidence_sort(request.url), self.as_of, request.method, _confidence_sort(_text(request.body)) or None
+            )
+        if fetch is None:
+            response.status_code = 404
+            response._content = b"{}"
+            response.headers["x-replay"] = "miss"
+            return response
+        response.status_code = fetch.status
+        response._content = self.archive.get(fetch.sha256)
+        if fetch.content_type:
+            response.headers["content-type"] = fetch.content_type
+        return response
+
+    def close(self) -> None:
+        pass
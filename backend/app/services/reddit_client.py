@@ -1,31 +1,65 @@
 import logging
-import time
+
 import praw
+import requests
 
 from app.core.config import get_settings
+from app.core.metrics import record_fetch, stage
+from app.services.raw_archive import ReplayAdapter, get_raw_archive, requests_capture_hook
+from app.services.rate_limit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
 
-class RedditRateLimiter:
+class RedditRateLimiter(TokenBucket):
+    """Shared budget for every Reddit API call made by any worker."""
+
     def __init__(self, min_interval_seconds: float = 1.0):
-        self.min_interval_seconds = min_interval_seconds
-        self._last = 0.0
+        super().__init__("reddit:oauth.reddit.com", min_interval_seconds)
+
+
+class RateLimitedSession(requests.Session):
+    """Takes a limiter token before each request, so PRAW's own paging and comment fetches count too."""
 
-    def wait(self) -> None:
-        now = time.time()
-        delta = now - self._last
-        if delta < self.min_interval_seconds:
-            time.sleep(self.min_interval_seconds - delta)
-        self._last = time.time()
+    def __init__(self, limiter: TokenBucket):
+        super().__init__()
+        self.limiter = limiter
+
+    def request(self, method, url, *args, **kwargs):
+        self.limiter.wait()
+        with stage("reddit", "http"):
+            response = super().request(method, url, *args, **kwargs)
+        record_fetch("reddit", len(response.content))
+        return response
+
+
+def _http_session(replay: bool, limiter: RedditRateLimiter) -> requests.Session:
+    settings = get_settings()
+    if replay:
+        session = requests.Session()
+        adapter = ReplayAdapter(get_raw_archive(), "reddit")
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    session = RateLimitedSession(limiter)
+    if settings.raw_capture_enabled:
+        session.hooks["response"].append(requests_capture_hook(get_raw_archive(), "reddit"))
+    return session
 
 
-def get_reddit() -> tuple[praw.Reddit, RedditRateLimiter]:
+def get_reddit(replay: bool = False) -> tuple[praw.Reddit, RedditRateLimiter]:
     settings = get_settings()
+    limiter = RedditRateLimiter(min_interval_seconds=0.0 if replay else settings.reddit_rate_limit_seconds)
+    session = _http_session(replay, limiter)
     reddit = praw.Reddit(
-        client_id=settings.reddit_client_id,
-        client_secret=settings.reddit_client_secret,
+        # Replay answers the token exchange locally, so credentials only need to be present.
+        client_id=settings.reddit_client_id or ("replay" if replay else ""),
+        client_secret=settings.reddit_client_secret or ("replay" if replay else ""),
         user_agent=settings.reddit_user_agent,
+        # Overridable so benchmarks and local stubs can stand in for the Reddit API.
+        oauth_url=settings.reddit_oauth_url,
+        reddit_url=settings.reddit_url,
         ratelimit_seconds=30,
+        requestor_kwargs={"session": session},
     )
-    return reddit, RedditRateLimiter(min_interval_seconds=1.0)
+    return reddit, limiter
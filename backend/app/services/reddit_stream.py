@@ -0,0 +1,225 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.metrics import count, record_matches, stage
+from app.models.entities import Comment, Source, Thread
+from app.services.live import get_redis, publish_sentiment_events
+from app.services.matcher import PlayerMentionMatcher
+from app.services.text import author_hash, reddit_source_name
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "reddit_stream:checkpoint:{}"
+
+
+def comment_seq(fullname_or_id: str) -> int:
+    """Reddit ids are base36 counters, so later comments always have larger ids."""
+    return int(fullname_or_id.rsplit("_", 1)[-1], 36)
+
+
+class StreamCheckpoint:
+    """Last persisted comment fullname in Redis; kept in memory only while Redis is unreachable."""
+
+    def __init__(self, name: str, client: redis.Redis | None = None):
+        self.key = CHECKPOINT_KEY.format(name)
+        self._client = client
+        self._value: str | None = None
+
+    def load(self) -> str | None:
+        try:
+            raw = (self._client or get_redis()).get(self.key)
+            self._value = raw.decode() if raw else self._value
+        except redis.RedisError as exc:
+            logger.warning("Stream checkpoint %s unavailable (%s)", self.key, exc)
+        return self._value
+
+    def save(self, fullname: str) -> None:
+        self._value = fullname
+        try:
+            (self._client or get_redis()).set(self.key, fullname)
+        except redis.RedisError as exc:
+            logger.warning("Stream checkpoint %s not saved (%s)", self.key, exc)
+
+
+@dataclass
+class StreamStats:
+    received: int = 0
+    stored: int = 0
+    duplicates: int = 0
+    mentions: int = 0
+    batches: int = 0
+    last_fullname: str | None = None
+
+
+class CommentStreamConsumer:
+    """Buffers streamed comments and persists them in batches: one dedup query, one thread lookup and one commit per batch.
+
+    `store_mentions(db, comment, mentions)` writes entities/scores/facts for a flushed comment and returns live events.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        matcher: PlayerMentionMatcher,
+        store_mentions: Callable,
+        checkpoint: StreamCheckpoint | None = None,
+        batch_size: int = 100,
+        flush_seconds: float = 2.0,
+        publish: bool = True,
+    ):
+        self.db = db
+        self.matcher = matcher
+        self.store_mentions = store_mentions
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.publish = publish
+        self.stats = StreamStats()
+        self._buffer: list = []
+        self._first_buffered_at = 0.0
+        self._sources: dict[str, int] = {}
+        last = checkpoint.load() if checkpoint else None
+        self._last_seq = comment_seq(last) if last else 0
+        self.stats.last_fullname = last
+
+    def consume(self, stream: Iterable, should_stop: Callable[[], bool] = lambda: False) -> StreamStats:
+        """Drain a PRAW comment stream; a None item (pause_after) is an idle tick that flushes a partial batch."""
+        for item in stream:
+            if item is not None:
+                self.add(item)
+            if self._buffer and (
+                item is None
+                or len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._first_buffered_at >= self.flush_seconds
+            ):
+                self.flush()
+            if should_stop():
+                break
+        self.flush()
+        return self.stats
+
+    def add(self, comment) -> None:
+        self.stats.received += 1
+        # After a restart the stream replays up to 100 recent comments; the checkpoint drops the ones already stored.
+        if comment_seq(comment.id) <= self._last_seq:
+            self.stats.duplicates += 1
+            return
+        if not self._buffer:
+            self._first_buffered_at = time.monotonic()
+        self._buffer.append(comment)
+
+    def _source_id(self, subreddit: str) -> int:
+        name = reddit_source_name(subreddit)
+        if name not in self._sources:
+            source = self.db.execute(
+                select(Source).where(Source.source_type == "reddit", Source.name == name)
+            ).scalar_one_or_none()
+            if source is None:
+                source = Source(source_type="reddit", name=name)
+                self.db.add(source)
+                self.db.flush()
+            self._sources[name] = source.id
+        return self._sources[name]
+
+    def _thread_ids(self, comments: list, source_ids: dict[str, int]) -> dict[tuple[int, str], int]:
+        wanted = {(source_ids[c.subreddit.display_name], c.link_id.split("_", 1)[-1]): c for c in comments}
+        existing = {
+            (source_id, external_id): thread_id
+            for thread_id, source_id, external_id in self.db.execute(
+                select(Thread.id, Thread.source_id, Thread.external_id).where(
+                    Thread.source_id.in_({key[0] for key in wanted}),
+                    Thread.external_id.in_({key[1] for key in wanted}),
+                )
+            )
+        }
+        for key, comment in wanted.items():
+            if key in existing:
+                continue
+            created = datetime.utcfromtimestamp(comment.created_utc)
+            thread = Thread(
+                source_id=key[0],
+                external_id=key[1],
+                title=getattr(comment, "link_title", "") or "",
+                url=getattr(comment, "link_url", None),
+                created_at=created,
+                fetched_at=datetime.utcnow(),
+            )
+            self.db.add(thread)
+            self.db.flush()
+            existing[key] = thread.id
+            count("reddit_stream", "thread")
+        return existing
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        source_ids = {c.subreddit.display_name: self._source_id(c.subreddit.display_name) for c in batch}
+        created = {c.id: datetime.utcfromtimestamp(c.created_utc) for c in batch}
+
+        with stage("reddit_stream", "dedup"):
+            # The created_utc range keeps the lookup on the partitions the batch falls into.
+            seen = set(
+                self.db.execute(
+                    select(Comment.external_id).where(
+                        Comment.source_id.in_(set(source_ids.values())),
+                        Comment.external_id.in_(list(created)),
+                        Comment.created_utc >= min(created.values()),
+                        Comment.created_utc <= max(created.values()),
+                    )
+                ).scalars()
+            )
+        fresh = [c for c in batch if c.id not in seen]
+        self.stats.duplicates += len(batch) - len(fresh)
+        count("reddit_stream", "duplicate", len(batch) - len(fresh))
+        threads = self._thread_ids(fresh, source_ids) if fresh else {}
+
+        stored = []
+        for c in fresh:
+            source_id = source_ids[c.subreddit.display_name]
+            comment = Comment(
+                source_id=source_id,
+                thread_id=threads[(source_id, c.link_id.split("_", 1)[-1])],
+                external_id=c.id,
+                parent_external_id=getattr(c, "parent_id", None),
+                author_hash=author_hash(str(c.author) if c.author else None),
+                body=c.body or "",
+                created_utc=created[c.id],
+                score=int(getattr(c, "score", 0) or 0),
+                url=f"https://reddit.com{getattr(c, 'permalink', '')}",
+                fetched_at=datetime.utcnow(),
+            )
+            self.db.add(comment)
+            stored.append(comment)
+        self.db.flush()
+
+        events = []
+        for comment in stored:
+            with stage("reddit_stream", "match"):
+                mentions = self.matcher.find_mentions(comment.body)
+            record_matches("reddit_stream", len(mentions))
+            if mentions:
+                events.extend(self.store_mentions(self.db, comment, mentions))
+                self.stats.mentions += len(mentions)
+                count("reddit_stream", "mention", len(mentions))
+        with stage("reddit_stream", "db_commit"):
+            self.db.commit()
+        if self.publish:
+            publish_sentiment_events(events)
+
+        # Everything buffered is newer than the checkpoint (see add), so the batch maximum moves it forward.
+        newest = max(batch, key=lambda c: comment_seq(c.id))
+        self._last_seq = comment_seq(newest.id)
+        self.stats.last_fullname = f"t1_{newest.id}"
+        if self.checkpoint:
+            self.checkpoint.save(self.stats.last_fullname)
+        self.stats.stored += len(stored)
+        self.stats.batches += 1
+        count("reddit_stream", "comment", len(stored))
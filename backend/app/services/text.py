@@ -1,3 +1,4 @@
+import hashlib
 import re
 
 PUNCT_RE = re.compile(r"[^\w\s]")
@@ -9,3 +10,14 @@ def normalize_text(value: str) -> str:
     value = PUNCT_RE.sub(" ", value)
     value = SPACE_RE.sub(" ", value)
     return value.strip()
+
+
+def reddit_source_name(subreddit: str) -> str:
+    # Subreddit names are case-insensitive; the poller, the stream and the archive loader must agree on one Source.
+    return subreddit.strip().lower()
+
+
+def author_hash(name: str | None) -> str | None:
+    if not name:
+        return None
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()
@@ -0,0 +1,60 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import get_settings
+
+
+class SparqlCacheMiss(RuntimeError):
+    """Raised in offline mode when a query has never been cached."""
+
+
+class SparqlCache:
+    """On-disk SPARQL response cache keyed by sha256 of endpoint and query text.
+
+    Entries are gzip JSON under <root>/<key[:2]>/<key>.json.gz. Entries older than ttl_seconds
+    are ignored on lookup (ttl_seconds <= 0 keeps them forever); offline lookups ignore the TTL.
+    """
+
+    def __init__(self, root: Path, ttl_seconds: float = 86400):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def key(endpoint: str, query: str) -> str:
+        return hashlib.sha256(f"{endpoint}\n{query}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json.gz"
+
+    def get(self, endpoint: str, query: str, ignore_ttl: bool = False) -> dict | None:
+        path = self._path(self.key(endpoint, query))
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        expired = self.ttl_seconds > 0 and time.time() - entry.get("fetched_at", 0) > self.ttl_seconds
+        if expired and not ignore_ttl:
+            return None
+        return entry["data"]
+
+    def put(self, endpoint: str, query: str, data: dict) -> None:
+        path = self._path(self.key(endpoint, query))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"endpoint": endpoint, "query": query, "fetched_at": time.time(), "data": data}
+        # Write-then-rename so concurrent team fetches never read a half-written entry.
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+            json.dump(entry, handle, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+@lru_cache
+def get_sparql_cache() -> SparqlCache:
+    settings = get_settings()
+    return SparqlCache(Path(settings.wikidata_cache_dir), ttl_seconds=settings.wikidata_cache_ttl_seconds)
@@ -1,8 +1,13 @@
+import threading
 import time
 from dataclasses import dataclass
 
 import httpx
 
+from app.core.config import get_settings
+from app.services.rate_limit import TokenBucket, host_key
+from app.services.wikidata.cache import SparqlCache, SparqlCacheMiss, get_sparql_cache
+
 WIKIDATA_ENDPOINT = "https://query.wikidata.org/sparql"
 DEFAULT_TIMEOUT_S = 60
 
@@ -13,14 +18,53 @@ class SparqlResult:
 
 
 class WikidataClient:
-    def __init__(self, user_agent: str, timeout_s: int = DEFAULT_TIMEOUT_S):
-        self._client = httpx.Client(timeout=timeout_s, follow_redirects=True)
+    """SPARQL client; cache and offline mode default to the WIKIDATA_CACHE_* / WIKIDATA_OFFLINE settings."""
+
+    def __init__(
+        self,
+        user_agent: str,
+        timeout_s: int = DEFAULT_TIMEOUT_S,
+        endpoint: str = WIKIDATA_ENDPOINT,
+        cache: SparqlCache | None = None,
+        offline: bool | None = None,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        self._timeout_s = timeout_s
+        self._transport = transport
+        # Opened on the first live query, so cache-only runs never create a connection pool.
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
         self._user_agent = user_agent
+        self._endpoint = endpoint
+        settings = get_settings()
+        self._offline = settings.wikidata_offline if offline is None else offline
+        if cache is None and (settings.wikidata_cache_enabled or self._offline):
+            cache = get_sparql_cache()
+        self._cache = cache
+        # Shared by every worker querying this endpoint; a 429 pauses all of them, not just this client.
+        self._limiter = TokenBucket(host_key("wikidata", endpoint), settings.wikidata_rate_limit_seconds)
 
     def close(self) -> None:
-        self._client.close()
+        if self._client is not None:
+            self._client.close()
 
     def query(self, sparql: str) -> SparqlResult:
+        if self._cache is not None:
+            cached = self._cache.get(self._endpoint, sparql, ignore_ttl=self._offline)
+            if cached is not None:
+                return SparqlResult(cached)
+        if self._offline:
+            raise SparqlCacheMiss(f"SPARQL query not cached and offline mode is on ({self._endpoint})")
+
+        result = self._query_live(sparql)
+        if self._cache is not None:
+            self._cache.put(self._endpoint, sparql, result.data)
+        return result
+
+    def _query_live(self, sparql: str) -> SparqlResult:
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self._timeout_s, follow_redirects=True, transport=self._transport)
         headers = {
             "Accept": "application/sparql-results+json",
             "User-Agent": self._user_agent,
@@ -31,10 +75,10 @@ class WikidataClient:
         last_exc: Exception | None = None
         for attempt in range(3):
             try:
-                response = self._client.post(WIKIDATA_ENDPOINT, data=payload, headers=headers)
+                self._limiter.wait()
+                response = self._client.post(self._endpoint, data=payload, headers=headers)
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", "5"))
-                    time.sleep(retry_after)
+                    self._limiter.block_for(int(response.headers.get("Retry-After", "5")))
                     continue
                 response.raise_for_status()
                 return SparqlResult(response.json())
@@ -1,12 +1,15 @@
-import time
 import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Callable
 
 from app.core.config import get_settings
 from app.services.text import normalize_text
-from app.services.wikidata.client import WikidataClient
+from app.services.wikidata.client import WIKIDATA_ENDPOINT, WikidataClient
 from app.services.wikidata.normalize import build_aliases, load_alias_denylist
-from app.services.wikidata.queries import SPARQL_PLAYERS_QUERY
+from app.services.wikidata.queries import SPARQL_NBA_TEAMS_QUERY, SPARQL_TEAM_PLAYERS_PAGE_QUERY
 
 
 def _extract_qid(uri: str) -> str:
@@ -37,78 +40,126 @@ def _parse_year(value: str | None) -> int | None:
         return None
 
 
-def fetch_players(limit: int, sleep_s: float, max_rows: int | None, denylist_path: Path) -> list[dict]:
+def _team_rank(end_value: datetime.date | None, team_label: str) -> tuple:
+    # Open-ended membership wins, then the latest end date; the label breaks ties so the
+    # result does not depend on the order in which concurrently fetched pages arrive.
+    return (end_value is None, end_value or datetime.date.min, team_label)
+
+
+def _merge_row(players: dict[str, dict], row: dict) -> None:
+    qid = _extract_qid(row["player"]["value"])
+    player = players.setdefault(
+        qid,
+        {
+            "wikidata_qid": qid,
+            "full_name": row.get("playerLabel", {}).get("value", "").strip(),
+            "aliases": [],
+            "positions": [],
+            "birth_date": None,
+            "nba_debut_year": None,
+            "retired": None,
+            "team": None,
+            "_team_end": None,
+        },
+    )
+
+    alias = row.get("alias", {}).get("value")
+    if alias:
+        player["aliases"].append(alias)
+
+    position = row.get("positionLabel", {}).get("value")
+    if position:
+        player["positions"].append(position)
+
+    birth_date = _parse_date(row.get("birthDate", {}).get("value"))
+    if birth_date and not player["birth_date"]:
+        player["birth_date"] = birth_date
+
+    nba_start_year = _parse_year(row.get("nbaStart", {}).get("value"))
+    if nba_start_year:
+        current = player.get("nba_debut_year")
+        if not current or nba_start_year < current:
+            player["nba_debut_year"] = nba_start_year
+
+    team_label = row.get("team2Label", {}).get("value")
+    if team_label:
+        end_value = _parse_date_value(row.get("nbaEnd", {}).get("value"))
+        if player["team"] is None or _team_rank(end_value, team_label) > _team_rank(player["_team_end"], player["team"]):
+            player["team"] = team_label
+            player["_team_end"] = end_value
+
+
+def _team_qids(client: WikidataClient) -> list[str]:
+    rows = client.query(SPARQL_NBA_TEAMS_QUERY).data.get("results", {}).get("bindings", [])
+    return [_extract_qid(row["team"]["value"]) for row in rows]
+
+
+def _fetch_team(
+    client: WikidataClient,
+    team_qid: str,
+    limit: int,
+    sleep_s: float,
+    on_rows: Callable[[list[dict]], None],
+    stop: threading.Event,
+) -> None:
+    after = ""
+    while not stop.is_set():
+        query = (
+            SPARQL_TEAM_PLAYERS_PAGE_QUERY.replace("__TEAM__", team_qid)
+            .replace("__AFTER__", after)
+            .replace("__LIMIT__", str(limit))
+        )
+        rows = client.query(query).data.get("results", {}).get("bindings", [])
+        if not rows:
+            return
+        on_rows(rows)
+        player_uris = {row["player"]["value"] for row in rows}
+        if len(player_uris) < limit:
+            return
+        after = max(player_uris)
+        time.sleep(sleep_s)
+
+
+def fetch_players(
+    limit: int,
+    sleep_s: float,
+    max_rows: int | None,
+    denylist_path: Path,
+    concurrency: int = 4,
+    endpoint: str = WIKIDATA_ENDPOINT,
+    offline: bool | None = None,
+) -> list[dict]:
+    """Fetch NBA players team by team, each team paged by player-id keyset with `limit` players per page.
+
+    Up to `concurrency` teams are in flight at once; rows are merged into the per-QID dict as pages arrive.
+    A player who played for several teams is seen once per team, which the merge tolerates.
+    """
     settings = get_settings()
-    client = WikidataClient(user_agent=f"{settings.app_name}/0.1 (Wikidata fetch)")
+    client = WikidataClient(user_agent=f"{settings.app_name}/0.1 (Wikidata fetch)", endpoint=endpoint, offline=offline)
     players: dict[str, dict] = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+    fetched = 0
 
-    try:
-        offset = 0
-        fetched = 0
-        while True:
-            query = SPARQL_PLAYERS_QUERY.replace("__LIMIT__", str(limit)).replace("__OFFSET__", str(offset))
-            result = client.query(query).data
-            rows = result.get("results", {}).get("bindings", [])
-            if not rows:
-                break
-
+    def on_rows(rows: list[dict]) -> None:
+        nonlocal fetched
+        with lock:
             for row in rows:
-                qid = _extract_qid(row["player"]["value"])
-                player = players.setdefault(
-                    qid,
-                    {
-                        "wikidata_qid": qid,
-                        "full_name": row.get("playerLabel", {}).get("value", "").strip(),
-                        "aliases": [],
-                        "positions": [],
-                        "birth_date": None,
-                        "nba_debut_year": None,
-                        "retired": None,
-                        "team": None,
-                        "_team_end": None,
-                    },
-                )
-
-                alias = row.get("alias", {}).get("value")
-                if alias:
-                    player["aliases"].append(alias)
-
-                position = row.get("positionLabel", {}).get("value")
-                if position:
-                    player["positions"].append(position)
-
-                birth_date = _parse_date(row.get("birthDate", {}).get("value"))
-                if birth_date and not player["birth_date"]:
-                    player["birth_date"] = birth_date
-
-                nba_start_year = _parse_year(row.get("nbaStart", {}).get("value"))
-                if nba_start_year:
-                    current = player.get("nba_debut_year")
-                    if not current or nba_start_year < current:
-                        player["nba_debut_year"] = nba_start_year
-
-                team_label = row.get("team2Label", {}).get("value")
-                nba_end = row.get("nbaEnd", {}).get("value")
-                if team_label:
-                    end_value = _parse_date_value(nba_end)
-                    existing_end = player.get("_team_end")
-                    if existing_end is None:
-                        if end_value is None:
-                            player["team"] = team_label
-                            player["_team_end"] = None
-                        else:
-                            player["team"] = team_label
-                            player["_team_end"] = end_value
-                    else:
-                        if end_value is None or (existing_end is not None and end_value > existing_end):
-                            player["team"] = team_label
-                            player["_team_end"] = end_value
-
+                _merge_row(players, row)
             fetched += len(rows)
-            offset += limit
             if max_rows and fetched >= max_rows:
-                break
-            time.sleep(sleep_s)
+                stop.set()
+
+    try:
+        teams = _team_qids(client)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(_fetch_team, client, team_qid, limit, sleep_s, on_rows, stop) for team_qid in teams]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                stop.set()
+                raise
     finally:
         client.close()
 
@@ -120,7 +171,7 @@ def fetch_players(limit: int, sleep_s: float, max_rows: int | None, denylist_pat
         if not full_name:
             continue
         player["normalized_name"] = normalize_text(full_name)
-        player["aliases"] = build_aliases(full_name, player.get("aliases", []), denylist)
+        player["aliases"] = build_aliases(full_name, sorted(set(player.get("aliases", []))), denylist)
         player["positions"] = sorted(set(player.get("positions", [])))
         player.pop("_team_end", None)
         cleaned_players.append(player)
@@ -1,4 +1,4 @@
-SPARQL_PLAYERS_QUERY = """
+SPARQL_PREFIXES = """
 PREFIX wd: <http://www.wikidata.org/entity/>
 PREFIX wdt: <http://www.wikidata.org/prop/direct/>
 PREFIX p: <http://www.wikidata.org/prop/>
@@ -8,13 +8,33 @@ PREFIX bd: <http://www.bigdata.com/rdf#>
 PREFIX wikibase: <http://wikiba.se/ontology#>
 PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
 PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
 
-SELECT DISTINCT ?player ?playerLabel ?alias ?positionLabel ?birthDate ?nbaStart ?nbaEnd ?team2 ?team2Label
+SPARQL_NBA_TEAMS_QUERY = SPARQL_PREFIXES + """
+SELECT DISTINCT ?team
 WHERE {
-  ?player wdt:P31 wd:Q5;
-          wdt:P106 wd:Q3665646;
-          wdt:P54 ?team.
   ?team wdt:P118 wd:Q155223.
+}
+ORDER BY ?team
+"""
+
+# One keyset page of a team's players: the subquery picks the next __LIMIT__ player ids after
+# __AFTER__, and only those players' detail rows are expanded. Unlike OFFSET, the endpoint never
+# re-computes earlier pages, and a page never splits one player's rows.
+SPARQL_TEAM_PLAYERS_PAGE_QUERY = SPARQL_PREFIXES + """
+SELECT DISTINCT ?player ?playerLabel ?alias ?positionLabel ?birthDate ?nbaStart ?nbaEnd ?team2 ?team2Label
+WHERE {
+  {
+    SELECT DISTINCT ?player
+    WHERE {
+      ?player wdt:P54 wd:__TEAM__;
+              wdt:P31 wd:Q5;
+              wdt:P106 wd:Q3665646.
+      FILTER (STR(?player) > "__AFTER__")
+    }
+    ORDER BY STR(?player)
+    LIMIT __LIMIT__
+  }
 
   OPTIONAL { ?player wdt:P413 ?position. }
   OPTIONAL { ?player wdt:P569 ?birthDate. }
@@ -28,8 +48,6 @@ WHERE {
   OPTIONAL { ?player skos:altLabel ?alias FILTER (lang(?alias) = "en") }
   SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
 }
-LIMIT __LIMIT__
-OFFSET __OFFSET__
 """
 
 SPARQL_ROCKETS_CURRENT_QUERY = """
@@ -1,24 +1,65 @@
 from pathlib import Path
 
+from sqlalchemy import func, select
+
 from app.db.session import SessionLocal
+from app.models.entities import Player
 from app.services.wikidata.fetch import fetch_players
-from app.services.wikidata.seed import upsert_players_from_snapshot_path
-from app.services.wikidata.snapshot import write_snapshot
+from app.services.wikidata.seed import deactivate_players, upsert_players_from_payload
+from app.services.wikidata.snapshot import (
+    default_snapshot_path,
+    diff_players,
+    iter_snapshot_players,
+    player_key,
+    read_manifest,
+    resolve_snapshot_path,
+    write_snapshot,
+)
 
 
-def refresh_players_from_wikidata_sync(limit: int = 500, sleep_s: float = 1.0, max_rows: int | None = None) -> dict:
+def refresh_players_from_wikidata_sync(
+    limit: int = 500, sleep_s: float = 1.0, max_rows: int | None = None, full: bool = False
+) -> dict:
     base_dir = Path(__file__).resolve().parents[3]
-    snapshot_path = base_dir / "data" / "wikidata_players_snapshot.json"
+    snapshot_path = default_snapshot_path()
+    previous_path = resolve_snapshot_path()
     denylist_path = base_dir / "data" / "alias_denylist.txt"
 
+    previous = read_manifest(previous_path) or {}
     players = fetch_players(limit=limit, sleep_s=sleep_s, max_rows=max_rows, denylist_path=denylist_path)
-    write_snapshot(players, snapshot_path)
+    diff = diff_players(iter_snapshot_players(previous_path) if previous else [], players)
+    if max_rows:
+        # A truncated fetch cannot tell a removed player from one it never reached.
+        diff["removed"] = []
+    diff["base_generated_at"] = previous.get("generated_at")
 
     db = SessionLocal()
     try:
-        result = upsert_players_from_snapshot_path(db, snapshot_path=snapshot_path, denylist_path=denylist_path)
+        # The diff is relative to the previous snapshot, so it only applies to a DB that was seeded from it.
+        seeded = db.execute(select(func.count()).select_from(Player).where(Player.wikidata_qid.is_not(None))).scalar_one()
+        if full or not seeded:
+            changed_players = players
+        else:
+            touched = set(diff["added"]) | set(diff["changed"])
+            changed_players = [p for p in players if player_key(p) in touched]
+        result = upsert_players_from_payload(db, changed_players, denylist_path=denylist_path)
+        result["deactivated"] = deactivate_players(db, diff["removed"])
     finally:
         db.close()
 
-    result.update({"player_count": len(players), "snapshot_path": str(snapshot_path)})
+    # The snapshot is the baseline the next refresh diffs against. It is written only once the DB has committed
+    # these changes (a failed upsert must not hide them from the next run), and never from a truncated fetch, which
+    # would make every player it did not reach look removed-and-forgotten to later full refreshes.
+    snapshot_written = not max_rows
+    if snapshot_written:
+        write_snapshot(players, snapshot_path, diff=diff)
+
+    result.update(
+        {
+            "player_count": len(players),
+            "snapshot_path": str(snapshot_path),
+            "snapshot_written": snapshot_written,
+            "diff": {k: len(diff[k]) for k in ("added", "changed", "removed")} | {"unchanged": diff["unchanged"]},
+        }
+    )
     return result
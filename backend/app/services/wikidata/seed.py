@@ -1,13 +1,21 @@
-import json
+import uuid
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
 from app.models.entities import Player, PlayerAlias
 from app.services.text import normalize_text
 from app.services.wikidata.normalize import build_aliases, load_alias_denylist
-from app.services.wikidata.snapshot import default_snapshot_path
+from app.services.wikidata.snapshot import iter_snapshot_players
+
+# IN-list size for preloads; stays under SQLite's 999 bound-parameter default.
+PRELOAD_CHUNK = 500
+# Snapshot records upserted per transaction when streaming a snapshot file.
+SNAPSHOT_BATCH = 1000
+# Rows per multi-VALUES insert (players have 6 columns, so 150 rows is 900 parameters).
+WRITE_CHUNK = 150
 
 
 def _resolve_players_payload(payload: dict | list) -> list[dict]:
@@ -16,77 +24,156 @@ def _resolve_players_payload(payload: dict | list) -> list[dict]:
     return payload.get("players", [])
 
 
-def _compute_active(entry: dict, existing_active: bool | None) -> bool:
-    if entry.get("retired") is True:
-        return False
-    if entry.get("retired") is False:
-        return True
+def _compute_active(entry: dict) -> bool:
+    # Being in the payload means active: a player deactivate_players retired comes back when they reappear.
+    if entry.get("retired") is not None:
+        return not entry["retired"]
     if entry.get("active") is not None:
         return bool(entry.get("active"))
-    return existing_active if existing_active is not None else True
+    return True
+
+
+def _insert(db: Session):
+    return {"postgresql": postgresql.insert, "sqlite": sqlite.insert}[db.get_bind().dialect.name]
+
+
+def _chunks(values: list, size: int = PRELOAD_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _preload_players(db: Session, qids: list[str], names: list[str]) -> tuple[dict, dict]:
+    columns = (Player.id, Player.full_name, Player.normalized_name, Player.team, Player.active, Player.wikidata_qid)
+    rows: dict[uuid.UUID, dict] = {}
+    for column, values in ((Player.wikidata_qid, qids), (Player.normalized_name, names)):
+        for chunk in _chunks(values):
+            for row in db.execute(select(*columns).where(column.in_(chunk))).mappings():
+                rows.setdefault(row["id"], dict(row))
+    by_qid = {row["wikidata_qid"]: row for row in rows.values() if row["wikidata_qid"]}
+    by_name = {row["normalized_name"]: row for row in rows.values()}
+    return by_qid, by_name
+
+
+def _preload_aliases(db: Session, player_ids: list[uuid.UUID]) -> dict[uuid.UUID, set[str]]:
+    existing: dict[uuid.UUID, set[str]] = {}
+    for chunk in _chunks(player_ids):
+        stmt = select(PlayerAlias.player_id, PlayerAlias.normalized_alias).where(PlayerAlias.player_id.in_(chunk))
+        for player_id, normalized_alias in db.execute(stmt).all():
+            existing.setdefault(player_id, set()).add(normalized_alias)
+    return existing
 
 
 def upsert_players_from_payload(db: Session, payload: dict | list, denylist_path: Path | None = None) -> dict:
+    """Upsert players and aliases in bulk: a few preload queries, diffs in memory, batched INSERT ... ON CONFLICT."""
     players = _resolve_players_payload(payload)
     denylist = load_alias_denylist(denylist_path) if denylist_path else set()
 
+    entries = []
+    for entry in players:
+        full_name = entry.get("full_name") or ""
+        if full_name:
+            entries.append((entry, full_name, entry.get("normalized_name") or normalize_text(full_name)))
+
+    by_qid, by_name = _preload_players(
+        db,
+        sorted({e.get("wikidata_qid") for e, _, _ in entries if e.get("wikidata_qid")}),
+        sorted({name for _, _, name in entries}),
+    )
+    existing_aliases = _preload_aliases(db, [row["id"] for row in by_name.values()])
+
     created = 0
     updated = 0
     aliases_added = 0
+    player_rows: dict[uuid.UUID, dict] = {}
+    alias_rows: list[dict] = []
 
-    for entry in players:
-        full_name = entry.get("full_name") or ""
-        if not full_name:
-            continue
-        normalized_name = entry.get("normalized_name") or normalize_text(full_name)
+    for entry, full_name, normalized_name in entries:
         wikidata_qid = entry.get("wikidata_qid")
-
-        player = None
-        if wikidata_qid:
-            player = db.execute(select(Player).where(Player.wikidata_qid == wikidata_qid)).scalar_one_or_none()
-        if not player:
-            player = db.execute(select(Player).where(Player.normalized_name == normalized_name)).scalar_one_or_none()
-
-        if not player:
-            player = Player(
-                full_name=full_name,
-                normalized_name=normalized_name,
-                team=entry.get("team"),
-                active=_compute_active(entry, None),
-                wikidata_qid=wikidata_qid,
-            )
-            db.add(player)
-            db.flush()
+        player = by_qid.get(wikidata_qid) if wikidata_qid else None
+        if player is None:
+            player = by_name.get(normalized_name)
+
+        if player is None:
+            player = {
+                "id": uuid.uuid4(),
+                "full_name": full_name,
+                "normalized_name": normalized_name,
+                "team": entry.get("team"),
+                "active": _compute_active(entry),
+                "wikidata_qid": wikidata_qid,
+            }
+            player_rows[player["id"]] = player
             created += 1
         else:
-            player.full_name = full_name
-            player.normalized_name = normalized_name
-            player.team = entry.get("team", player.team)
-            player.active = _compute_active(entry, player.active)
-            if wikidata_qid and not player.wikidata_qid:
-                player.wikidata_qid = wikidata_qid
+            before = dict(player)
+            by_name.pop(player["normalized_name"], None)
+            player["full_name"] = full_name
+            player["normalized_name"] = normalized_name
+            player["team"] = entry.get("team", player["team"])
+            player["active"] = _compute_active(entry)
+            if wikidata_qid and not player["wikidata_qid"]:
+                player["wikidata_qid"] = wikidata_qid
+            if player != before:
+                player_rows[player["id"]] = player
             updated += 1
+        by_name[player["normalized_name"]] = player
+        if player["wikidata_qid"]:
+            by_qid[player["wikidata_qid"]] = player
 
-        aliases = build_aliases(full_name, entry.get("aliases", []), denylist)
-        existing_aliases = {
-            row[0]
-            for row in db.execute(
-                select(PlayerAlias.normalized_alias).where(PlayerAlias.player_id == player.id)
-            ).all()
-        }
-        for alias in aliases:
+        seen = existing_aliases.setdefault(player["id"], set())
+        for alias in build_aliases(full_name, entry.get("aliases", []), denylist):
             norm_alias = normalize_text(alias)
-            if norm_alias in existing_aliases:
+            if norm_alias in seen:
                 continue
-            db.add(PlayerAlias(player_id=player.id, alias_text=alias, normalized_alias=norm_alias))
-            existing_aliases.add(norm_alias)
+            alias_rows.append({"player_id": player["id"], "alias_text": alias, "normalized_alias": norm_alias})
+            seen.add(norm_alias)
             aliases_added += 1
 
+    insert = _insert(db)
+    for chunk in _chunks(list(player_rows.values()), WRITE_CHUNK):
+        stmt = insert(Player).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Player.id],
+            set_={
+                name: stmt.excluded[name]
+                for name in ("full_name", "normalized_name", "team", "active", "wikidata_qid")
+            },
+        )
+        db.execute(stmt)
+    for chunk in _chunks(alias_rows, WRITE_CHUNK):
+        stmt = insert(PlayerAlias).values(chunk)
+        db.execute(stmt.on_conflict_do_nothing(index_elements=[PlayerAlias.player_id, PlayerAlias.normalized_alias]))
+
     db.commit()
     return {"created": created, "updated": updated, "aliases_added": aliases_added}
 
 
+def deactivate_players(db: Session, keys: list[str]) -> int:
+    """Mark players that dropped out of the snapshot inactive; keys are QIDs or "name:<normalized name>"."""
+    qids = [k for k in keys if not k.startswith("name:")]
+    names = [k.removeprefix("name:") for k in keys if k.startswith("name:")]
+    if not qids and not names:
+        return 0
+    deactivated = 0
+    if qids:
+        deactivated += db.execute(update(Player).where(Player.wikidata_qid.in_(qids), Player.active.is_(True)).values(active=False)).rowcount
+    if names:
+        deactivated += db.execute(update(Player).where(Player.normalized_name.in_(names), Player.active.is_(True)).values(active=False)).rowcount
+    db.commit()
+    return deactivated
+
+
 def upsert_players_from_snapshot_path(db: Session, snapshot_path: Path | None = None, denylist_path: Path | None = None) -> dict:
-    path = snapshot_path or default_snapshot_path()
-    payload = json.loads(path.read_text(encoding="utf-8"))
-    return upsert_players_from_payload(db, payload, denylist_path=denylist_path)
+    """Stream the snapshot in SNAPSHOT_BATCH-sized bulk upserts instead of loading the whole document."""
+    totals = {"created": 0, "updated": 0, "aliases_added": 0}
+    batch: list[dict] = []
+    for player in iter_snapshot_players(snapshot_path):
+        batch.append(player)
+        if len(batch) >= SNAPSHOT_BATCH:
+            for key, value in upsert_players_from_payload(db, batch, denylist_path=denylist_path).items():
+                totals[key] += value
+            batch = []
+    if batch:
+        for key, value in upsert_players_from_payload(db, batch, denylist_path=denylist_path).items():
+            totals[key] += value
+    return totals
@@ -1,38 +1,198 @@
+import gzip
+import hashlib
 import json
+import os
+from collections.abc import Iterable, Iterator
 from datetime import datetime, timezone
 from pathlib import Path
 
+from app.services.text import normalize_text
+
+# Order-insensitive list fields: Wikidata returns aliases and positions in no stable order.
+UNORDERED_FIELDS = ("aliases", "positions")
+SNAPSHOT_FORMAT = "ndjson.gz"
+NDJSON_SUFFIX = ".ndjson.gz"
+LEGACY_SUFFIX = ".json"
+
+
+def _data_dir() -> Path:
+    return Path(__file__).resolve().parents[3] / "data"
+
 
 def default_snapshot_path() -> Path:
-    return Path(__file__).resolve().parents[3] / "data" / "wikidata_players_snapshot.json"
+    return _data_dir() / "wikidata_players_snapshot.ndjson.gz"
+
+
+def legacy_snapshot_path() -> Path:
+    return _data_dir() / "wikidata_players_snapshot.json"
+
+
+def resolve_snapshot_path(path: Path | None = None) -> Path:
+    """The given path, else the NDJSON snapshot, else the legacy indented-JSON one if only that exists."""
+    if path is not None:
+        return path
+    snapshot_path = default_snapshot_path()
+    if not snapshot_path.exists() and legacy_snapshot_path().exists():
+        return legacy_snapshot_path()
+    return snapshot_path
+
+
+def manifest_path(snapshot_path: Path) -> Path:
+    name = snapshot_path.name
+    for suffix in (NDJSON_SUFFIX, LEGACY_SUFFIX):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return snapshot_path.with_name(name + ".manifest.json")
+
+
+def _is_legacy(snapshot_path: Path) -> bool:
+    return not snapshot_path.name.endswith(NDJSON_SUFFIX)
+
+
+def player_key(player: dict) -> str:
+    qid = player.get("wikidata_qid")
+    if qid:
+        return qid
+    return "name:" + (player.get("normalized_name") or normalize_text(player.get("full_name") or ""))
+
+
+def player_content_hash(player: dict) -> str:
+    canonical = {k: v for k, v in player.items() if k != "content_hash"}
+    for field in UNORDERED_FIELDS:
+        if isinstance(canonical.get(field), list):
+            canonical[field] = sorted(canonical[field])
+    encoded = json.dumps(canonical, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def diff_players(previous: Iterable[dict], current: list[dict]) -> dict:
+    previous_hashes = {player_key(p): p.get("content_hash") or player_content_hash(p) for p in previous}
+    added: list[str] = []
+    changed: list[str] = []
+    unchanged = 0
+    current_keys = set()
+    for player in current:
+        key = player_key(player)
+        current_keys.add(key)
+        old_hash = previous_hashes.get(key)
+        if old_hash is None:
+            added.append(key)
+        elif old_hash != player_content_hash(player):
+            changed.append(key)
+        else:
+            unchanged += 1
+    removed = sorted(key for key in previous_hashes if key not in current_keys)
+    return {"added": sorted(added), "changed": sorted(changed), "removed": removed, "unchanged": unchanged}
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
-def write_snapshot(players: list[dict], output_path: Path) -> None:
-    payload = {
-        "generated_at": datetime.now(timezone.utc).isoformat(),
+def _write_atomic(path: Path, write) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(players: list[dict], output_path: Path, diff: dict | None = None) -> dict:
+    """Write one player per line (gzip NDJSON) and then the manifest, so readers never see a manifest ahead of its data.
+
+    A path ending in .json is written in the legacy single-document format instead.
+    """
+    players_digest = hashlib.sha256()
+    for player in players:
+        player["content_hash"] = player_content_hash(player)
+        players_digest.update(player["content_hash"].encode("ascii"))
+    generated_at = datetime.now(timezone.utc).isoformat()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if _is_legacy(output_path):
+        payload = {"generated_at": generated_at, "source": "wikidata", "players": players}
+        _write_atomic(output_path, lambda p: p.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"))
+    else:
+
+        def _write_lines(path: Path) -> None:
+            # mtime=0 keeps the file (and its sha256) identical for identical content.
+            with gzip.GzipFile(path, "wb", mtime=0) as out:
+                for player in players:
+                    out.write(json.dumps(player, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+
+        _write_atomic(output_path, _write_lines)
+
+    manifest = {
+        "format": "json" if _is_legacy(output_path) else SNAPSHOT_FORMAT,
+        "generated_at": generated_at,
         "source": "wikidata",
-        "players": players,
+        "player_count": len(players),
+        "alias_count": sum(len(p.get("aliases", [])) for p in players),
+        "players_sha256": players_digest.hexdigest(),
+        "file_sha256": _file_sha256(output_path),
     }
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    if diff is not None:
+        manifest["diff"] = diff
+    _write_atomic(
+        manifest_path(output_path),
+        lambda p: p.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"),
+    )
+    return manifest
+
+
+def iter_snapshot_players(path: Path | None = None) -> Iterator[dict]:
+    snapshot_path = resolve_snapshot_path(path)
+    if _is_legacy(snapshot_path):
+        payload = json.loads(snapshot_path.read_text(encoding="utf-8"))
+        yield from payload.get("players", []) if isinstance(payload, dict) else payload
+        return
+    with gzip.open(snapshot_path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_manifest(path: Path | None = None) -> dict | None:
+    snapshot_path = resolve_snapshot_path(path)
+    sidecar = manifest_path(snapshot_path)
+    if sidecar.exists():
+        return json.loads(sidecar.read_text(encoding="utf-8"))
+    if not snapshot_path.exists():
+        return None
+    if _is_legacy(snapshot_path):
+        # Snapshots written before manifests existed carry their header in the document itself.
+        payload = json.loads(snapshot_path.read_text(encoding="utf-8"))
+        players = payload.get("players", [])
+        return {
+            "format": "json",
+            "generated_at": payload.get("generated_at"),
+            "source": payload.get("source"),
+            "player_count": len(players),
+            "alias_count": sum(len(p.get("aliases", [])) for p in players),
+            "diff": payload.get("diff"),
+        }
+    return None
 
 
 def load_snapshot(path: Path | None = None) -> dict:
-    snapshot_path = path or default_snapshot_path()
-    return json.loads(snapshot_path.read_text(encoding="utf-8"))
+    manifest = read_manifest(path) or {}
+    return {
+        "generated_at": manifest.get("generated_at"),
+        "source": manifest.get("source"),
+        "players": list(iter_snapshot_players(path)),
+    }
 
 
 def snapshot_status(path: Path | None = None) -> dict:
-    snapshot_path = path or default_snapshot_path()
-    if not snapshot_path.exists():
+    manifest = read_manifest(path)
+    if manifest is None:
         return {"exists": False, "generated_at": None, "player_count": 0, "alias_count": 0}
-
-    payload = json.loads(snapshot_path.read_text(encoding="utf-8"))
-    players = payload.get("players", [])
-    alias_count = sum(len(p.get("aliases", [])) for p in players)
     return {
         "exists": True,
-        "generated_at": payload.get("generated_at"),
-        "player_count": len(players),
-        "alias_count": alias_count,
+        "generated_at": manifest.get("generated_at"),
+        "player_count": manifest.get("player_count", 0),
+        "alias_count": manifest.get("alias_count", 0),
     }
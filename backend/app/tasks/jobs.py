@@ -1,36 +1,51 @@
-import hashlib
 import logging
 from datetime import datetime, timedelta, timezone
 
 import httpx
 
+from celery.exceptions import SoftTimeLimitExceeded
 from celery.utils.log import get_task_logger
-from sqlalchemy import select
+from praw.models import MoreComments
+from sqlalchemy import Select, delete, select
 
 from app.celery_app import celery_app
 from app.core.config import get_settings
+from app.core.metrics import count, record_matches, stage
 from app.db.session import SessionLocal
-from app.models.entities import Comment, CommentEntity, Player, PlayerAlias, SentimentScore, Source, Thread
-from app.services.aggregation import recompute_day
+from app.models.entities import Comment, CommentEntity, MentionFact, Player, PlayerAlias, SentimentScore, Source, Thread
+from app.services.aggregation import _weight, recompute_day
+from app.services.bodies import store_body
+from app.services.partitions import add_months, apply_retention, default_partition_rows, ensure_partitions
 from app.services.matcher import AliasEntry, PlayerMentionMatcher
+from app.services.live import publish_sentiment_events, sentiment_event
+from app.services.locks import single_flight
+from app.services.ingest_progress import RunProgress, is_transient, record_dead_letter
 from app.services.forum_ingest import (
     ForumRateLimiter,
-    fetch_thread_posts,
     forum_source_name,
+    iterate_archived_threads,
+    iter_thread_pages,
     iterate_recent_threads,
     parse_feed_urls,
 )
+from app.services.raw_archive import ReplayTransport, get_raw_archive, httpx_capture_hook
 from app.services.reddit_client import get_reddit
 from app.services.sentiment import MODEL_NAME, score_text
+from app.services.text import author_hash, reddit_source_name
 from app.services.wikidata.refresh import refresh_players_from_wikidata_sync
 
 logger = get_task_logger(__name__)
 
+# A soft time limit means the run was too slow; retrying it straight away would only hit the limit again.
+RETRY_OPTIONS = {
+    "autoretry_for": (Exception,),
+    "dont_autoretry_for": (SoftTimeLimitExceeded,),
+    "retry_backoff": 5,
+    "retry_kwargs": {"max_retries": 3},
+}
 
-def _author_hash(name: str | None) -> str | None:
-    if not name:
-        return None
-    return hashlib.sha256(name.encode("utf-8")).hexdigest()
+# Roughly how many comments one MoreComments expansion adds.
+COMMENTS_PER_MORE = 100
 
 
 def _get_or_create_source(db, name: str, source_type: str = "reddit") -> Source:
@@ -44,10 +59,255 @@ def _get_or_create_source(db, name: str, source_type: str = "reddit") -> Source:
     return source
 
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5, retry_kwargs={"max_retries": 3})
-def reddit_ingest_task(self, subreddits: list[str] | None = None, limit_posts: int = 20, limit_comments_per_post: int = 100):
+def _player_teams(db) -> dict:
+    return {player_id: team for player_id, team in db.execute(select(Player.id, Player.team)).all()}
+
+
+def _store_mentions(db, comment: Comment, mentions: list[tuple], teams: dict, pipeline: str) -> list[dict]:
+    with stage(pipeline, "sentiment"):
+        sentiment = score_text(comment.body)
+    events = []
+    for player_id, mention_text in mentions:
+        db.add(
+            CommentEntity(
+                comment_id=comment.id,
+                comment_created_utc=comment.created_utc,
+                player_id=player_id,
+                mention_text=mention_text,
+            )
+        )
+        db.add(
+            SentimentScore(
+                comment_id=comment.id,
+                comment_created_utc=comment.created_utc,
+                player_id=player_id,
+                model_name=MODEL_NAME,
+                compound=sentiment["compound"],
+                pos=sentiment["pos"],
+                neu=sentiment["neu"],
+                neg=sentiment["neg"],
+            )
+        )
+        db.add(
+            MentionFact(
+                player_id=player_id,
+                comment_ts=comment.created_utc,
+                source_id=comment.source_id,
+                comment_id=comment.id,
+                score_weight=_weight(comment.score),
+                compound=sentiment["compound"],
+                model_name=MODEL_NAME,
+            )
+        )
+        events.append(sentiment_event(comment.id, comment.created_utc, player_id, teams.get(player_id), sentiment["compound"]))
+    return events
+
+
+def existing_external_ids_stmt(source_id: int, created: dict[str, datetime]) -> Select:
+    """One dedup lookup for a batch; the created_utc range keeps it on the partitions the batch falls into."""
+    return select(Comment.external_id).where(
+        Comment.source_id == source_id,
+        Comment.external_id.in_(list(created)),
+        Comment.created_utc >= min(created.values()),
+        Comment.created_utc <= max(created.values()),
+    )
+
+
+def known_threads_stmt(source_id: int, external_ids: list[str]) -> Select:
+    return select(Thread).where(Thread.source_id == source_id, Thread.external_id.in_(external_ids))
+
+
+def _existing_external_ids(db, source_id: int, created: dict[str, datetime]) -> set[str]:
+    if not created:
+        return set()
+    return set(db.execute(existing_external_ids_stmt(source_id, created)).scalars())
+
+
+def _stored_for_replay(db, source_id: int, replayed: dict[str, tuple[str, datetime]], pipeline: str) -> list[Comment]:
+    """Replay: refresh the stored comments' bodies and clear what was derived from them, so they are matched again.
+
+    `replayed` maps external id to the replayed body and created_utc of comments already in the database.
+    """
+    if not replayed:
+        return []
+    created = [created_utc for _, created_utc in replayed.values()]
+    comments = db.execute(
+        select(Comment).where(
+            Comment.source_id == source_id,
+            Comment.external_id.in_(list(replayed)),
+            Comment.created_utc >= min(created),
+            Comment.created_utc <= max(created),
+        )
+    ).scalars().all()
+    for comment in comments:
+        body = replayed[comment.external_id][0]
+        if body != comment.body:
+            comment.body_hash = store_body(db.connection(), body)
+            comment.body = body
+    ids = [comment.id for comment in comments]
+    in_range = (min(created), max(created))
+    db.execute(delete(CommentEntity).where(CommentEntity.comment_id.in_(ids), CommentEntity.comment_created_utc.between(*in_range)))
+    db.execute(delete(SentimentScore).where(SentimentScore.comment_id.in_(ids), SentimentScore.comment_created_utc.between(*in_range)))
+    db.execute(delete(MentionFact).where(MentionFact.comment_id.in_(ids), MentionFact.comment_ts.between(*in_range)))
+    count(pipeline, "reprocessed", len(comments))
+    return list(comments)
+
+
+def _match_and_store(db, comments: list[Comment], matcher, teams: dict, pipeline: str) -> list[dict]:
+    events = []
+    for comment in comments:
+        with stage(pipeline, "match"):
+            mentions = matcher.find_mentions(comment.body)
+        record_matches(pipeline, len(mentions))
+        if mentions:
+            events.extend(_store_mentions(db, comment, mentions, teams, pipeline))
+            count(pipeline, "mention", len(mentions))
+    return events
+
+
+def _final_attempt(task) -> bool:
+    return task.request.retries >= RETRY_OPTIONS["retry_kwargs"]["max_retries"]
+
+
+def _give_up_on(
+    db, exc: Exception, final_attempt: bool, progress: RunProgress, source_type, source_name, item_type, external_id, url=None
+):
+    """Dead-letter a failed item so the run can move on; transient failures are re-raised for a task retry instead."""
+    db.rollback()
+    if isinstance(exc, SoftTimeLimitExceeded) or (is_transient(exc) and not final_attempt):
+        raise exc
+    record_dead_letter(db, source_type, source_name, item_type, external_id, exc, url=url, task_id=progress.run_id)
+    count(source_type, "dead_letter")
+
+
+def _replace_more_budget(missing: int) -> int:
+    """MoreComments expansions worth spending on `missing` wanted comments that the first page did not carry.
+
+    Each expansion is a rate-limited call returning up to ~100 comments; capped by REDDIT_REPLACE_MORE_MAX.
+    """
+    if missing <= 0:
+        return 0
+    return min(get_settings().reddit_replace_more_max, -(-missing // COMMENTS_PER_MORE))
+
+
+def _loaded_comments(forest) -> list:
+    return [c for c in forest.list() if not isinstance(c, MoreComments)]
+
+
+def _ingest_submission(db, source, thread, sub, num_comments, matcher, teams, limit_comments_per_post, replay):
+    if thread is None:
+        thread = Thread(
+            source_id=source.id,
+            external_id=sub.id,
+            title=sub.title,
+            url=getattr(sub, "url", None),
+            created_at=datetime.utcfromtimestamp(sub.created_utc),
+            fetched_at=datetime.utcnow(),
+        )
+        db.add(thread)
+        db.flush()
+        count("reddit", "thread")
+
+    # Newest first, so the comments added since the last run are the ones on the first page.
+    sub.comment_sort = "new"
+    with stage("reddit", "fetch_comments"):
+        loaded = {c.id: c for c in _loaded_comments(sub.comments)}
+    with stage("reddit", "dedup"):
+        seen = _existing_external_ids(db, source.id, {c.id: datetime.utcfromtimestamp(c.created_utc) for c in loaded.values()})
+
+    # Only expand for new comments we would keep: at most the growth since the last run, within the per-post cap.
+    # A replay re-processes stored comments too, so it wants the whole capped thread.
+    if replay:
+        budget = _replace_more_budget(limit_comments_per_post - len(loaded))
+    else:
+        wanted = min(num_comments - (thread.num_comments or 0), limit_comments_per_post)
+        budget = _replace_more_budget(wanted - (len(loaded) - len(seen)))
+    if budget:
+        with stage("reddit", "fetch_comments"):
+            sub.comments.replace_more(limit=budget)
+            expanded = [c for c in _loaded_comments(sub.comments) if c.id not in loaded]
+        with stage("reddit", "dedup"):
+            seen |= _existing_external_ids(db, source.id, {c.id: datetime.utcfromtimestamp(c.created_utc) for c in expanded})
+        loaded.update((c.id, c) for c in expanded)
+    count("reddit", "duplicate", len(seen))
+    kept = loaded.values() if replay else [c for c in loaded.values() if c.id not in seen]
+    comments = sorted(kept, key=lambda c: c.created_utc, reverse=True)[:limit_comments_per_post]
+    created = {c.id: datetime.utcfromtimestamp(c.created_utc) for c in comments}
+
+    reprocessed = _stored_for_replay(db, source.id, {c.id: (c.body or "", created[c.id]) for c in comments if c.id in seen}, "reddit")
+    stored = []
+    for c in comments:
+        if c.id in seen:
+            continue
+        comment = Comment(
+            source_id=source.id,
+            thread_id=thread.id,
+            external_id=c.id,
+            parent_external_id=getattr(c, "parent_id", None),
+            author_hash=author_hash(str(c.author) if c.author else None),
+            body=c.body or "",
+            created_utc=created[c.id],
+            score=int(getattr(c, "score", 0) or 0),
+            url=f"https://reddit.com{getattr(c, 'permalink', '')}",
+            fetched_at=datetime.utcnow(),
+        )
+        db.add(comment)
+        stored.append(comment)
+    db.flush()
+
+    events = _match_and_store(db, reprocessed + stored, matcher, teams, "reddit")
+    # The count is saved with the comments, so a run that dies mid-submission re-expands it next time.
+    thread.num_comments = num_comments
+    thread.fetched_at = datetime.utcnow()
+    with stage("reddit", "db_commit"):
+        db.commit()
+    count("reddit", "comment", len(stored))
+    if not replay:
+        publish_sentiment_events(events)
+
+
+def _ingest_subreddit(
+    db, reddit, matcher, teams, subreddit_name, limit_posts, limit_comments_per_post, replay, lock, progress, final_attempt
+):
+    source = _get_or_create_source(db, reddit_source_name(subreddit_name))
+    submissions = list(reddit.subreddit(subreddit_name).new(limit=limit_posts))
+    threads = {
+        thread.external_id: thread
+        for thread in db.execute(known_threads_stmt(source.id, [sub.id for sub in submissions])).scalars()
+    }
+    for sub in submissions:
+        if lock.lost.is_set():
+            logger.warning("Lost the %s lock; leaving the rest of r/%s to the next run", lock.name, subreddit_name)
+            return
+        if progress.is_done("reddit", subreddit_name, sub.id):
+            continue
+        # num_comments comes with the listing, so an unchanged submission costs neither a fetch nor a lookup.
+        num_comments = int(getattr(sub, "num_comments", 0) or 0)
+        thread = threads.get(sub.id)
+        if not replay and thread is not None and thread.num_comments is not None and num_comments <= thread.num_comments:
+            count("reddit", "unchanged_thread")
+            continue
+        progress.start(subreddit_name, sub.id)
+        try:
+            _ingest_submission(db, source, thread, sub, num_comments, matcher, teams, limit_comments_per_post, replay)
+        except Exception as exc:
+            _give_up_on(
+                db, exc, final_attempt, progress, "reddit", subreddit_name, "submission", sub.id,
+                url=f"https://reddit.com{getattr(sub, 'permalink', '')}",
+            )
+        progress.mark_done("reddit", subreddit_name, sub.id)
+
+
+@celery_app.task(bind=True, **RETRY_OPTIONS)
+def reddit_ingest_task(
+    self, subreddits: list[str] | None = None, limit_posts: int = 20, limit_comments_per_post: int = 100, replay: bool = False
+):
     settings = get_settings()
     subreddit_list = subreddits or [s.strip() for s in settings.ingest_subreddits.split(",") if s.strip()]
+    # A retry keeps the task id, so it picks up where the failed attempt stopped.
+    progress = RunProgress(self.request.id).load()
+    final_attempt = _final_attempt(self)
+    pending = [name for name in subreddit_list if not progress.is_done("reddit", name)]
 
     db = SessionLocal()
     aliases = db.execute(select(PlayerAlias)).scalars().all()
@@ -55,70 +315,39 @@ def reddit_ingest_task(self, subreddits: list[str] | None = None, limit_posts: i
         aliases=[AliasEntry(player_id=a.player_id, alias_text=a.alias_text, normalized_alias=a.normalized_alias) for a in aliases],
         denylist=set([w.strip() for w in settings.match_denylist.split(",") if w.strip()]),
     )
+    teams = _player_teams(db)
 
-    reddit, limiter = get_reddit()
+    reddit, limiter = get_reddit(replay=replay)
 
-    for subreddit_name in subreddit_list:
-        source = _get_or_create_source(db, subreddit_name)
-        limiter.wait()
-        for sub in reddit.subreddit(subreddit_name).new(limit=limit_posts):
-            thread = db.execute(select(Thread).where(Thread.source_id == source.id, Thread.external_id == sub.id)).scalar_one_or_none()
-            if not thread:
-                thread = Thread(
-                    source_id=source.id,
-                    external_id=sub.id,
-                    title=sub.title,
-                    url=getattr(sub, "url", None),
-                    created_at=datetime.utcfromtimestamp(sub.created_utc),
-                    fetched_at=datetime.utcnow(),
-                )
-                db.add(thread)
-                db.commit()
-                db.refresh(thread)
-
-            sub.comments.replace_more(limit=0)
-            for c in sub.comments.list()[:limit_comments_per_post]:
-                existing = db.execute(select(Comment).where(Comment.source_id == source.id, Comment.external_id == c.id)).scalar_one_or_none()
-                if existing:
-                    continue
-                body = c.body or ""
-                comment = Comment(
-                    source_id=source.id,
-                    thread_id=thread.id,
-                    external_id=c.id,
-                    parent_external_id=getattr(c, "parent_id", None),
-                    author_hash=_author_hash(str(c.author) if c.author else None),
-                    body=body,
-                    created_utc=datetime.utcfromtimestamp(c.created_utc),
-                    score=int(getattr(c, "score", 0) or 0),
-                    url=f"https://reddit.com{getattr(c, 'permalink', '')}",
-                    fetched_at=datetime.utcnow(),
-                )
-                db.add(comment)
-                db.commit()
-                db.refresh(comment)
-
-                mentions = matcher.find_mentions(body)
-                if not mentions:
-                    continue
-                sentiment = score_text(body)
-                for player_id, mention_text in mentions:
-                    db.add(CommentEntity(comment_id=comment.id, player_id=player_id, mention_text=mention_text))
-                    db.add(
-                        SentimentScore(
-                            comment_id=comment.id,
-                            player_id=player_id,
-                            model_name=MODEL_NAME,
-                            compound=sentiment["compound"],
-                            pos=sentiment["pos"],
-                            neu=sentiment["neu"],
-                            neg=sentiment["neg"],
-                        )
+    # One lock per subreddit: an overlapping run skips the subreddits a slower run is still working through.
+    skipped = []
+    deferred = []
+    for index, subreddit_name in enumerate(pending):
+        delay = limiter.wait_time()
+        if delay > settings.rate_limit_defer_seconds:
+            # The shared Reddit budget is spent for a while; hand the rest to a later run instead of sleeping.
+            deferred = pending[index:]
+            reddit_ingest_task.apply_async(args=(deferred, limit_posts, limit_comments_per_post, replay), countdown=delay)
+            break
+        with single_flight(f"ingest:reddit:{reddit_source_name(subreddit_name)}") as lock:
+            if not lock.acquired:
+                skipped.append(subreddit_name)
+                continue
+            progress.start(subreddit_name)
+            with stage("reddit", "total"):
+                try:
+                    _ingest_subreddit(
+                        db, reddit, matcher, teams, subreddit_name, limit_posts, limit_comments_per_post, replay, lock,
+                        progress, final_attempt,
                     )
-                db.commit()
+                except Exception as exc:
+                    _give_up_on(db, exc, final_attempt, progress, "reddit", subreddit_name, "subreddit", subreddit_name)
+            if not lock.lost.is_set():
+                progress.mark_done("reddit", subreddit_name)
 
     db.close()
-    return {"status": "ok", "subreddits": subreddit_list}
+    progress.clear()
+    return {"status": "ok", "subreddits": subreddit_list, "skipped": skipped, "deferred": deferred, "replay": replay}
 
 
 def _load_aliases(db, scope: str) -> list[PlayerAlias]:
@@ -129,15 +358,118 @@ def _load_aliases(db, scope: str) -> list[PlayerAlias]:
     return db.execute(select(PlayerAlias)).scalars().all()
 
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5, retry_kwargs={"max_retries": 3})
-def forum_ingest_task(self):
+def _ingest_forum_thread(db, client, limiter, matcher, teams, source, thread, cutoff, replay, progress):
+    thread_row = db.execute(
+        select(Thread).where(Thread.source_id == source.id, Thread.external_id == thread.external_id)
+    ).scalar_one_or_none()
+    if not thread_row:
+        thread_row = Thread(
+            source_id=source.id,
+            external_id=thread.external_id,
+            title=thread.title,
+            url=thread.url,
+            created_at=thread.created_at.replace(tzinfo=None),
+            fetched_at=datetime.utcnow(),
+        )
+        db.add(thread_row)
+        db.commit()
+        db.refresh(thread_row)
+        count("forum", "thread")
+    else:
+        thread_row.fetched_at = datetime.utcnow()
+        db.commit()
+
+    pages = iter_thread_pages(
+        client, limiter, thread, cutoff, max_pages=10, skip_pages=progress.pages_done(source.name, thread.external_id)
+    )
+    try:
+        for page, posts in pages:
+            created = {post.external_id: post.created_at.replace(tzinfo=None) for post in posts}
+            with stage("forum", "dedup"):
+                seen = _existing_external_ids(db, source.id, created)
+            count("forum", "duplicate", len(seen))
+            reprocessed = []
+            if replay:
+                replayed = {p.external_id: (p.body or "", created[p.external_id]) for p in posts if p.external_id in seen}
+                reprocessed = _stored_for_replay(db, source.id, replayed, "forum")
+            stored = []
+            for post in posts:
+                if post.external_id in seen:
+                    continue
+                seen.add(post.external_id)
+                comment = Comment(
+                    source_id=source.id,
+                    thread_id=thread_row.id,
+                    external_id=post.external_id,
+                    parent_external_id=None,
+                    author_hash=author_hash(post.author),
+                    body=post.body or "",
+                    created_utc=created[post.external_id],
+                    score=int(post.score or 0),
+                    url=post.url,
+                    fetched_at=datetime.utcnow(),
+                )
+                db.add(comment)
+                stored.append(comment)
+            db.flush()
+            events = _match_and_store(db, reprocessed + stored, matcher, teams, "forum")
+            with stage("forum", "db_commit"):
+                db.commit()
+            count("forum", "comment", len(stored))
+            # Marked only once the page is committed: a retry refetches at most the page it died on.
+            progress.mark_page(source.name, thread.external_id, page)
+            if not replay:
+                publish_sentiment_events(events)
+    except httpx.HTTPStatusError:
+        if not replay:
+            raise
+        db.rollback()
+        logger.warning("Thread %s is not fully archived; skipping", thread.url)
+
+
+def _ingest_feed(db, client, limiter, matcher, teams, feed_url, cutoff, replay, archive, lock, progress, final_attempt):
+    source = _get_or_create_source(db, forum_source_name(feed_url), source_type="forum")
+    if replay:
+        threads = iterate_archived_threads(archive, feed_url, cutoff)
+    else:
+        threads = iterate_recent_threads(client, limiter, feed_url, cutoff)
+    for thread in threads:
+        if lock.lost.is_set():
+            logger.warning("Lost the %s lock; leaving the rest of %s to the next run", lock.name, feed_url)
+            return
+        if progress.is_done("forum", source.name, thread.external_id):
+            continue
+        progress.start(source.name, thread.external_id)
+        try:
+            _ingest_forum_thread(db, client, limiter, matcher, teams, source, thread, cutoff, replay, progress)
+        except Exception as exc:
+            _give_up_on(db, exc, final_attempt, progress, "forum", source.name, "thread", thread.external_id, url=thread.url)
+        progress.mark_done("forum", source.name, thread.external_id)
+
+
+@celery_app.task(bind=True, **RETRY_OPTIONS)
+def forum_ingest_task(self, replay: bool = False, replay_since: str | None = None, feeds: list[str] | None = None):
     settings = get_settings()
-    if not settings.forum_ingest_enabled:
+    if not settings.forum_ingest_enabled and not replay:
         return {"status": "skipped", "reason": "forum ingestion disabled"}
 
     cutoff = datetime.now(timezone.utc) - timedelta(days=settings.forum_backfill_days)
-    feed_urls = parse_feed_urls(settings.forum_rss_urls)
+    feed_urls = feeds or parse_feed_urls(settings.forum_rss_urls)
+    progress = RunProgress(self.request.id).load()
+    final_attempt = _final_attempt(self)
+    pending = [url for url in feed_urls if not progress.is_done("forum", url)]
     limiter = ForumRateLimiter(min_interval_seconds=settings.forum_rate_limit_seconds)
+    client_kwargs = {}
+    archive = None
+    if replay:
+        # Re-parse archived payloads instead of crawling: no network, no rate limit.
+        archive = get_raw_archive()
+        since = datetime.fromisoformat(replay_since) if replay_since else datetime.min
+        cutoff = since.replace(tzinfo=timezone.utc)
+        limiter = ForumRateLimiter(min_interval_seconds=0.0)
+        client_kwargs["transport"] = ReplayTransport(archive, "forum")
+    elif settings.raw_capture_enabled:
+        client_kwargs["event_hooks"] = {"response": [httpx_capture_hook(get_raw_archive(), "forum")]}
 
     db = SessionLocal()
     aliases = _load_aliases(db, settings.forum_player_scope)
@@ -145,90 +477,79 @@ def forum_ingest_task(self):
         aliases=[AliasEntry(player_id=a.player_id, alias_text=a.alias_text, normalized_alias=a.normalized_alias) for a in aliases],
         denylist=set([w.strip() for w in settings.match_denylist.split(",") if w.strip()]),
     )
+    teams = _player_teams(db)
 
     headers = {"User-Agent": f"{settings.reddit_user_agent} (forum-ingest)"}
-    with httpx.Client(headers=headers, timeout=30) as client:
-        for feed_url in feed_urls:
-            source = _get_or_create_source(db, forum_source_name(feed_url), source_type="forum")
-            for thread in iterate_recent_threads(client, limiter, feed_url, cutoff):
-                thread_row = db.execute(
-                    select(Thread).where(Thread.source_id == source.id, Thread.external_id == thread.external_id)
-                ).scalar_one_or_none()
-                if not thread_row:
-                    thread_row = Thread(
-                        source_id=source.id,
-                        external_id=thread.external_id,
-                        title=thread.title,
-                        url=thread.url,
-                        created_at=thread.created_at.replace(tzinfo=None),
-                        fetched_at=datetime.utcnow(),
-                    )
-                    db.add(thread_row)
-                    db.commit()
-                    db.refresh(thread_row)
-                else:
-                    thread_row.fetched_at = datetime.utcnow()
-                    db.commit()
-
-                posts = fetch_thread_posts(client, limiter, thread, cutoff, max_pages=10)
-                for post in posts:
-                    existing = db.execute(
-                        select(Comment).where(Comment.source_id == source.id, Comment.external_id == post.external_id)
-                    ).scalar_one_or_none()
-                    if existing:
-                        continue
-                    body = post.body or ""
-                    comment = Comment(
-                        source_id=source.id,
-                        thread_id=thread_row.id,
-                        external_id=post.external_id,
-                        parent_external_id=None,
-                        author_hash=_author_hash(post.author),
-                        body=body,
-                        created_utc=post.created_at.replace(tzinfo=None),
-                        score=int(post.score or 0),
-                        url=post.url,
-                        fetched_at=datetime.utcnow(),
-                    )
-                    db.add(comment)
-                    db.commit()
-                    db.refresh(comment)
-
-                    mentions = matcher.find_mentions(body)
-                    if not mentions:
-                        continue
-                    sentiment = score_text(body)
-                    for player_id, mention_text in mentions:
-                        db.add(CommentEntity(comment_id=comment.id, player_id=player_id, mention_text=mention_text))
-                        db.add(
-                            SentimentScore(
-                                comment_id=comment.id,
-                                player_id=player_id,
-                                model_name=MODEL_NAME,
-                                compound=sentiment["compound"],
-                                pos=sentiment["pos"],
-                                neu=sentiment["neu"],
-                                neg=sentiment["neg"],
-                            )
+    skipped = []
+    deferred = []
+    with httpx.Client(headers=headers, timeout=30, **client_kwargs) as client:
+        for index, feed_url in enumerate(pending):
+            delay = limiter.wait_time(feed_url)
+            if delay > settings.rate_limit_defer_seconds:
+                deferred = pending[index:]
+                forum_ingest_task.apply_async(args=(replay, replay_since, deferred), countdown=delay)
+                break
+            with single_flight(f"ingest:forum:{forum_source_name(feed_url)}") as lock:
+                if not lock.acquired:
+                    skipped.append(feed_url)
+                    continue
+                progress.start(forum_source_name(feed_url))
+                with stage("forum", "total"):
+                    try:
+                        _ingest_feed(
+                            db, client, limiter, matcher, teams, feed_url, cutoff, replay, archive, lock,
+                            progress, final_attempt,
                         )
-                    db.commit()
+                    except Exception as exc:
+                        _give_up_on(
+                            db, exc, final_attempt, progress, "forum", forum_source_name(feed_url), "feed", feed_url,
+                            url=feed_url,
+                        )
+                if not lock.lost.is_set():
+                    progress.mark_done("forum", feed_url)
 
     db.close()
-    return {"status": "ok", "feeds": feed_urls}
+    progress.clear()
+    return {"status": "ok", "feeds": feed_urls, "skipped": skipped, "deferred": deferred, "replay": replay}
 
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5, retry_kwargs={"max_retries": 3})
+@celery_app.task(bind=True, **RETRY_OPTIONS)
 def aggregate_daily_task(self, day: str = "yesterday"):
     target = datetime.utcnow().date()
     if day == "yesterday":
         target = target - timedelta(days=1)
-    db = SessionLocal()
-    recompute_day(db, target)
-    db.close()
+    with single_flight(f"aggregate:{target}") as lock:
+        if not lock.acquired:
+            return {"status": "skipped", "reason": "already running", "date": str(target)}
+        db = SessionLocal()
+        recompute_day(db, target)
+        db.close()
     return {"status": "ok", "date": str(target)}
 
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5, retry_kwargs={"max_retries": 3})
+@celery_app.task(bind=True, **RETRY_OPTIONS)
 def refresh_players_from_wikidata(self):
-    result = refresh_players_from_wikidata_sync()
+    with single_flight("wikidata:refresh", ttl_seconds=600) as lock:
+        if not lock.acquired:
+            return {"status": "skipped", "reason": "already running"}
+        result = refresh_players_from_wikidata_sync()
     return {"status": "ok", **result}
+
+
+@celery_app.task(bind=True, **RETRY_OPTIONS)
+def maintain_partitions_task(self):
+    settings = get_settings()
+    now = datetime.utcnow()
+    with single_flight("partitions:maintain") as lock:
+        if not lock.acquired:
+            return {"status": "skipped", "reason": "already running"}
+        db = SessionLocal()
+        try:
+            created = ensure_partitions(db, now, datetime.combine(add_months(now.date(), settings.partition_months_ahead), datetime.min.time()))
+            retention = apply_retention(db, settings.partition_retention_months, drop=settings.partition_retention_drop)
+            in_default = {table: rows for table, rows in default_partition_rows(db).items() if rows}
+        finally:
+            db.close()
+    if in_default:
+        logger.warning("Rows outside the monthly partitions, in the default partitions: %s", in_default)
+    return {"status": "ok", "partitions_created": created, "default_partition_rows": in_default, **retention}
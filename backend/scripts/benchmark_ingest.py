@@ -0,0 +1,379 @@
+import argparse
+import json
+import os
+import random
+import resource
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+POSTS_PER_PAGE = 20
+FILLER = (
+    "tonight the rotation defense spacing bench pace rebound shot clock fourth quarter road trip minutes "
+    "switch drop coverage transition corner three paint timeout starters closing lineup"
+).split()
+OPINIONS = ["was great", "looked lost", "was electric", "played terrible", "is underrated", "keeps improving", "was awful"]
+
+
+@dataclass
+class Corpus:
+    subreddit: str
+    forum_slug: str
+    submissions: list[dict] = field(default_factory=list)
+    comments: dict[str, list[dict]] = field(default_factory=dict)
+    threads: list[dict] = field(default_factory=list)
+    posts: dict[int, list[dict]] = field(default_factory=dict)
+
+
+def _base36(value: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while value:
+        value, rem = divmod(value, 36)
+        out = digits[rem] + out
+    return out or "0"
+
+
+def _body(rng: random.Random, names: list[str], mention_rate: float) -> str:
+    words = rng.sample(FILLER, 8)
+    if names and rng.random() < mention_rate:
+        words.insert(rng.randrange(len(words)), f"{rng.choice(names)} {rng.choice(OPINIONS)}")
+    return " ".join(words)
+
+
+def generate_corpus(
+    tag: str,
+    names: list[str],
+    submissions: int,
+    comments_per_submission: int,
+    threads: int,
+    posts_per_thread: int,
+    mention_rate: float,
+    seed: int,
+) -> Corpus:
+    """Deterministic Reddit submissions/comments and forum threads/posts from the last two days."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    corpus = Corpus(subreddit=f"bench_{tag}", forum_slug=f"bench-{tag}.1")
+    next_id = 36**5
+    for _ in range(submissions):
+        created = now - timedelta(seconds=rng.randrange(1, 2 * 86400))
+        sub_id = _base36(next_id)
+        next_id += 1
+        comments = []
+        for index in range(comments_per_submission):
+            comment_id = _base36(next_id)
+            next_id += 1
+            comments.append(
+                {
+                    "id": comment_id,
+                    "name": f"t1_{comment_id}",
+                    "parent_id": f"t3_{sub_id}",
+                    "link_id": f"t3_{sub_id}",
+                    "subreddit": corpus.subreddit,
+                    "author": f"fan{rng.randrange(500)}",
+                    "body": _body(rng, names, mention_rate),
+                    "created_utc": created.timestamp() + index * 7,
+                    "score": rng.randrange(-5, 50),
+                    "permalink": f"/r/{corpus.subreddit}/comments/{sub_id}/_/{comment_id}/",
+                    "replies": "",
+                }
+            )
+        corpus.comments[sub_id] = comments
+        corpus.submissions.append(
+            {
+                "id": sub_id,
+                "name": f"t3_{sub_id}",
+                "title": f"Game thread {sub_id}",
+                "url": f"https://reddit.test/r/{corpus.subreddit}/comments/{sub_id}/",
+                "permalink": f"/r/{corpus.subreddit}/comments/{sub_id}/",
+                "subreddit": corpus.subreddit,
+                "author": "benchbot",
+                "created_utc": created.timestamp(),
+                "num_comments": len(comments),
+            }
+        )
+    corpus.submissions.sort(key=lambda s: s["created_utc"], reverse=True)
+
+    post_id = 1
+    for thread_id in range(1, threads + 1):
+        created = now - timedelta(seconds=rng.randrange(3600, 2 * 86400))
+        posts = []
+        for index in range(posts_per_thread):
+            posts.append(
+                {
+                    "id": post_id,
+                    "author": f"member{rng.randrange(500)}",
+                    "created_at": created + timedelta(seconds=index * 30),
+                    "body": _body(rng, names, mention_rate),
+                    "score": rng.randrange(0, 20),
+                }
+            )
+            post_id += 1
+        corpus.posts[thread_id] = posts
+        corpus.threads.append({"id": thread_id, "title": f"Bench thread {thread_id}", "created_at": created})
+    return corpus
+
+
+class _CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.corpus: Corpus | None = None
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _CountingServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class ForumHandler(_Handler):
+    """XenForo-style RSS feed plus paginated thread pages (20 posts per page)."""
+
+    def do_GET(self) -> None:
+        self.server.count()
+        corpus = self.server.corpus
+        path = urlparse(self.path).path
+        if path == f"/forums/{corpus.forum_slug}/index.rss":
+            return self._send(200, self._rss(corpus), "application/rss+xml")
+        parts = [p for p in path.split("/") if p]
+        if len(parts) >= 2 and parts[0] == "threads":
+            thread_id = int(parts[1].rsplit(".", 1)[-1])
+            page = int(parts[2].removeprefix("page-")) if len(parts) > 2 else 1
+            if thread_id in corpus.posts:
+                return self._send(200, self._page(corpus.posts[thread_id], page), "text/html; charset=utf-8")
+        self._send(404, "not found", "text/plain")
+
+    def _thread_url(self, thread_id: int) -> str:
+        return f"{self.server.base_url}/threads/bench-thread.{thread_id}/"
+
+    def _rss(self, corpus: Corpus) -> str:
+        items = "".join(
+            f"<item><title>{escape(t['title'])}</title><link>{self._thread_url(t['id'])}</link>"
+            f"<pubDate>{format_datetime(t['created_at'])}</pubDate></item>"
+            for t in corpus.threads
+        )
+        return f"<?xml version='1.0'?><rss version='2.0'><channel><title>bench</title>{items}</channel></rss>"
+
+    def _page(self, posts: list[dict], page: int) -> str:
+        last_page = max(1, -(-len(posts) // POSTS_PER_PAGE))
+        nav = "".join(f"<li class='pageNav-page'><a>{n}</a></li>" for n in range(1, last_page + 1))
+        articles = "".join(
+            f"<article class='message' id='post-{p['id']}'><div class='message-name'><a>{p['author']}</a></div>"
+            f"<time datetime='{p['created_at'].isoformat()}'></time><div data-score='{p['score']}'></div>"
+            f"<div class='message-body'><div class='bbWrapper'>{escape(p['body'])}</div></div></article>"
+            for p in posts[(page - 1) * POSTS_PER_PAGE : page * POSTS_PER_PAGE]
+        )
+        return f"<html><body><ul class='pageNav-main'>{nav}</ul>{articles}</body></html>"
+
+
+class RedditHandler(_Handler):
+    """Just enough of the Reddit OAuth API for PRAW: token exchange, /r/<sub>/new and /comments/<id>/."""
+
+    def do_POST(self) -> None:
+        self.server.count()
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if urlparse(self.path).path == "/api/v1/access_token":
+            token = {"access_token": "bench", "token_type": "bearer", "expires_in": 86400, "scope": "*"}
+            return self._send(200, json.dumps(token), "application/json")
+        self._send(404, "{}", "application/json")
+
+    def do_GET(self) -> None:
+        self.server.count()
+        corpus = self.server.corpus
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["r", corpus.subreddit, "new"]:
+            return self._send(200, json.dumps(self._new(corpus, query)), "application/json")
+        if len(parts) >= 2 and parts[0] == "comments" and parts[1] in corpus.comments:
+            submission = next(s for s in corpus.submissions if s["id"] == parts[1])
+            payload = [_listing("t3", [submission]), _listing("t1", corpus.comments[parts[1]])]
+            return self._send(200, json.dumps(payload), "application/json")
+        self._send(404, "{}", "application/json")
+
+    def _new(self, corpus: Corpus, query: dict) -> dict:
+        limit = int(query.get("limit", ["25"])[0])
+        after = query.get("after", [None])[0]
+        start = 0
+        if after:
+            start = next(i for i, s in enumerate(corpus.submissions) if s["name"] == after) + 1
+        page = corpus.submissions[start : start + limit]
+        more = start + limit < len(corpus.submissions)
+        return _listing("t3", page, after=page[-1]["name"] if page and more else None)
+
+
+def _listing(kind: str, items: list[dict], after: str | None = None) -> dict:
+    return {"kind": "Listing", "data": {"after": after, "before": None, "children": [{"kind": kind, "data": i} for i in items]}}
+
+
+def _start(handler) -> _CountingServer:
+    server = _CountingServer(handler)
+    threading.Thread(target=server.serve_forever, name=f"bench-{handler.__name__}", daemon=True).start()
+    return server
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run forum_ingest_task and reddit_ingest_task end-to-end against local fake forum/Reddit servers."
+    )
+    parser.add_argument("--database-url", default=None, help="Postgres URL (defaults to DATABASE_URL); use a scratch database")
+    parser.add_argument("--submissions", type=int, default=50, help="Reddit submissions in the corpus")
+    parser.add_argument("--comments-per-submission", type=int, default=100, help="Comments per submission")
+    parser.add_argument("--threads", type=int, default=50, help="Forum threads in the corpus")
+    parser.add_argument("--posts-per-thread", type=int, default=100, help="Posts per forum thread (20 per page)")
+    parser.add_argument("--mention-rate", type=float, default=0.3, help="Share of comments that mention a player")
+    parser.add_argument("--passes", type=int, default=2, help="Runs per source; later passes measure the unchanged-corpus path")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus random seed")
+    parser.add_argument("--only", choices=["forum", "reddit"], default=None, help="Benchmark one source only")
+    args = parser.parse_args()
+
+    forum_server = _start(ForumHandler)
+    reddit_server = _start(RedditHandler)
+    tag = _base36(int(time.time()))
+    forum_slug = f"bench-{tag}.1"
+    # Settings and the engine are built on first import, so the overrides go in before any app module loads.
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.update(
+        {
+            "REDDIT_OAUTH_URL": reddit_server.base_url,
+            "REDDIT_URL": reddit_server.base_url,
+            "REDDIT_CLIENT_ID": "bench",
+            "REDDIT_CLIENT_SECRET": "bench",
+            "REDDIT_RATE_LIMIT_SECONDS": "0",
+            "FORUM_RSS_URLS": f"{forum_server.base_url}/forums/{forum_slug}/index.rss",
+            "FORUM_RATE_LIMIT_SECONDS": "0",
+            "FORUM_INGEST_ENABLED": "true",
+            "FORUM_PLAYER_SCOPE": "all",
+            "RAW_CAPTURE_ENABLED": "false",
+            # PRAW otherwise asks PyPI for a newer release on the first Reddit instance.
+            "praw_check_for_updates": "false",
+        }
+    )
+
+    from sqlalchemy import event, func, select
+
+    from app.db.session import SessionLocal, engine
+    from app.models.entities import Comment, MentionFact, PlayerAlias, Source
+    from app.services.partitions import ensure_partitions
+    from app.tasks.jobs import forum_ingest_task, reddit_ingest_task
+
+    if engine.dialect.name != "postgresql":
+        parser.error("the benchmark needs Postgres (partitioned comments, ON CONFLICT upserts)")
+    with SessionLocal() as db:
+        names = list(db.execute(select(PlayerAlias.alias_text).limit(200)).scalars())
+        now = datetime.utcnow()
+        ensure_partitions(db, now - timedelta(days=3), now + timedelta(days=1))
+    if not names:
+        print("No player aliases in the database; seed players first so comments produce mentions.")
+
+    corpus = generate_corpus(
+        tag, names, args.submissions, args.comments_per_submission, args.threads, args.posts_per_thread, args.mention_rate, args.seed
+    )
+    assert corpus.forum_slug == forum_slug
+    forum_server.corpus = reddit_server.corpus = corpus
+
+    queries = 0
+
+    def _count_query(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, "before_cursor_execute", _count_query)
+
+    def _totals(source_name: str) -> tuple[int, int]:
+        with SessionLocal() as db:
+            source_id = db.execute(select(Source.id).where(Source.name == source_name)).scalar_one_or_none()
+            if source_id is None:
+                return 0, 0
+            comments = db.execute(select(func.count()).select_from(Comment).where(Comment.source_id == source_id)).scalar_one()
+            mentions = db.execute(
+                select(func.count()).select_from(MentionFact).where(MentionFact.source_id == source_id)
+            ).scalar_one()
+        return comments, mentions
+
+    runs = {
+        "forum": (
+            f"clutchfans-{forum_slug}",
+            forum_server,
+            lambda: forum_ingest_task.apply(throw=True),
+        ),
+        "reddit": (
+            corpus.subreddit,
+            reddit_server,
+            lambda: reddit_ingest_task.apply(
+                kwargs={
+                    "subreddits": [corpus.subreddit],
+                    "limit_posts": args.submissions,
+                    "limit_comments_per_post": args.comments_per_submission,
+                },
+                throw=True,
+            ),
+        ),
+    }
+    for name, (source_name, server, run) in runs.items():
+        if args.only and name != args.only:
+            continue
+        for number in range(1, args.passes + 1):
+            comments_before, mentions_before = _totals(source_name)
+            requests_before, queries_before = server.requests, queries
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            pass_queries = queries - queries_before
+            comments_after, mentions_after = _totals(source_name)
+            stored = comments_after - comments_before
+            print(
+                {
+                    "source": name,
+                    "pass": number,
+                    "comments": stored,
+                    "mentions": mentions_after - mentions_before,
+                    "seconds": round(elapsed, 2),
+                    "comments_per_s": round(stored / elapsed, 1) if elapsed else None,
+                    "queries": pass_queries,
+                    "queries_per_comment": round(pass_queries / stored, 2) if stored else None,
+                    "http_requests": server.requests - requests_before,
+                    "peak_rss_mb": _peak_rss_mb(),
+                }
+            )
+
+    forum_server.shutdown()
+    reddit_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
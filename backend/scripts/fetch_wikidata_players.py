@@ -2,8 +2,9 @@ import argparse
 from datetime import datetime, timezone
 from pathlib import Path
 
+from app.services.wikidata.client import WIKIDATA_ENDPOINT
 from app.services.wikidata.fetch import fetch_players
-from app.services.wikidata.snapshot import write_snapshot
+from app.services.wikidata.snapshot import default_snapshot_path, write_snapshot
 
 # Repo inspection (Feb 8, 2026): player seed data comes from backend/data/players_seed.json
 # via app.scripts.seed_players, Player/PlayerAlias models live in app/models/entities.py,
@@ -13,19 +14,33 @@ from app.services.wikidata.snapshot import write_snapshot
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Fetch NBA players from Wikidata and write a snapshot JSON.")
-    parser.add_argument("--output", default=None, help="Output path for snapshot JSON")
-    parser.add_argument("--limit", type=int, default=500, help="Rows per batch")
-    parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to sleep between batches")
+    parser = argparse.ArgumentParser(description="Fetch NBA players from Wikidata and write a snapshot.")
+    parser.add_argument("--output", default=None, help="Output path (.ndjson.gz, or .json for the legacy format)")
+    parser.add_argument("--limit", type=int, default=500, help="Players per keyset page")
+    parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to sleep between pages of one team")
+    parser.add_argument("--concurrency", type=int, default=4, help="Teams fetched in parallel")
+    parser.add_argument("--endpoint", default=WIKIDATA_ENDPOINT, help="SPARQL endpoint URL")
+    parser.add_argument("--offline", action="store_true", help="Serve every query from the SPARQL cache, never the network")
     parser.add_argument("--max-rows", type=int, default=None, help="Stop after fetching this many rows")
     parser.add_argument("--denylist", default=None, help="Alias denylist path")
     args = parser.parse_args()
+    if args.max_rows and not args.output:
+        # A truncated fetch must not replace the baseline snapshot that refreshes diff against.
+        parser.error("--max-rows needs an explicit --output")
 
     base_dir = Path(__file__).resolve().parents[1]
-    output_path = Path(args.output) if args.output else base_dir / "data" / "wikidata_players_snapshot.json"
+    output_path = Path(args.output) if args.output else default_snapshot_path()
     denylist_path = Path(args.denylist) if args.denylist else base_dir / "data" / "alias_denylist.txt"
 
-    players = fetch_players(limit=args.limit, sleep_s=args.sleep, max_rows=args.max_rows, denylist_path=denylist_path)
+    players = fetch_players(
+        limit=args.limit,
+        sleep_s=args.sleep,
+        max_rows=args.max_rows,
+        denylist_path=denylist_path,
+        concurrency=args.concurrency,
+        endpoint=args.endpoint,
+        offline=args.offline or None,
+    )
 
     write_snapshot(players, output_path)
     print(f"Wrote {len(players)} players to {output_path} at {datetime.now(timezone.utc).isoformat()}")
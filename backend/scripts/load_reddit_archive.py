@@ -0,0 +1,95 @@
+import argparse
+import logging
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.entities import PlayerAlias
+from app.services.aggregation import recompute_day
+from app.services.archive_loader import LoadStats, ParsedChunk, iter_parsed_chunks, merge_batch
+from app.services.matcher import AliasEntry
+from app.services.text import reddit_source_name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load zstd NDJSON Reddit archive dumps (submissions and comments).")
+    parser.add_argument("paths", nargs="+", help="Archive files (.zst or plain NDJSON); submissions first keeps thread titles")
+    parser.add_argument("--subreddits", default="", help="Comma-separated subreddits to keep (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Matching/scoring worker processes")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Lines per worker chunk")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Comments per COPY + merge transaction")
+    parser.add_argument("--database-url", default=None, help="Defaults to DATABASE_URL from settings")
+    parser.add_argument("--recompute", action="store_true", help="Recompute daily metrics for the loaded date range")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    settings = get_settings()
+    with SessionLocal() as db:
+        aliases = [
+            AliasEntry(player_id=a.player_id, alias_text=a.alias_text, normalized_alias=a.normalized_alias)
+            for a in db.execute(select(PlayerAlias)).scalars()
+        ]
+    denylist = set([w.strip() for w in settings.match_denylist.split(",") if w.strip()])
+    subreddits = set([reddit_source_name(s) for s in args.subreddits.split(",") if s.strip()])
+
+    engine = create_engine(args.database_url or settings.database_url, future=True)
+    stats = LoadStats()
+    started = time.perf_counter()
+    batch = ParsedChunk()
+
+    def flush() -> None:
+        comments_inserted, mentions_inserted = merge_batch(conn, batch)
+        stats.comments_inserted += comments_inserted
+        stats.mentions_inserted += mentions_inserted
+        elapsed = time.perf_counter() - started
+        logging.info(
+            "lines=%s comments=%s inserted=%s mentions=%s rate=%.0f comments/min",
+            stats.lines,
+            stats.comments,
+            stats.comments_inserted,
+            stats.mentions,
+            stats.comments / elapsed * 60 if elapsed else 0,
+        )
+
+    with engine.connect() as conn:
+        for parsed in iter_parsed_chunks(
+            [Path(p) for p in args.paths], aliases, denylist, subreddits, args.workers, args.chunk_size, stats
+        ):
+            batch.threads.extend(parsed.threads)
+            batch.bodies.update(parsed.bodies)
+            batch.comments.extend(parsed.comments)
+            batch.mentions.extend(parsed.mentions)
+            stats.threads += len(parsed.threads)
+            stats.comments += len(parsed.comments)
+            stats.mentions += len(parsed.mentions)
+            for comment in parsed.comments:
+                stats.observe(comment[6])
+            if len(batch.comments) + len(batch.threads) >= args.batch_size:
+                flush()
+                batch = ParsedChunk()
+        if batch.comments or batch.threads:
+            flush()
+    engine.dispose()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Loaded {stats.comments} comments ({stats.comments_inserted} new) and {stats.mentions} mentions "
+        f"({stats.mentions_inserted} new) from {stats.lines} lines in {elapsed:.1f}s"
+    )
+
+    if args.recompute and stats.first_comment_utc:
+        day = stats.first_comment_utc.date()
+        with SessionLocal() as db:
+            while day <= stats.last_comment_utc.date():
+                recompute_day(db, day)
+                day += timedelta(days=1)
+        print(f"Recomputed daily metrics {stats.first_comment_utc.date()} .. {stats.last_comment_utc.date()}")
+
+
+if __name__ == "__main__":
+    main()
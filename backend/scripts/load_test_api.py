@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def _worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: list[float], errors: list[int]) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError:
+            errors.append(0)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_load(base_url: str, path: str, concurrency: int, duration_s: float) -> dict:
+    latencies: list[float] = []
+    errors: list[int] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration_s
+        await asyncio.gather(*(_worker(client, path, deadline, latencies, errors) for _ in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / duration_s, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure concurrent requests/s against the read endpoints.")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--player-id", required=True, help="Player id used for the metrics/narratives endpoints")
+    parser.add_argument("--from", dest="from_date", default="2026-01-01", help="Metrics range start")
+    parser.add_argument("--to", dest="to_date", default="2026-02-08", help="Metrics range end")
+    parser.add_argument("--date", default="2026-02-08", help="Narratives date")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent in-flight requests")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run each endpoint")
+    args = parser.parse_args()
+
+    paths = [
+        "/players?query=rockets",
+        f"/players/{args.player_id}/metrics?from={args.from_date}&to={args.to_date}",
+        f"/players/{args.player_id}/narratives?date={args.date}",
+    ]
+    for path in paths:
+        result = asyncio.run(run_load(args.base_url, path, args.concurrency, args.duration))
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
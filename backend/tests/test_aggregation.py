@@ -1,7 +1,64 @@
-from app.services.aggregation import _weight
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Comment, MentionFact, Player, PlayerDailyMetric, Source, Thread
+from app.services.aggregation import _weight, recompute_day
+from app.services.sentiment import MODEL_NAME
 
 
 def test_weight_is_capped():
     assert _weight(-4) == 1
     assert _weight(3) == 3
     assert _weight(999) == 20
+
+
+def test_recompute_day_reads_mention_facts():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with SessionLocal() as db:
+        player = Player(id=uuid.uuid4(), full_name="Jalen Green", normalized_name="jalen green")
+        source = Source(source_type="reddit", name="rockets")
+        db.add_all([player, source])
+        db.flush()
+        thread = Thread(source_id=source.id, external_id="t1", title="Game thread", created_at=datetime(2026, 2, 8))
+        db.add(thread)
+        db.flush()
+        for i, (score, compound) in enumerate([(1, 0.5), (30, -0.5), (3, 0.0)]):
+            created = datetime(2026, 2, 8, 20, i)
+            comment = Comment(
+                source_id=source.id,
+                thread_id=thread.id,
+                external_id=f"c{i}",
+                body="electric performance tonight",
+                created_utc=created,
+                score=score,
+            )
+            db.add(comment)
+            db.flush()
+            db.add(
+                MentionFact(
+                    player_id=player.id,
+                    comment_ts=created,
+                    source_id=source.id,
+                    comment_id=comment.id,
+                    score_weight=_weight(score),
+                    compound=compound,
+                    model_name=MODEL_NAME,
+                )
+            )
+        db.commit()
+
+        recompute_day(db, date(2026, 2, 8))
+        metric = db.execute(select(PlayerDailyMetric)).scalar_one()
+
+    assert metric.comment_count == 3
+    assert abs(metric.avg_compound - (0.5 * 1 - 0.5 * 20) / 24) < 1e-9
+    assert abs(metric.pos_share - 1 / 3) < 1e-9
+    assert abs(metric.neg_share - 1 / 3) < 1e-9
+    assert metric.top_terms_json == {"electric": 3, "performance": 3, "tonight": 3}
@@ -0,0 +1,24 @@
+from starlette.requests import Request
+
+from app.api.caching import etag_matches, make_etag
+
+
+def _request(if_none_match: str | None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_make_etag_is_stable_and_quoted():
+    etag = make_etag("metrics", "abc", "2026-02-01", None, 3)
+    assert etag == make_etag("metrics", "abc", "2026-02-01", None, 3)
+    assert etag != make_etag("metrics", "abc", "2026-02-01", None, 4)
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+def test_etag_matches_if_none_match_forms():
+    etag = make_etag("player", 1)
+    assert not etag_matches(_request(None), etag)
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request('"other"'), etag)
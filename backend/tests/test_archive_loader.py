@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+
+import zstandard
+
+from app.services.archive_loader import init_worker, iter_archive_lines, iter_chunks, parse_comment, process_chunk
+
+
+def _records():
+    return [
+        {"id": "abc", "subreddit": "rockets", "title": "Game Thread", "url": "https://reddit.com/abc", "created_utc": 1700000000},
+        {
+            "id": "c1",
+            "subreddit": "rockets",
+            "link_id": "t3_abc",
+            "parent_id": "t3_abc",
+            "author": "someone",
+            "body": "what a game",
+            "created_utc": "1700000060",
+            "score": 5,
+            "permalink": "/r/rockets/comments/abc/_/c1/",
+        },
+        {"id": "c2", "subreddit": "rockets", "link_id": "t3_abc", "body": "[removed]", "created_utc": 1700000070},
+        {"id": "c3", "subreddit": "nba", "link_id": "t3_xyz", "body": "elsewhere", "created_utc": 1700000080},
+    ]
+
+
+def test_iter_archive_lines_streams_zstd_ndjson(tmp_path):
+    path = tmp_path / "RC_2023-11.zst"
+    payload = "".join(json.dumps(r) + "\n" for r in _records()) + "\n"
+    path.write_bytes(zstandard.ZstdCompressor().compress(payload.encode("utf-8")))
+
+    lines = list(iter_archive_lines(path))
+
+    assert [json.loads(line)["id"] for line in lines] == ["abc", "c1", "c2", "c3"]
+    assert [len(chunk) for chunk in iter_chunks(lines, 3)] == [3, 1]
+
+
+def test_parse_comment_maps_archive_fields():
+    row = parse_comment(_records()[1])
+
+    assert row[:4] == ("rockets", "abc", "c1", "t3_abc")
+    assert len(row[4]) == 64
+    assert row[5:] == ("what a game", datetime(2023, 11, 14, 22, 14, 20), 5, "https://reddit.com/r/rockets/comments/abc/_/c1/")
+    assert parse_comment(_records()[2]) is None
+    assert parse_comment({**_records()[1], "subreddit": None}) is None
+    # Sources are keyed by the lowercased name, as the poller and the stream write them.
+    assert parse_comment({**_records()[1], "subreddit": "Rockets"})[0] == "rockets"
+
+
+def test_process_chunk_filters_subreddits_and_skips_removed():
+    init_worker(aliases=[], denylist=set(), subreddits={"rockets"})
+
+    parsed = process_chunk([json.dumps(r) for r in _records()] + ["not json"])
+
+    assert [t[1] for t in parsed.threads] == ["abc"]
+    assert [c[2] for c in parsed.comments] == ["c1"]
+    assert parsed.mentions == []
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Comment, CommentBody, Source, Thread
+from app.services.bodies import CODEC_RAW, CODEC_ZLIB, decode_body, encode_body
+
+
+def test_encode_body_compresses_only_long_bodies():
+    long_body = "Quoted chain, signature and all. " * 20
+    digest, codec, content, length = encode_body(long_body)
+    assert codec == CODEC_ZLIB
+    assert len(content) < length == len(long_body.encode("utf-8"))
+    assert decode_body(codec, content) == long_body
+
+    _, short_codec, short_content, _ = encode_body("nice dunk")
+    assert short_codec == CODEC_RAW
+    assert decode_body(short_codec, short_content) == "nice dunk"
+    assert encode_body(long_body)[0] == digest
+
+
+def test_identical_comment_bodies_are_stored_once():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    repost = "Jalen Green with the poster dunk " * 10
+    with SessionLocal() as db:
+        source = Source(source_type="reddit", name="nba")
+        db.add(source)
+        db.flush()
+        thread = Thread(source_id=source.id, external_id="t1", title="Game thread", created_at=datetime(2026, 2, 8))
+        db.add(thread)
+        db.flush()
+        for i, body in enumerate([repost, repost, "different take"]):
+            db.add(Comment(source_id=source.id, thread_id=thread.id, external_id=f"c{i}", body=body, created_utc=datetime(2026, 2, 8, 20, i)))
+        db.commit()
+
+    with SessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(CommentBody)).scalar_one() == 2
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        comments = db.execute(select(Comment).order_by(Comment.external_id)).scalars().all()
+        assert comments[0].body_hash == comments[1].body_hash
+        assert [c.body for c in comments] == [repost, repost, "different take"]
+        # Bodies come with the batch, not one lazy load per comment.
+        assert len(statements) == 2
@@ -0,0 +1,26 @@
+import app.tasks.jobs  # noqa: F401  registers the tasks
+from app.celery_app import AGGREGATION_QUEUE, INGEST_QUEUE, MAINTENANCE_QUEUE, TIME_LIMITS, celery_app
+
+
+def _queue(task_name: str, **options) -> str:
+    return celery_app.amqp.router.route(options, task_name)["queue"].name
+
+
+def test_every_task_is_routed_to_its_workload_queue_with_limits():
+    expected = {
+        "app.tasks.jobs.reddit_ingest_task": INGEST_QUEUE,
+        "app.tasks.jobs.forum_ingest_task": INGEST_QUEUE,
+        "app.tasks.jobs.aggregate_daily_task": AGGREGATION_QUEUE,
+        "app.tasks.jobs.refresh_players_from_wikidata": MAINTENANCE_QUEUE,
+        "app.tasks.jobs.maintain_partitions_task": MAINTENANCE_QUEUE,
+    }
+    for name, queue in expected.items():
+        assert _queue(name) == queue
+        assert celery_app.tasks[name].time_limit == TIME_LIMITS[queue]["time_limit"]
+
+    assert {entry["task"] for entry in celery_app.conf.beat_schedule.values()} <= set(expected)
+    assert all("priority" in entry["options"] for entry in celery_app.conf.beat_schedule.values())
+    # acks_late redelivers anything unacked past the visibility timeout, so it has to outlast every hard limit.
+    visibility_timeout = celery_app.conf.broker_transport_options["visibility_timeout"]
+    assert visibility_timeout > max(limits["time_limit"] for limits in TIME_LIMITS.values())
+    assert _queue("app.tasks.jobs.reddit_ingest_task", queue=MAINTENANCE_QUEUE) == MAINTENANCE_QUEUE
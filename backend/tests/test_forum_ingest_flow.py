@@ -1,3 +1,8 @@
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
 import nltk
 import pytest
 from sqlalchemy import create_engine, select
@@ -5,9 +10,12 @@ from sqlalchemy.orm import sessionmaker
 
 from app.db.base import Base
 from app.models.entities import Comment, CommentEntity, Player, PlayerAlias, SentimentScore, Source, Thread
-from app.services.forum_ingest import parse_thread_html
+from app.services.forum_ingest import ForumRateLimiter, parse_thread_html
+from app.services.ingest_progress import RunProgress
 from app.services.matcher import AliasEntry, PlayerMentionMatcher
+from app.services.raw_archive import RawArchive, ReplayTransport
 from app.services.sentiment import MODEL_NAME, score_text
+from app.tasks.jobs import _ingest_feed
 
 
 def test_forum_post_to_mentions_and_sentiment():
@@ -84,10 +92,18 @@ def test_forum_post_to_mentions_and_sentiment():
         sentiment = score_text(body)
 
         for player_id, mention_text in mentions:
-            db.add(CommentEntity(comment_id=comment.id, player_id=player_id, mention_text=mention_text))
+            db.add(
+                CommentEntity(
+                    comment_id=comment.id,
+                    comment_created_utc=comment.created_utc,
+                    player_id=player_id,
+                    mention_text=mention_text,
+                )
+            )
             db.add(
                 SentimentScore(
                     comment_id=comment.id,
+                    comment_created_utc=comment.created_utc,
                     player_id=player_id,
                     model_name=MODEL_NAME,
                     compound=sentiment["compound"],
@@ -104,3 +120,45 @@ def test_forum_post_to_mentions_and_sentiment():
 
     assert len(entities) == 1
     assert len(scores) == 1
+
+
+def test_replay_after_matcher_change_stores_new_mentions(tmp_path):
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    feed_url = "https://bbs.clutchfans.net/forums/rockets.9/index.rss"
+    thread_url = "https://bbs.clutchfans.net/threads/game.123/"
+    archive = RawArchive(tmp_path)
+    archive.put(
+        "forum",
+        feed_url,
+        f"<rss><channel><item><title>Game</title><link>{thread_url}</link>"
+        "<pubDate>Sun, 08 Feb 2026 12:00:00 GMT</pubDate></item></channel></rss>".encode(),
+    )
+    archive.put(
+        "forum",
+        thread_url,
+        b"""<html><body><article class="message" id="post-333"><time datetime="2026-02-08T12:00:00Z"></time>
+        <div class="message-body"><div class="bbWrapper">JG was electric tonight.</div></div></article></body></html>""",
+    )
+    client = httpx.Client(transport=ReplayTransport(archive, "forum"))
+    cutoff = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def replay(db, matcher):
+        lock = SimpleNamespace(lost=threading.Event(), name="test")
+        _ingest_feed(
+            db, client, ForumRateLimiter(0.0), matcher, {}, feed_url, cutoff, True, archive, lock, RunProgress(None), False
+        )
+
+    with SessionLocal() as db:
+        player = Player(full_name="Jalen Green", normalized_name="jalen green", team="Houston Rockets")
+        db.add(player)
+        db.commit()
+        replay(db, PlayerMentionMatcher([]))
+        assert db.execute(select(CommentEntity)).first() is None
+
+        # The nickname was added to the aliases after the thread was ingested; replaying the capture picks it up.
+        replay(db, PlayerMentionMatcher([AliasEntry(player_id=player.id, alias_text="JG", normalized_alias="jg")]))
+        entities = db.execute(select(CommentEntity)).scalars().all()
+        assert [(e.player_id, e.mention_text) for e in entities] == [(player.id, "jg")]
+        assert len(db.execute(select(Comment)).scalars().all()) == 1
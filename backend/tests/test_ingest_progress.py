@@ -0,0 +1,103 @@
+import os
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import redis
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Comment, IngestDeadLetter
+from app.services.forum_ingest import ForumRateLimiter
+from app.services.ingest_progress import RunProgress
+from app.services.matcher import PlayerMentionMatcher
+from app.tasks.jobs import _ingest_feed
+
+REDIS_URL = os.getenv("TEST_REDIS_URL")
+FEED_URL = "https://forum.test/forums/rockets.1/index.rss"
+THREAD_URL = "https://forum.test/threads/game.100/"
+
+RSS = f"""<rss><channel>
+<item><title>Game</title><link>{THREAD_URL}</link><pubDate>Sun, 08 Feb 2026 12:00:00 GMT</pubDate></item>
+<item><title>Gone</title><link>https://forum.test/threads/gone.200/</link><pubDate>Sun, 08 Feb 2026 12:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+
+def _page(post_id: int) -> str:
+    return f"""<html><body>
+    <a class="pageNav-page">1</a><a class="pageNav-page">2</a><a class="pageNav-page">3</a>
+    <article class="message" id="post-{post_id}"><time datetime="2026-02-08T12:00:00Z"></time>
+    <div class="message-body"><div class="bbWrapper">post {post_id}</div></div></article>
+    </body></html>"""
+
+
+def _forum(requests: Counter, flaky: set[str]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        requests[url] += 1
+        if url == FEED_URL:
+            return httpx.Response(200, text=RSS)
+        if url in flaky:
+            flaky.discard(url)
+            return httpx.Response(503)
+        if url.startswith(THREAD_URL):
+            page = int(url.rsplit("page-", 1)[1].rstrip("/")) if "page-" in url else 1
+            return httpx.Response(200, text=_page(page))
+        return httpx.Response(404)
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_retry_resumes_from_the_failed_page_and_dead_letters_broken_threads():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    requests: Counter = Counter()
+    client = _forum(requests, flaky={THREAD_URL + "page-2"})
+    lock = SimpleNamespace(lost=threading.Event(), name="test")
+    progress = RunProgress(None)
+    cutoff = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def run(final_attempt):
+        with SessionLocal() as db:
+            _ingest_feed(
+                db, client, ForumRateLimiter(0.0), PlayerMentionMatcher([]), {}, FEED_URL, cutoff, False, None, lock,
+                progress, final_attempt,
+            )
+
+    # The 503 on page 2 is transient: the attempt fails for a retry, keeping page 3 that it already committed.
+    with pytest.raises(httpx.HTTPStatusError):
+        run(final_attempt=False)
+    assert progress.pages_done("clutchfans-rockets.1", "100") == {3}
+
+    run(final_attempt=False)
+    assert requests[THREAD_URL + "page-3"] == 1
+    assert progress.is_done("forum", "clutchfans-rockets.1", "100")
+    with SessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(Comment)).scalar_one() == 3
+        letter = db.execute(select(IngestDeadLetter)).scalar_one()
+    assert (letter.item_type, letter.external_id, letter.attempts) == ("thread", "200", 1)
+    assert "404" in letter.error
+
+
+@pytest.mark.skipif(not REDIS_URL, reason="TEST_REDIS_URL not set")
+def test_progress_survives_into_a_new_attempt_and_clears():
+    client = redis.Redis.from_url(REDIS_URL)
+    run_id = str(uuid.uuid4())
+    first = RunProgress(run_id, client=client, ttl_seconds=60)
+    first.mark_done("reddit", "rockets")
+    first.mark_page("clutchfans-rockets", "100", 4)
+
+    retry = RunProgress(run_id, client=client).load()
+    assert retry.is_done("reddit", "rockets")
+    assert retry.pages_done("clutchfans-rockets", "100") == {4}
+    assert retry.current == {"source": "clutchfans-rockets", "thread": "100", "page": 4}
+    assert 0 < client.ttl(retry.key) <= 60
+
+    retry.clear()
+    assert not RunProgress(run_id, client=client).load().is_done("reddit", "rockets")
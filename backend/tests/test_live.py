@@ -0,0 +1,34 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from app.services.live import RollingSentiment, format_sse, sentiment_event, team_slug
+
+
+def test_team_slug_normalizes_names():
+    assert team_slug("Houston Rockets") == "houston-rockets"
+    assert team_slug("houston-rockets") == "houston-rockets"
+    assert team_slug(None) is None
+
+
+def test_rolling_sentiment_drops_events_outside_window():
+    player_id = uuid.uuid4()
+    start = datetime(2026, 2, 8, 20, 0, 0)
+    rolling = RollingSentiment(window_seconds=600)
+
+    rolling.add(sentiment_event(1, start, player_id, "Houston Rockets", 0.8))
+    snapshot = rolling.add(sentiment_event(2, start + timedelta(minutes=5), player_id, "Houston Rockets", -0.2))
+    assert snapshot["count"] == 2
+    assert abs(snapshot["avg_compound"] - 0.3) < 1e-9
+
+    snapshot = rolling.add(sentiment_event(3, start + timedelta(minutes=12), player_id, "Houston Rockets", 0.4))
+    assert snapshot["count"] == 2
+    assert abs(snapshot["avg_compound"] - 0.1) < 1e-9
+    assert snapshot["team"] == "houston-rockets"
+
+
+def test_format_sse_frames_json_payload():
+    frame = format_sse("sentiment", {"count": 1})
+    assert frame.startswith("event: sentiment\ndata: ")
+    assert frame.endswith("\n\n")
+    assert json.loads(frame.split("data: ", 1)[1]) == {"count": 1}
@@ -0,0 +1,53 @@
+import os
+import time
+import uuid
+
+import pytest
+import redis
+
+from app.services.locks import DistributedLock, lock_stats
+
+REDIS_URL = os.getenv("TEST_REDIS_URL")
+needs_redis = pytest.mark.skipif(not REDIS_URL, reason="TEST_REDIS_URL not set")
+
+
+def test_lock_fails_open_when_redis_is_down():
+    client = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2)
+    lock = DistributedLock(client, "ingest:test")
+
+    assert lock.acquire() is True
+    assert lock.degraded is True
+    lock.release()
+
+
+@needs_redis
+def test_second_holder_is_skipped_and_counted():
+    client = redis.Redis.from_url(REDIS_URL)
+    name = f"test:{uuid.uuid4().hex}"
+    with DistributedLock(client, name, ttl_seconds=5) as first:
+        second = DistributedLock(client, name, ttl_seconds=5)
+        assert first.acquired
+        assert second.acquire(wait_seconds=0.2, poll_seconds=0.05) is False
+    assert DistributedLock(client, name).acquire() is True
+
+    stats = lock_stats(client)[name]
+    assert stats["acquired"] == 2
+    assert stats["skipped"] == 1
+    assert stats["wait_seconds"] >= 0.2
+
+
+@needs_redis
+def test_heartbeat_keeps_lease_past_ttl_and_release_checks_token():
+    client = redis.Redis.from_url(REDIS_URL)
+    name = f"test:{uuid.uuid4().hex}"
+    lock = DistributedLock(client, name, ttl_seconds=0.3)
+    assert lock.acquire()
+    time.sleep(0.8)
+    assert client.get(lock.key) == lock.token.encode()
+    assert not lock.lost.is_set()
+
+    client.set(lock.key, "someone-else")
+    time.sleep(0.3)
+    assert lock.lost.is_set()
+    lock.release()
+    assert client.get(lock.key) == b"someone-else"
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Comment, CommentEntity, Player, SentimentScore, Source, Thread
+from app.services.mentions import (
+    build_mention_rows,
+    decode_cursor,
+    encode_cursor,
+    format_csv,
+    mention_texts_stmt,
+    mentions_stmt,
+    next_cursor,
+)
+from app.services.sentiment import MODEL_NAME
+
+
+def test_cursor_round_trip():
+    created = datetime(2026, 2, 8, 12, 30, 15, 250000)
+    assert decode_cursor(encode_cursor(created, 42)) == (created, 42)
+
+
+def test_mentions_keyset_pages_cover_every_row_once():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    start = datetime(2026, 2, 8, 12, 0, 0)
+    with SessionLocal() as db:
+        player = Player(full_name="Jalen Green", normalized_name="jalen green", team="Houston Rockets")
+        source = Source(source_type="reddit", name="rockets")
+        db.add_all([player, source])
+        db.flush()
+        thread = Thread(source_id=source.id, external_id="t1", title="Game thread", created_at=start)
+        db.add(thread)
+        db.flush()
+        for i in range(7):
+            # Pairs of comments share a timestamp so the comment id tie-breaker is exercised.
+            comment = Comment(
+                source_id=source.id,
+                thread_id=thread.id,
+                external_id=f"c{i}",
+                body=f"Jalen Green play {i}",
+                created_utc=start + timedelta(minutes=i // 2),
+                score=i,
+            )
+            db.add(comment)
+            db.flush()
+            key = {"comment_id": comment.id, "comment_created_utc": comment.created_utc, "player_id": player.id}
+            db.add(CommentEntity(**key, mention_text="jalen green"))
+            db.add(SentimentScore(**key, model_name=MODEL_NAME, compound=0.1, pos=0.2, neu=0.8, neg=0.0))
+        db.commit()
+
+        seen = []
+        after = None
+        while True:
+            rows = db.execute(mentions_stmt(player.id, after, 3)).all()
+            texts = db.execute(mention_texts_stmt(player.id, [r.comment_id for r in rows])).all()
+            items = build_mention_rows(rows, texts)
+            seen.extend(item["external_id"] for item in items)
+            cursor = next_cursor(rows, 3)
+            if cursor is None:
+                break
+            after = decode_cursor(cursor)
+
+    assert seen == [f"c{i}" for i in range(7)]
+    assert items[0]["mentions"] == ["jalen green"]
+    csv_text = format_csv(items, header=True)
+    assert csv_text.splitlines()[0].startswith("comment_id,created_utc")
+    assert "jalen green" in csv_text
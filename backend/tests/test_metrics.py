@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+from app.core.metrics import count, render_metrics, stage
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_stage_and_count_show_up_in_exposition():
+    before = REGISTRY.get_sample_value("ingest_stage_seconds_count", {"pipeline": "test", "stage": "parse"}) or 0
+    with stage("test", "parse"):
+        pass
+    count("test", "comment", 3)
+
+    assert REGISTRY.get_sample_value("ingest_stage_seconds_count", {"pipeline": "test", "stage": "parse"}) == before + 1
+    body, media_type = render_metrics()
+    assert media_type.startswith("text/plain")
+    assert b'ingest_items_total{kind="comment",pipeline="test"}' in body
+
+
+def test_multiprocess_samples_are_aggregated_across_processes(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(BACKEND_DIR)}
+    write = "from app.core.metrics import count; count('worker', 'comment', 2)"
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", write], env=env, check=True)
+    read = "from app.core.metrics import render_metrics; print(render_metrics()[0].decode())"
+    output = subprocess.run([sys.executable, "-c", read], env=env, check=True, capture_output=True, text=True).stdout
+
+    assert 'ingest_items_total{kind="comment",pipeline="worker"} 4.0' in output
@@ -0,0 +1,15 @@
+from datetime import date
+
+from app.services.partitions import add_months, expired_partitions, partition_month
+
+
+def test_add_months_crosses_year_boundaries():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_expired_partitions_respects_cutoff_month():
+    names = ["comments_p2025_12", "comments_p2026_01", "comments_p2026_02", "comments_default"]
+    assert partition_month("sentiment_scores_p2026_02") == date(2026, 2, 1)
+    assert partition_month("comments_default") is None
+    assert expired_partitions(names, cutoff=date(2026, 2, 1)) == ["comments_p2025_12", "comments_p2026_01"]
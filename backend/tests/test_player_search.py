@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Player, PlayerAlias
+from app.services.player_search import player_search_stmt
+
+
+def _session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)()
+
+
+def test_player_search_matches_aliases_and_team_ranked():
+    with _session() as db:
+        durant = Player(full_name="Kevin Durant", normalized_name="kevin durant", team="Houston Rockets")
+        sengun = Player(full_name="Alperen Şengün", normalized_name="alperen şengün", team="Houston Rockets")
+        james = Player(full_name="LeBron James", normalized_name="lebron james", team="Los Angeles Lakers")
+        db.add_all([durant, sengun, james])
+        db.flush()
+        db.add_all(
+            [
+                PlayerAlias(player_id=durant.id, alias_text="KD", normalized_alias="kd"),
+                PlayerAlias(player_id=sengun.id, alias_text="Sengun", normalized_alias="sengun"),
+            ]
+        )
+        db.commit()
+
+        assert [p.full_name for p in db.execute(player_search_stmt("KD", "sqlite")).scalars()] == ["Kevin Durant"]
+        assert [p.full_name for p in db.execute(player_search_stmt("Sengun", "sqlite")).scalars()] == ["Alperen Şengün"]
+        rockets = [p.full_name for p in db.execute(player_search_stmt("rockets", "sqlite")).scalars()]
+        assert rockets == ["Alperen Şengün", "Kevin Durant"]
+        assert len(db.execute(player_search_stmt("", "sqlite")).scalars().all()) == 3
+
+
+def test_player_search_uses_trigram_operator_on_postgres():
+    sql = str(player_search_stmt("Sengun", "postgresql").compile(dialect=postgresql.dialect()))
+    assert "<%" in sql
+    assert "word_similarity" in sql
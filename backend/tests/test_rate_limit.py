@@ -0,0 +1,33 @@
+import os
+import uuid
+
+import pytest
+import redis
+
+from app.services.rate_limit import TokenBucket
+
+REDIS_URL = os.getenv("TEST_REDIS_URL")
+
+
+def test_bucket_falls_back_to_local_when_redis_is_down():
+    client = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2)
+    bucket = TokenBucket(f"test:{uuid.uuid4().hex}", min_interval_seconds=10, client=client)
+
+    assert bucket.try_acquire() == 0
+    assert 9 < bucket.try_acquire() <= 10
+    assert TokenBucket("test:unlimited", min_interval_seconds=0, client=client).try_acquire() == 0
+
+
+@pytest.mark.skipif(not REDIS_URL, reason="TEST_REDIS_URL not set")
+def test_workers_share_one_budget_and_block_for_pauses_everyone():
+    key = f"test:{uuid.uuid4().hex}"
+    worker_a = TokenBucket(key, min_interval_seconds=1, burst=2, client=redis.Redis.from_url(REDIS_URL))
+    worker_b = TokenBucket(key, min_interval_seconds=1, burst=2, client=redis.Redis.from_url(REDIS_URL))
+
+    assert worker_a.try_acquire() == 0
+    assert worker_b.wait_time() == 0
+    assert worker_b.try_acquire() == 0
+    assert 0.9 < worker_a.try_acquire() <= 1.0
+
+    worker_a.block_for(30)
+    assert worker_b.wait_time() > 30
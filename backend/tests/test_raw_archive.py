@@ -0,0 +1,146 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import httpx
+import requests
+
+from app.services.forum_ingest import iterate_archived_threads
+from requests.adapters import BaseAdapter
+
+from app.services.raw_archive import RawArchive, ReplayAdapter, ReplayTransport, httpx_capture_hook, requests_capture_hook
+
+FEED_URL = "https://bbs.clutchfans.net/forums/rockets.9/index.rss"
+
+
+def _rss(thread_id: int) -> str:
+    return f"""
+    <rss><channel><item>
+      <title>Thread {thread_id}</title>
+      <link>https://bbs.clutchfans.net/threads/t.{thread_id}/</link>
+      <pubDate>Sun, 08 Feb 2026 12:00:00 GMT</pubDate>
+    </item></channel></rss>
+    """
+
+
+def test_put_deduplicates_content_and_latest_respects_as_of(tmp_path):
+    archive = RawArchive(tmp_path)
+    first = archive.put("forum", FEED_URL, b"<rss/>", fetched_at=datetime(2026, 2, 1))
+    second = archive.put("forum", FEED_URL, b"<rss/>", fetched_at=datetime(2026, 2, 2))
+    archive.put("forum", FEED_URL, b"<rss>new</rss>", fetched_at=datetime(2026, 2, 3))
+
+    assert first == second
+    assert len(list((tmp_path / "objects").rglob("*.gz"))) == 2
+    assert archive.get(archive.latest("forum", FEED_URL).sha256) == b"<rss>new</rss>"
+    assert archive.latest("forum", FEED_URL, as_of=datetime(2026, 2, 2, 12)).fetched_at == datetime(2026, 2, 2)
+    assert archive.latest("reddit", FEED_URL) is None
+
+
+def test_httpx_capture_then_replay_without_network(tmp_path):
+    archive = RawArchive(tmp_path)
+    live = httpx.MockTransport(lambda request: httpx.Response(200, text=_rss(1), headers={"content-type": "application/rss+xml"}))
+    with httpx.Client(transport=live, event_hooks={"response": [httpx_capture_hook(archive, "forum")]}) as client:
+        client.get(FEED_URL)
+
+    with httpx.Client(transport=ReplayTransport(archive, "forum")) as client:
+        hit = client.get(FEED_URL)
+        miss = client.get("https://bbs.clutchfans.net/threads/t.1/page-2")
+
+    assert hit.status_code == 200
+    assert hit.headers["content-type"] == "application/rss+xml"
+    assert "Thread 1" in hit.text
+    assert miss.status_code == 404
+
+
+def test_replay_adapter_serves_archive_and_local_token(tmp_path):
+    archive = RawArchive(tmp_path)
+    archive.put("reddit", "https://oauth.reddit.com/r/rockets/new?limit=20&raw_json=1", b'{"kind": "Listing"}', content_type="application/json")
+    session = requests.Session()
+    session.mount("https://", ReplayAdapter(archive, "reddit"))
+
+    token = session.post("https://www.reddit.com/api/v1/access_token", data={"grant_type": "client_credentials"})
+    listing = session.get("https://oauth.reddit.com/r/rockets/new", params={"limit": 20, "raw_json": 1})
+
+    assert token.json()["access_token"] == "replay"
+    assert listing.json() == {"kind": "Listing"}
+
+
+class _MoreChildrenAdapter(BaseAdapter):
+    """Answers /api/morechildren with the link_id it was asked about, like Reddit returns that thread's comments."""
+
+    def send(self, request, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response._content = f'{{"link": "{dict(p.split("=") for p in request.body.split("&"))["link_id"]}"}}'.encode()
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def test_replay_tells_apart_posts_to_the_same_url(tmp_path):
+    archive = RawArchive(tmp_path)
+    url = "https://oauth.reddit.com/api/morechildren?raw_json=1"
+    live = requests.Session()
+    live.mount("https://", _MoreChildrenAdapter())
+    live.hooks["response"].append(requests_capture_hook(archive, "reddit"))
+    for link_id in ("t3_aaa", "t3_bbb"):
+        live.post(url, data={"children": "c1,c2", "link_id": link_id, "sort": "confidence"})
+
+    replay = requests.Session()
+    replay.mount("https://", ReplayAdapter(archive, "reddit"))
+    first = replay.post(url, data={"children": "c1,c2", "link_id": "t3_aaa", "sort": "confidence"})
+    second = replay.post(url, data={"children": "c1,c2", "link_id": "t3_bbb", "sort": "confidence"})
+    unseen = replay.post(url, data={"children": "c9", "link_id": "t3_aaa", "sort": "confidence"})
+    get = replay.get(url)
+
+    assert first.json() == {"link": "t3_aaa"}
+    assert second.json() == {"link": "t3_bbb"}
+    assert unseen.status_code == 404
+    assert get.status_code == 404
+
+
+def test_replay_falls_back_to_captures_made_before_newest_first(tmp_path):
+    archive = RawArchive(tmp_path)
+    comments = "https://oauth.reddit.com/comments/abc/?limit=2048&sort={}&raw_json=1"
+    archive.put("reddit", comments.format("confidence"), b'[{"kind": "Listing"}]')
+    more = "https://oauth.reddit.com/api/morechildren?raw_json=1"
+    archive.put("reddit", more, b'{"json": {}}', method="POST", request_body="children=c1&link_id=t3_abc&sort=confidence")
+    session = requests.Session()
+    session.mount("https://", ReplayAdapter(archive, "reddit"))
+
+    listing = session.get(comments.format("new"))
+    expanded = session.post(more, data={"children": "c1", "link_id": "t3_abc", "sort": "new"})
+    other = session.get(comments.format("top"))
+
+    assert listing.json() == [{"kind": "Listing"}]
+    assert expanded.json() == {"json": {}}
+    assert other.status_code == 404
+
+
+def test_index_created_before_request_keys_is_upgraded(tmp_path):
+    conn = sqlite3.connect(tmp_path / "index.sqlite3")
+    conn.executescript(
+        "CREATE TABLE fetches (id INTEGER PRIMARY KEY, source TEXT NOT NULL, url TEXT NOT NULL, fetched_at TEXT NOT NULL,"
+        " status INTEGER NOT NULL, content_type TEXT, sha256 TEXT NOT NULL);"
+        f"INSERT INTO fetches (source, url, fetched_at, status, sha256) VALUES ('forum', '{FEED_URL}', '2026-02-01T00:00:00', 200, 'x');"
+    )
+    conn.commit()
+    conn.close()
+
+    archive = RawArchive(tmp_path)
+
+    assert archive.latest("forum", FEED_URL).sha256 == "x"
+    assert archive.latest("forum", FEED_URL, method="POST") is None
+
+
+def test_iterate_archived_threads_walks_every_feed_capture(tmp_path):
+    archive = RawArchive(tmp_path)
+    archive.put("forum", FEED_URL, _rss(1).encode(), fetched_at=datetime(2026, 2, 8, 13))
+    archive.put("forum", FEED_URL, _rss(2).encode(), fetched_at=datetime(2026, 2, 8, 14))
+    archive.put("forum", FEED_URL, _rss(1).encode(), fetched_at=datetime(2026, 2, 8, 15))
+
+    items = list(iterate_archived_threads(archive, FEED_URL, datetime(2026, 2, 1, tzinfo=timezone.utc)))
+
+    assert [item.external_id for item in items] == ["1", "2"]
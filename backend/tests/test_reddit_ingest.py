@@ -0,0 +1,147 @@
+import threading
+from types import SimpleNamespace
+
+from praw.models import MoreComments
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Comment, CommentEntity, MentionFact, Player, SentimentScore, Source, Thread
+from app.services.ingest_progress import RunProgress
+from app.services.matcher import AliasEntry, PlayerMentionMatcher
+from app.services.reddit_stream import CommentStreamConsumer
+from app.tasks.jobs import _ingest_subreddit, _replace_more_budget
+
+
+class FakeCommentForest:
+    """A first page of comments plus, behind one MoreComments stub, the rest that an expansion would load."""
+
+    def __init__(self, comments, hidden=()):
+        self.comments = list(comments)
+        self.hidden = list(hidden)
+        self.replace_more_limits = []
+        self.listed = 0
+
+    def replace_more(self, limit):
+        self.replace_more_limits.append(limit)
+        if limit:
+            self.comments += self.hidden
+            self.hidden = []
+
+    def list(self):
+        self.listed += 1
+        more = [MoreComments(None, {"count": len(self.hidden), "children": [], "id": "more", "name": "t1_more"})]
+        return self.comments + (more if self.hidden else [])
+
+
+def _comments(sub_id, comment_ids, start=0):
+    return [
+        SimpleNamespace(
+            id=cid, parent_id=f"t3_{sub_id}", author="fan", body="good game", created_utc=1770552000 + start + i, score=1, permalink=""
+        )
+        for i, cid in enumerate(comment_ids)
+    ]
+
+
+def _submission(sub_id, num_comments, comment_ids, hidden_ids=()):
+    forest = FakeCommentForest(_comments(sub_id, comment_ids), _comments(sub_id, hidden_ids, start=len(comment_ids)))
+    return SimpleNamespace(
+        id=sub_id, title=sub_id, url=None, created_utc=1770550000, num_comments=num_comments, comments=forest
+    )
+
+
+def _reddit(submissions):
+    return SimpleNamespace(subreddit=lambda name: SimpleNamespace(new=lambda limit: submissions))
+
+
+def _ingest(db, submissions, limit_comments_per_post=100, replay=False, matcher=None, subreddit="rockets"):
+    lock = SimpleNamespace(lost=threading.Event(), name="test")
+    _ingest_subreddit(
+        db, _reddit(submissions), matcher or PlayerMentionMatcher([]), {}, subreddit, 20, limit_comments_per_post, replay,
+        lock, RunProgress(None), False,
+    )
+
+
+def _session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)()
+
+
+def test_unchanged_submissions_are_not_expanded_again():
+    with _session() as db:
+        _ingest(db, [_submission("quiet", 2, ["a", "b"]), _submission("hot", 1, ["c"])])
+        assert db.execute(select(func.count()).select_from(Comment)).scalar_one() == 3
+        assert dict(db.execute(select(Thread.external_id, Thread.num_comments)).all()) == {"quiet": 2, "hot": 1}
+
+        second = [_submission("quiet", 2, ["a", "b"]), _submission("hot", 3, ["c", "d", "e"])]
+        _ingest(db, second)
+        assert second[0].comments.listed == 0
+        # The first page already carries both new comments: no expansion call.
+        assert second[1].comments.replace_more_limits == []
+        assert db.execute(select(func.count()).select_from(Comment)).scalar_one() == 5
+        assert db.execute(select(Thread.num_comments).where(Thread.external_id == "hot")).scalar_one() == 3
+
+
+def test_growing_thread_expands_only_for_new_comments_it_keeps():
+    with _session() as db:
+        _ingest(db, [_submission("hot", 3, ["a", "b", "c"])], limit_comments_per_post=5)
+
+        # 12 new comments: 2 on the first page, 10 behind MoreComments; the cap keeps the 5 newest.
+        hot = _submission("hot", 15, ["a", "b", "c", "d", "e"], hidden_ids=[f"n{i}" for i in range(10)])
+        _ingest(db, [hot], limit_comments_per_post=5)
+
+        assert hot.comments.replace_more_limits == [1]
+        stored = set(db.execute(select(Comment.external_id)).scalars())
+        assert stored == {"a", "b", "c", "n5", "n6", "n7", "n8", "n9"}
+
+        # The first page alone fills the cap: the stubs are left unexpanded.
+        full = _submission("full", 50, [f"f{i}" for i in range(5)], hidden_ids=["x", "y"])
+        _ingest(db, [full], limit_comments_per_post=5)
+        assert full.comments.replace_more_limits == []
+
+
+def test_replace_more_budget_covers_missing_comments():
+    assert _replace_more_budget(0) == 0
+    assert _replace_more_budget(-5) == 0
+    assert _replace_more_budget(150) == 2
+    assert _replace_more_budget(50000) == 8
+
+
+def test_replay_rematches_stored_comments():
+    with _session() as db:
+        player = Player(full_name="Jalen Green", normalized_name="jalen green", team="Houston Rockets")
+        db.add(player)
+        db.commit()
+        _ingest(db, [_submission("game", 2, ["a", "b"])])
+        assert db.execute(select(func.count()).select_from(CommentEntity)).scalar_one() == 0
+
+        # After a matcher (and parser) fix the unchanged thread is replayed: stored comments are matched again.
+        matcher = PlayerMentionMatcher([AliasEntry(player_id=player.id, alias_text="Jalen Green", normalized_alias="jalen green")])
+        for _ in range(2):
+            replayed = _submission("game", 2, ["a", "b"])
+            replayed.comments.comments[0].body = "good game from Jalen Green"
+            _ingest(db, [replayed], replay=True, matcher=matcher)
+
+        assert db.execute(select(func.count()).select_from(Comment)).scalar_one() == 2
+        for model in (CommentEntity, SentimentScore, MentionFact):
+            assert db.execute(select(func.count()).select_from(model)).scalar_one() == 1
+        db.expunge_all()
+        comment = db.execute(select(Comment).where(Comment.external_id == "a")).scalar_one()
+        assert comment.body == "good game from Jalen Green"
+
+
+def test_poller_and_stream_share_one_source_whatever_the_case():
+    with _session() as db:
+        _ingest(db, [_submission("game", 1, ["a"])], subreddit="Rockets")
+
+        # The stream sees Reddit's display_name, which need not match the configured spelling.
+        streamed = _comments("game", ["a", "b"])
+        for comment in streamed:
+            comment.subreddit = SimpleNamespace(display_name="ROCKETS")
+            comment.link_id = "t3_game"
+        stats = CommentStreamConsumer(db, PlayerMentionMatcher([]), lambda *args: [], publish=False).consume(streamed)
+
+        assert (stats.duplicates, stats.stored) == (1, 1)
+        assert db.execute(select(Source.name)).scalars().all() == ["rockets"]
+        assert db.execute(select(func.count()).select_from(Thread)).scalar_one() == 1
@@ -0,0 +1,74 @@
+import uuid
+from types import SimpleNamespace
+
+import redis
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Comment, Thread
+from app.services.matcher import AliasEntry, PlayerMentionMatcher
+from app.services.reddit_stream import CommentStreamConsumer, StreamCheckpoint
+
+PLAYER_ID = uuid.uuid4()
+
+
+def _comment(seq: int, body: str = "good game", link: str = "t3_abc"):
+    return SimpleNamespace(
+        id=format(seq, "x"),  # hex digits are valid base36 and keep the order
+        link_id=link,
+        link_title="Game Thread",
+        parent_id=link,
+        subreddit=SimpleNamespace(display_name="rockets"),
+        author="someone",
+        body=body,
+        created_utc=1770552000 + seq,
+        score=1,
+        permalink=f"/r/rockets/comments/abc/_/{seq:x}/",
+    )
+
+
+def _consumer(db, checkpoint, stored_mentions):
+    matcher = PlayerMentionMatcher([AliasEntry(PLAYER_ID, "Sengun", "sengun")])
+
+    def store_mentions(session, comment, mentions):
+        stored_mentions.append((comment.external_id, mentions))
+        return []
+
+    return CommentStreamConsumer(db, matcher, store_mentions, checkpoint=checkpoint, batch_size=2, publish=False)
+
+
+def test_stream_batches_dedups_and_resumes_from_checkpoint():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    # Unreachable Redis: the checkpoint falls back to memory, which is what a restart within one process sees.
+    checkpoint = StreamCheckpoint("rockets", client=redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1))
+    mentions: list = []
+
+    with SessionLocal() as db:
+        stats = _consumer(db, checkpoint, mentions).consume(
+            [_comment(10), _comment(11, "Sengun!"), None, _comment(12, link="t3_def")]
+        )
+    assert (stats.stored, stats.batches, stats.last_fullname) == (3, 2, "t1_c")
+    assert mentions == [("b", [(PLAYER_ID, "sengun")])]
+
+    # A reconnect replays recent comments; only the one past the checkpoint is new.
+    with SessionLocal() as db:
+        stats = _consumer(db, checkpoint, mentions).consume([_comment(11), _comment(12), _comment(13)])
+        assert (stats.received, stats.duplicates, stats.stored) == (3, 2, 1)
+        assert db.execute(select(func.count()).select_from(Comment)).scalar_one() == 4
+        assert db.execute(select(func.count()).select_from(Thread)).scalar_one() == 2
+
+
+def test_flush_skips_comments_already_stored_by_the_poller():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with SessionLocal() as db:
+        _consumer(db, None, []).consume([_comment(20), _comment(21)])
+    with SessionLocal() as db:
+        stats = _consumer(db, None, []).consume([_comment(20), _comment(21), _comment(22)])
+
+    assert (stats.duplicates, stats.stored) == (2, 1)
@@ -0,0 +1,47 @@
+import gzip
+import json
+
+import httpx
+import pytest
+
+from app.services.wikidata.cache import SparqlCache, SparqlCacheMiss
+from app.services.wikidata.client import WikidataClient
+
+ENDPOINT = "https://query.example.test/sparql"
+QUERY = "SELECT ?team WHERE { ?team wdt:P118 wd:Q155223 . }"
+
+
+def _counting_transport(calls: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"results": {"bindings": [{"team": {"value": "Q161345"}}]}})
+
+    return httpx.MockTransport(handler)
+
+
+def test_second_query_is_served_from_cache(tmp_path):
+    calls: list = []
+    cache = SparqlCache(tmp_path)
+    client = WikidataClient("test", endpoint=ENDPOINT, cache=cache, offline=False, transport=_counting_transport(calls))
+
+    first = client.query(QUERY).data
+    second = WikidataClient("test", endpoint=ENDPOINT, cache=cache, offline=False, transport=_counting_transport(calls)).query(QUERY).data
+
+    assert first == second
+    assert len(calls) == 1
+    assert cache.get("https://other.example.test/sparql", QUERY) is None
+
+
+def test_offline_serves_expired_entries_and_raises_on_miss(tmp_path):
+    cache = SparqlCache(tmp_path, ttl_seconds=60)
+    cache.put(ENDPOINT, QUERY, {"results": {"bindings": []}})
+    path = next(tmp_path.rglob("*.json.gz"))
+    entry = json.loads(gzip.decompress(path.read_bytes()))
+    entry["fetched_at"] -= 3600
+    path.write_bytes(gzip.compress(json.dumps(entry).encode()))
+
+    assert cache.get(ENDPOINT, QUERY) is None
+    offline = WikidataClient("test", endpoint=ENDPOINT, cache=cache, offline=True)
+    assert offline.query(QUERY).data == {"results": {"bindings": []}}
+    with pytest.raises(SparqlCacheMiss):
+        offline.query("SELECT ?x WHERE {}")
@@ -0,0 +1,76 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from app.services.wikidata.fetch import fetch_players
+
+ENTITY = "http://www.wikidata.org/entity/"
+TEAMS = {"Q161345": "Houston Rockets", "Q169138": "Los Angeles Lakers"}
+ROSTERS = {
+    "Q161345": [("Q101", "Alpha One", None), ("Q102", "Beta Two", None), ("Q103", "Gamma Three", "2020-06-30")],
+    "Q169138": [("Q103", "Gamma Three", None), ("Q104", "Delta Four", None)],
+}
+
+
+class StubSparqlHandler(BaseHTTPRequestHandler):
+    queries: list[str] = []
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        query = parse_qs(self.rfile.read(length).decode("utf-8"))["query"][0]
+        self.queries.append(query)
+        if "?team wdt:P118" in query and "?player" not in query:
+            bindings = [{"team": {"value": ENTITY + qid}} for qid in TEAMS]
+        else:
+            team = re.search(r"wdt:P54 wd:(Q\d+)", query).group(1)
+            after = re.search(r'STR\(\?player\) > "([^"]*)"', query).group(1)
+            limit = int(re.search(r"LIMIT (\d+)", query).group(1))
+            page = [p for p in ROSTERS[team] if ENTITY + p[0] > after][:limit]
+            bindings = []
+            for qid, name, end in page:
+                row = {
+                    "player": {"value": ENTITY + qid},
+                    "playerLabel": {"value": name},
+                    "team2Label": {"value": TEAMS[team]},
+                    "alias": {"value": name.split()[0]},
+                }
+                if end:
+                    row["nbaEnd"] = {"value": f"{end}T00:00:00Z"}
+                bindings.append(row)
+        body = json.dumps({"results": {"bindings": bindings}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/sparql-results+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_fetch_players_keyset_pages_teams_against_stub(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSparqlHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        players = fetch_players(
+            limit=2,
+            sleep_s=0,
+            max_rows=None,
+            denylist_path=tmp_path / "missing.txt",
+            concurrency=2,
+            endpoint=f"http://127.0.0.1:{server.server_port}/sparql",
+        )
+    finally:
+        server.shutdown()
+
+    by_qid = {p["wikidata_qid"]: p for p in players}
+    assert sorted(by_qid) == ["Q101", "Q102", "Q103", "Q104"]
+    # Open-ended membership wins over the ended one regardless of page arrival order.
+    assert by_qid["Q103"]["team"] == "Los Angeles Lakers"
+    assert by_qid["Q101"]["aliases"] == ["Alpha", "Alpha One"]
+    assert not any("OFFSET" in q for q in StubSparqlHandler.queries)
+    # Rockets: page 1 (Q101, Q102), page 2 after Q102 (Q103); Lakers: a single short page.
+    assert any(f'"{ENTITY}Q102"' in q for q in StubSparqlHandler.queries)
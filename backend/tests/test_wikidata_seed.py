@@ -32,3 +32,30 @@ def test_wikidata_seed_idempotent_aliases():
 
     assert len(player_count) == 1
     assert len(alias_count) == 3
+
+
+def test_wikidata_seed_bulk_counters_and_updates():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with SessionLocal() as db:
+        db.add(Player(full_name="Legacy Player", normalized_name="legacy player", team="Old Team"))
+        db.commit()
+
+    payload = [
+        {"wikidata_qid": "Q1", "full_name": "Legacy Player", "aliases": ["Legacy"], "team": "New Team"},
+        {"wikidata_qid": "Q2", "full_name": "Second Player", "aliases": ["Second", "second"], "retired": True},
+        {"full_name": ""},
+    ]
+    with SessionLocal() as db:
+        first = upsert_players_from_payload(db, payload)
+    with SessionLocal() as db:
+        second = upsert_players_from_payload(db, payload)
+        players = {p.wikidata_qid: p for p in db.execute(select(Player)).scalars()}
+
+    assert first == {"created": 1, "updated": 1, "aliases_added": 4}
+    assert second == {"created": 0, "updated": 2, "aliases_added": 0}
+    assert players["Q1"].team == "New Team"
+    assert players["Q2"].active is False
+    assert players["Q2"].created_at is not None
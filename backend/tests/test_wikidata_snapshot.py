@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.entities import Player
+from app.services.wikidata.seed import deactivate_players, upsert_players_from_payload
+from app.services.wikidata.seed import upsert_players_from_snapshot_path
+from app.services.wikidata.snapshot import (
+    diff_players,
+    iter_snapshot_players,
+    manifest_path,
+    player_content_hash,
+    snapshot_status,
+    write_snapshot,
+)
+
+
+def _player(qid, name, aliases, team="Houston Rockets"):
+    return {"wikidata_qid": qid, "full_name": name, "normalized_name": name.lower(), "aliases": aliases, "team": team}
+
+
+def test_content_hash_ignores_alias_order():
+    assert player_content_hash(_player("Q1", "Jalen Green", ["JG", "Jalen"])) == player_content_hash(
+        _player("Q1", "Jalen Green", ["Jalen", "JG"])
+    )
+
+
+def test_diff_players_classifies_by_qid_and_snapshot_records_it(tmp_path):
+    previous = [_player("Q1", "Jalen Green", ["JG"]), _player("Q2", "Alperen Sengun", ["Sengun"]), _player(None, "Old Timer", [])]
+    path = tmp_path / "snapshot.ndjson.gz"
+    write_snapshot(previous, path)
+
+    current = [
+        _player("Q1", "Jalen Green", ["JG"]),
+        _player("Q2", "Alperen Sengun", ["Sengun"], team="Other"),
+        _player("Q3", "Amen Thompson", ["Amen"]),
+    ]
+    diff = diff_players(iter_snapshot_players(path), current)
+    write_snapshot(current, path, diff=diff)
+
+    assert diff == {"added": ["Q3"], "changed": ["Q2"], "removed": ["name:old timer"], "unchanged": 1}
+    manifest = json.loads(manifest_path(path).read_text())
+    assert manifest["diff"]["added"] == ["Q3"]
+    assert manifest["player_count"] == 3
+    assert all(p["content_hash"] == player_content_hash(p) for p in iter_snapshot_players(path))
+
+
+def test_deactivate_players_by_qid_and_name():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with SessionLocal() as db:
+        upsert_players_from_payload(db, [_player("Q1", "Jalen Green", []), _player("Q2", "Alperen Sengun", [])])
+        assert deactivate_players(db, ["Q2", "name:nobody"]) == 1
+        active = dict(db.execute(select(Player.wikidata_qid, Player.active)).all())
+
+    assert active == {"Q1": True, "Q2": False}
+
+
+def test_player_removed_then_re_added_is_active_again():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with SessionLocal() as db:
+        upsert_players_from_payload(db, [_player("Q1", "Jalen Green", []), _player(None, "Old Timer", [])])
+        assert deactivate_players(db, ["Q1", "name:old timer"]) == 2
+
+        upsert_players_from_payload(db, [_player("Q1", "Jalen Green", []), _player(None, "Old Timer", [])])
+        assert db.execute(select(Player.active)).scalars().all() == [True, True]
+
+        upsert_players_from_payload(db, [_player("Q1", "Jalen Green", []) | {"retired": True}])
+        assert db.execute(select(Player.active).where(Player.wikidata_qid == "Q1")).scalar_one() is False
+
+
+def test_status_reads_manifest_only_and_legacy_json_still_loads(tmp_path):
+    path = tmp_path / "snapshot.ndjson.gz"
+    write_snapshot([_player("Q1", "Jalen Green", ["JG", "Jalen"])], path)
+    path.write_bytes(b"not gzip")  # status must not touch the data file
+
+    assert snapshot_status(path)["alias_count"] == 2
+
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text(json.dumps({"generated_at": "2026-02-08T00:00:00+00:00", "players": [_player("Q1", "Jalen Green", ["JG"])]}))
+    assert snapshot_status(legacy) == {"exists": True, "generated_at": "2026-02-08T00:00:00+00:00", "player_count": 1, "alias_count": 1}
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine, future=True)() as db:
+        assert upsert_players_from_snapshot_path(db, legacy)["created"] == 1
+
+
+def test_refresh_keeps_the_baseline_when_the_db_step_fails_or_the_fetch_is_truncated(tmp_path, monkeypatch):
+    from app.services.wikidata import refresh
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    path = tmp_path / "snapshot.ndjson.gz"
+    write_snapshot([_player("Q1", "Jalen Green", ["JG"])], path)
+    baseline = path.read_bytes()
+    monkeypatch.setattr(refresh, "default_snapshot_path", lambda: path)
+    monkeypatch.setattr(refresh, "resolve_snapshot_path", lambda: path)
+    monkeypatch.setattr(refresh, "SessionLocal", sessionmaker(bind=engine, future=True))
+    monkeypatch.setattr(refresh, "fetch_players", lambda **kwargs: [_player("Q2", "Amen Thompson", ["Amen"])])
+
+    def broken_upsert(*args, **kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(refresh, "upsert_players_from_payload", broken_upsert)
+    with pytest.raises(RuntimeError):
+        refresh.refresh_players_from_wikidata_sync(sleep_s=0)
+    assert path.read_bytes() == baseline
+
+    monkeypatch.setattr(refresh, "upsert_players_from_payload", upsert_players_from_payload)
+    result = refresh.refresh_players_from_wikidata_sync(sleep_s=0, max_rows=1)
+    assert result["snapshot_written"] is False
+    assert path.read_bytes() == baseline
+
+    result = refresh.refresh_players_from_wikidata_sync(sleep_s=0)
+    assert result["snapshot_written"] is True
+    assert [p["wikidata_qid"] for p in iter_snapshot_players(path)] == ["Q2"]